@@ -0,0 +1,18 @@
+"""
+Django management command to apply date-based AdmissionSession status changes
+(SCHEDULED -> OPEN -> EXPIRED). Run daily from cron, shortly after midnight.
+"""
+from django.core.management.base import BaseCommand
+
+from admissions.session_status import refresh_session_statuses
+
+
+class Command(BaseCommand):
+    help = 'Open scheduled and expire past-deadline admission sessions'
+
+    def handle(self, *args, **options):
+        changed = refresh_session_statuses()
+        self.stdout.write(self.style.SUCCESS(
+            f"Admission sessions refreshed: {changed['scheduled']} scheduled, "
+            f"{changed['opened']} opened, {changed['expired']} expired"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0002_alter_admissionsession_admission_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admissionsession',
+            index=models.Index(fields=['status', 'is_active'], name='admission_status_active_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator
 
+from .session_status import invalidate_session_cache
+
 class AdmissionSession(models.Model):
     """Model to manage admission sessions and online application periods"""
     
@@ -92,6 +94,9 @@ class AdmissionSession(models.Model):
     class Meta:
         db_table = 'admission_sessions'
         ordering = ['-admission_year', '-opening_date']
+        indexes = [
+            models.Index(fields=['status', 'is_active'], name='admission_status_active_idx'),
+        ]
         verbose_name = 'Admission Session'
         verbose_name_plural = 'Admission Sessions'
     
@@ -99,7 +104,8 @@ class AdmissionSession(models.Model):
         return f"{self.admission_code} - {self.admission_type} ({self.admission_year})"
     
     def save(self, *args, **kwargs):
-        # Auto-update status based on dates
+        # Auto-update status based on dates; session_status.refresh_session_statuses()
+        # applies the same rules in bulk as the dates pass
         from datetime import date
         today = date.today()
         
@@ -107,11 +113,21 @@ class AdmissionSession(models.Model):
             self.status = 'SCHEDULED'
         elif self.closing_date < today:
             self.status = 'EXPIRED'
-        elif self.opening_date <= today <= self.closing_date and self.status == 'CLOSED':
-            # Only auto-open if not explicitly closed by admin
-            pass
+        elif self.status == 'SCHEDULED':
+            # Opening date reached; a session explicitly CLOSED by an admin stays closed
+            self.status = 'OPEN'
         
         super().save(*args, **kwargs)
+        transaction.on_commit(invalidate_session_cache, using=self._state.db)
+        # Re-split quota shards in case max_applications changed
+        from portal.quota import sync_capacity
+        transaction.on_commit(lambda: sync_capacity(self), using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_session_cache, using=using)
+        return result
     
     @property
     def is_open(self):
@@ -0,0 +1,79 @@
+"""
+Date-driven AdmissionSession status transitions.
+
+refresh_session_statuses() applies the same rules as AdmissionSession.save()
+to every row with one UPDATE per transition, so read paths can filter on
+`status` alone. It runs from cron (`manage.py refresh_admission_sessions`) and,
+as a fallback, once per day on the first read that needs fresh statuses.
+Cached aggregates are dropped whenever a transition or a save changes rows.
+"""
+import logging
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'admission_sessions:'
+REFRESHED_ON_KEY = f'{CACHE_PREFIX}refreshed_on'
+STATISTICS_KEY = f'{CACHE_PREFIX}statistics'
+STATISTICS_TTL = 300
+
+
+def invalidate_session_cache():
+    from api.academic_calendar import invalidate_academic_year
+    cache.delete(STATISTICS_KEY)
+    invalidate_academic_year()
+
+
+def refresh_session_statuses(today=None):
+    """Apply SCHEDULED / OPEN / EXPIRED transitions; return {transition: rows}."""
+    from .models import AdmissionSession
+
+    today = today or date.today()
+    now = timezone.now()
+    sessions = AdmissionSession.objects.all()
+    changed = {
+        'scheduled': sessions.filter(opening_date__gt=today)
+                             .exclude(status='SCHEDULED')
+                             .update(status='SCHEDULED', updated_at=now),
+        'opened': sessions.filter(status='SCHEDULED', opening_date__lte=today, closing_date__gte=today)
+                          .update(status='OPEN', updated_at=now),
+        'expired': sessions.filter(closing_date__lt=today)
+                           .exclude(status='EXPIRED')
+                           .update(status='EXPIRED', updated_at=now),
+    }
+
+    cache.set(REFRESHED_ON_KEY, today.isoformat(), timeout=None)
+    if any(changed.values()):
+        invalidate_session_cache()
+        logger.info(f"Admission sessions refreshed: {changed}")
+    return changed
+
+
+def ensure_statuses_fresh():
+    """Run the day's transitions if neither cron nor another request has yet."""
+    today = date.today()
+    if cache.get(REFRESHED_ON_KEY) != today.isoformat():
+        refresh_session_statuses(today)
+
+
+def get_statistics():
+    """Session counts per status, from one aggregate query, cached."""
+    from .models import AdmissionSession
+
+    stats = cache.get(STATISTICS_KEY)
+    if stats is None:
+        ensure_statuses_fresh()
+        counts = AdmissionSession.objects.aggregate(
+            total_sessions=Count('id'),
+            open=Count('id', filter=Q(status='OPEN')),
+            closed=Count('id', filter=Q(status='CLOSED')),
+            scheduled=Count('id', filter=Q(status='SCHEDULED')),
+            expired=Count('id', filter=Q(status='EXPIRED')),
+        )
+        stats = dict(counts)
+        cache.set(STATISTICS_KEY, stats, timeout=STATISTICS_TTL)
+    return stats
@@ -6,6 +6,7 @@ from django.utils import timezone
 from datetime import date
 
 from .models import AdmissionSession
+from .session_status import ensure_statuses_fresh, get_statistics
 from .serializers import AdmissionSessionSerializer, AdmissionSessionListSerializer
 
 
@@ -146,29 +147,12 @@ class AdmissionSessionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active_sessions(self, request):
         """Get all currently active and open admission sessions"""
-        today = date.today()
-        active = AdmissionSession.objects.filter(
-            status='OPEN',
-            is_active=True,
-            opening_date__lte=today,
-            closing_date__gte=today
-        )
+        ensure_statuses_fresh()
+        active = AdmissionSession.objects.filter(status='OPEN', is_active=True)
         serializer = self.get_serializer(active, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get admission statistics"""
-        total = AdmissionSession.objects.count()
-        open_count = AdmissionSession.objects.filter(status='OPEN').count()
-        closed_count = AdmissionSession.objects.filter(status='CLOSED').count()
-        scheduled_count = AdmissionSession.objects.filter(status='SCHEDULED').count()
-        expired_count = AdmissionSession.objects.filter(status='EXPIRED').count()
-        
-        return Response({
-            'total_sessions': total,
-            'open': open_count,
-            'closed': closed_count,
-            'scheduled': scheduled_count,
-            'expired': expired_count,
-        })
+        return Response(get_statistics())
@@ -0,0 +1,141 @@
+"""
+Academic year resolution without network calls.
+
+The current academic year is taken from the active admission window
+(ApplicationSettings, then an open AdmissionSession) so applications are
+stamped with the same year the admission rows use; when nothing is open it
+falls back to the local calendar year. Academic years are always written in
+the canonical "2025-26" form (normalize_academic_year), whatever form an
+admission row or client used. The result is cached per day and dropped
+whenever admission settings or sessions change.
+
+If TIME_SYNC_URL is set, a daemon thread periodically compares the local
+clock with that server and logs the skew. It only reports; requests never
+wait on it and the year is always derived from local time.
+"""
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'academic_year:'
+DEFAULT_SYNC_INTERVAL = 3600
+DEFAULT_SYNC_TIMEOUT = 3
+DEFAULT_MAX_SKEW = 60
+
+_ACADEMIC_YEAR_RE = re.compile(r'^\s*(\d{4})\s*[-/\u2013]\s*(\d{2}|\d{4})\s*$')
+
+_sync_thread = None
+_sync_lock = threading.Lock()
+_clock_skew = None
+
+
+def normalize_academic_year(value):
+    """
+    Canonical form of an academic year: "2025-2026", "2025/26" and
+    "2025 - 26" all become "2025-26". Anything else (a bare "2025", blanks)
+    is returned stripped but otherwise unchanged.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    match = _ACADEMIC_YEAR_RE.match(value)
+    if not match:
+        return value
+    return f"{match.group(1)}-{match.group(2)[-2:]}"
+
+
+def _cache_key(day):
+    return f'{CACHE_PREFIX}{day.isoformat()}'
+
+
+def invalidate_academic_year():
+    cache.delete(_cache_key(timezone.localdate()))
+
+
+def _from_admission_rows():
+    from admissions.models import AdmissionSession
+    from portal.admission_window import get_active_window
+
+    window = get_active_window()
+    if window is not None and window.admission_year:
+        return normalize_academic_year(window.admission_year)
+    session = (
+        AdmissionSession.objects.filter(status='OPEN', is_active=True)
+        .values_list('admission_year', flat=True)
+        .first()
+    )
+    return normalize_academic_year(session) or None
+
+
+def current_academic_year():
+    """The academic year for today, always in the "2025-26" form."""
+    _ensure_time_sync()
+    today = timezone.localdate()
+    key = _cache_key(today)
+    year = cache.get(key)
+    if year is None:
+        try:
+            year = _from_admission_rows()
+        except Exception as e:
+            logger.warning("Could not read admission rows for academic year: %s", e)
+            year = None
+        if not year:
+            year = normalize_academic_year(f"{today.year}-{today.year + 1}")
+        cache.set(key, year, timeout=24 * 60 * 60)
+    return year
+
+
+def get_clock_skew():
+    """Seconds the local clock differs from TIME_SYNC_URL (None if unknown)."""
+    return _clock_skew
+
+
+def _check_clock(url, timeout):
+    import requests
+
+    global _clock_skew
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    remote = datetime.fromisoformat(response.json()['datetime'])
+    _clock_skew = (timezone.now() - remote).total_seconds()
+    max_skew = getattr(settings, 'TIME_SYNC_MAX_SKEW', DEFAULT_MAX_SKEW)
+    if abs(_clock_skew) > max_skew:
+        logger.warning(f"Local clock is {_clock_skew:.0f}s off {url}; check NTP on this host")
+
+
+def _time_sync_loop(url, interval, timeout):
+    while True:
+        try:
+            _check_clock(url, timeout)
+        except Exception as e:
+            logger.info(f"Time sync check against {url} failed: {str(e)}")
+        time.sleep(interval)
+
+
+def _ensure_time_sync():
+    """Start the optional clock check once per process, in the background."""
+    global _sync_thread
+    url = getattr(settings, 'TIME_SYNC_URL', None)
+    if not url or _sync_thread is not None:
+        return
+    with _sync_lock:
+        if _sync_thread is None:
+            _sync_thread = threading.Thread(
+                target=_time_sync_loop,
+                args=(
+                    url,
+                    getattr(settings, 'TIME_SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL),
+                    getattr(settings, 'TIME_SYNC_TIMEOUT', DEFAULT_SYNC_TIMEOUT),
+                ),
+                name='academic-calendar-time-sync',
+                daemon=True,
+            )
+            _sync_thread.start()
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+
+TOKEN_CACHE_PREFIX = "student_token:"
+
+# User fields the student views read from request.user.
+SNAPSHOT_FIELDS = (
+    "id", "username", "email", "first_name", "last_name",
+    "is_active", "is_staff", "is_superuser",
+)
+
+
+def _cache_key(key: str) -> str:
+    return f"{TOKEN_CACHE_PREFIX}{key}"
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+
+def _user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    user = User(**snapshot)
+    # Mark the instance as loaded from the default database so that queries
+    # filtering on it (Application.objects.filter(user=user)) behave as usual.
+    user._state.adding = False
+    user._state.db = "default"
+    return user
+
+
+def invalidate_token(key: Optional[str]) -> None:
+    """Drop a single cached token snapshot."""
+    if key:
+        cache.delete(_cache_key(key))
+
+
+def invalidate_user_tokens(user: User) -> None:
+    """Drop every cached snapshot belonging to ``user`` (logout/password reset)."""
+    keys = Token.objects.using("default").filter(user_id=user.pk).values_list("key", flat=True)
+    cache.delete_many([_cache_key(key) for key in keys])
+
+
+def _token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+def _user_saved(sender, instance, created=False, raw=False, **kwargs):
+    # Deactivation and staff/permission changes must not wait for the TTL
+    if not created and not raw:
+        invalidate_user_tokens(instance)
+
+
+def connect_token_invalidation() -> None:
+    """Drop snapshots whenever a Token is deleted or its User changes (ApiConfig.ready)."""
+    from django.db.models.signals import post_delete, post_save
+
+    post_delete.connect(_token_deleted, sender=Token, dispatch_uid="api.token_deleted")
+    post_save.connect(_user_saved, sender=User, dispatch_uid="api.user_saved")
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the key -> user lookup.
+
+    The first request for a token pays the usual Token + User join on the
+    default database; later requests within STUDENT_TOKEN_CACHE_TTL seconds are
+    served from the cache. The cache is shared by all workers (CACHES), so a
+    snapshot dropped on logout, password reset, token deletion or a user
+    update is gone for every process.
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = cache.get(_cache_key(key))
+        if snapshot is not None:
+            user = _user_from_snapshot(snapshot)
+            return user, self.get_model()(key=key, user=user)
+
+        user, token = super().authenticate_credentials(key)
+        ttl = getattr(settings, "STUDENT_TOKEN_CACHE_TTL", 300)
+        if ttl:
+            cache.set(_cache_key(key), _snapshot(user), timeout=ttl)
+        return user, token
+
+
+def get_namespace_authentication_classes(namespace: str) -> List[type]:
+    """Resolve AUTHENTICATION_CLASSES_BY_NAMESPACE[namespace] to classes."""
+    paths = getattr(settings, "AUTHENTICATION_CLASSES_BY_NAMESPACE", {}).get(namespace)
+    if not paths:
+        return []
+    return [import_string(path) for path in paths]
+
+
+def apply_namespace_authentication(urlpatterns: Iterable, namespace: str) -> List:
+    """
+    Give every DRF view in ``urlpatterns`` the authentication order configured
+    for ``namespace``. Views that declare their own authentication_classes are
+    left untouched.
+    """
+    urlpatterns = list(urlpatterns)
+    classes = get_namespace_authentication_classes(namespace)
+    if not classes:
+        return urlpatterns
+
+    for pattern in urlpatterns:
+        view_cls = getattr(getattr(pattern, "callback", None), "cls", None)
+        if view_cls is None or not issubclass(view_cls, APIView):
+            continue
+        if view_cls.authentication_classes is APIView.authentication_classes:
+            view_cls.authentication_classes = classes
+    return urlpatterns
@@ -0,0 +1,107 @@
+"""
+In-process catalog of Courses (tbl_course) and AllCourses (allcourses).
+
+Each worker keeps a degree -> course dict per table and reloads it only when
+the shared catalog version in the cache changes. Courses/AllCourses save() and
+delete() bump that version, and COURSE_CATALOG_TTL bounds staleness after
+writes that bypass the ORM. Lookups are dict reads; `.first()` semantics are
+kept by letting the lowest id win when several rows share a degree.
+
+Degrees are keyed casefolded and stripped (degree_key), matching the MySQL
+collation the old `filter(degree=...)` lookups relied on.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'course_catalog:version'
+DEFAULT_TTL = 600
+
+
+def degree_key(degree):
+    return (degree or '').strip().casefold()
+
+
+class CatalogSnapshot:
+    def __init__(self, version, courses, all_courses):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.courses = {}
+        for course in courses:
+            self.courses.setdefault(degree_key(course.degree), course)
+        self.all_courses = {}
+        for course in all_courses:
+            self.all_courses.setdefault(degree_key(course.degree), course)
+        # get_courses payload: one entry per tbl_course row, in id order
+        self.degrees = [{'degree': course.degree} for course in courses]
+        body = json.dumps(self.degrees, sort_keys=True).encode('utf-8')
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so concurrent workers agree on a single initial version
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_catalog():
+    """Bump the shared version; every worker reloads on its next lookup."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_catalog():
+    global _snapshot
+    from .models import AllCourses, Courses
+
+    version = _current_version()
+    ttl = getattr(settings, 'COURSE_CATALOG_TTL', DEFAULT_TTL)
+    snapshot = _snapshot
+    if (snapshot is not None and snapshot.version == version
+            and time.monotonic() - snapshot.loaded_at < ttl):
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if (snapshot is None or snapshot.version != version
+                or time.monotonic() - snapshot.loaded_at >= ttl):
+            snapshot = CatalogSnapshot(
+                version,
+                list(Courses.objects.order_by('id')),
+                list(AllCourses.objects.order_by('id')),
+            )
+            _snapshot = snapshot
+            logger.info(
+                "Course catalog loaded: %d courses, %d allcourses",
+                len(snapshot.courses), len(snapshot.all_courses),
+            )
+    return snapshot
+
+
+def course_for_degree(degree):
+    """The tbl_course row for `degree`, or None."""
+    if not degree:
+        return None
+    return get_catalog().courses.get(degree_key(degree))
+
+
+def all_course_for_degree(degree):
+    """The allcourses row for `degree`, or None."""
+    if not degree:
+        return None
+    return get_catalog().all_courses.get(degree_key(degree))
@@ -0,0 +1,294 @@
+"""
+Resumable migration of legacy Google Drive document URLs to local storage.
+
+Rows are walked in primary-key order, one chunk at a time. For each chunk the
+Drive files are downloaded by a bounded thread pool over the pooled proxy
+session, written into the same per-student document folders the
+upload views use, and the new URLs are saved with one bulk_update. After each
+chunk the last primary key is written to a JSON checkpoint, so an interrupted
+run picks up where it stopped.
+
+Files are named after their Drive id, so a chunk that was downloaded but not
+saved is not fetched again. Rows that failed keep their Drive URL; run again
+with restart=True to retry them (migrated rows no longer match the Drive
+filter, so only failures are scanned).
+"""
+import json
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .drive_proxy import DEFAULT_URL, get_session
+from .models import MarksheetUpload, StudentDetails
+from .utils import get_document_folder, safe_email_folder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+DEFAULT_WORKERS = 8
+DOWNLOAD_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 50
+
+DRIVE_HOST = 'drive.google.com'
+FILE_ID_PATTERNS = [
+    re.compile(r'/file/d/([^/?#]+)'),
+    re.compile(r'[?&]id=([^&#]+)'),
+    re.compile(r'/d/([^/?#]+)'),
+]
+
+# StudentDetails URL field -> document folder (api.utils.DOCUMENT_FOLDERS)
+STUDENT_FIELD_FOLDERS = {
+    'sslc_marksheet_url': 'SSLC',
+    'hsc_marksheet_url': 'HSC',
+    'ug_marksheet_url': 'UG',
+    'semester_marksheet_url': 'Semester',
+    'photo_url': 'Photo',
+    'signature_url': 'Signature',
+    'community_certificate_url': 'Community_Certificate',
+    'aadhaar_url': 'Aadhar_Card',
+    'transfer_certificate_url': 'Transfer_Certificate',
+}
+
+# MarksheetUpload.qualification_type -> folder, as in upload_marksheet
+MARKSHEET_FOLDERS = {
+    'S.S.L.C': 'SSLC',
+    'HSC': 'HSC',
+    'Semester': 'Semester',
+    'UG Provisional': 'UG',
+}
+
+
+class DownloadError(Exception):
+    pass
+
+
+def extract_file_id(url):
+    """Drive file id from a share/download/proxy URL, or None."""
+    if not url or DRIVE_HOST not in url:
+        return None
+    for pattern in FILE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _media_url(path):
+    relative = os.path.relpath(path, settings.MEDIA_ROOT).replace('\\', '/')
+    # Stored unsigned; api.protected_media signs URLs as they are served
+    return f"{settings.MEDIA_URL}{relative}"
+
+
+def _find_existing(folder, stem):
+    """A file from an earlier, unsaved run of the same chunk."""
+    try:
+        for name in os.listdir(folder):
+            if os.path.splitext(name)[0] == stem:
+                return os.path.join(folder, name)
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def download_to_folder(file_id, folder, stem):
+    """
+    Stream one Drive file into folder/stem.<ext> and return (path, bytes).
+    Written to a temporary file first so a failed download leaves nothing.
+    """
+    existing = _find_existing(folder, stem)
+    if existing:
+        return existing, 0
+
+    url = getattr(settings, 'DRIVE_PROXY_URL', DEFAULT_URL).format(file_id=file_id)
+    with get_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code != 200:
+            raise DownloadError(f'HTTP {response.status_code}')
+        content_type = response.headers.get('content-type', '').split(';')[0].strip()
+        if content_type == 'text/html':
+            # Drive answers private or oversized files with an HTML page
+            raise DownloadError('Drive returned an HTML page instead of the file')
+        extension = mimetypes.guess_extension(content_type) or '.bin'
+        if extension == '.jpe':
+            extension = '.jpg'
+
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    out.write(chunk)
+                    size += len(chunk)
+            path = os.path.join(folder, f'{stem}{extension}')
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return path, size
+
+
+class DriveMigration:
+    """
+    Move Drive-hosted document URLs to local storage.
+
+    run() returns counters: rows scanned, files migrated/reused/failed, bytes,
+    elapsed seconds and files per second; `errors` holds the first failures.
+    """
+
+    def __init__(self, chunk_size=None, workers=None, dry_run=False,
+                 checkpoint_path=None, restart=False, limit=None, progress=None):
+        self.chunk_size = chunk_size or getattr(settings, 'DRIVE_MIGRATION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.workers = workers or getattr(settings, 'DRIVE_MIGRATION_WORKERS', DEFAULT_WORKERS)
+        self.dry_run = dry_run
+        self.checkpoint_path = checkpoint_path
+        self.limit = limit
+        self.progress = progress
+        self.checkpoint = {} if restart else self._load_checkpoint()
+        self.stats = {
+            'rows': 0,
+            'migrated': 0,
+            'reused': 0,
+            'failed': 0,
+            'bytes': 0,
+            'elapsed': 0.0,
+            'files_per_second': 0.0,
+        }
+        self.errors = []
+
+    # Checkpoint ------------------------------------------------------------
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, key, last_pk):
+        self.checkpoint[key] = last_pk
+        if not self.checkpoint_path or self.dry_run:
+            return
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    # Work ------------------------------------------------------------------
+
+    def _chunks(self, queryset, key):
+        """PK-ordered chunks starting after the checkpoint for `key`."""
+        last_pk = self.checkpoint.get(key, 0)
+        while True:
+            if self.limit is not None and self.stats['rows'] >= self.limit:
+                return
+            size = self.chunk_size
+            if self.limit is not None:
+                size = min(size, self.limit - self.stats['rows'])
+            chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1].pk
+            self._save_checkpoint(key, last_pk)
+
+    def _download(self, task):
+        obj, field, file_id, folder, stem = task
+        try:
+            path, size = download_to_folder(file_id, folder, stem)
+            return task, _media_url(path), size, None
+        except Exception as e:
+            return task, None, 0, str(e)
+
+    def _process(self, model, chunk, tasks, executor):
+        self.stats['rows'] += len(chunk)
+        if self.dry_run:
+            self.stats['migrated'] += len(tasks)
+            return
+
+        changed_fields = set()
+        changed_objs = {}
+        for task, new_url, size, error in executor.map(self._download, tasks):
+            obj, field, file_id = task[:3]
+            if error:
+                self.stats['failed'] += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({'model': model.__name__, 'pk': obj.pk, 'field': field,
+                                        'file_id': file_id, 'error': error})
+                logger.warning(f"Drive migration failed for {model.__name__} {obj.pk}.{field}: {error}")
+                continue
+            self.stats['reused' if size == 0 else 'migrated'] += 1
+            self.stats['bytes'] += size
+            setattr(obj, field, new_url)
+            obj.updated_at = timezone.now()  # bulk_update skips auto_now; ETags hash it
+            changed_fields.add(field)
+            changed_objs[obj.pk] = obj
+
+        if changed_objs:
+            model.objects.bulk_update(list(changed_objs.values()), sorted(changed_fields) + ['updated_at'])
+
+    def _student_tasks(self, chunk):
+        tasks = []
+        for detail in chunk:
+            for field, folder_name in STUDENT_FIELD_FOLDERS.items():
+                file_id = extract_file_id(getattr(detail, field))
+                if not file_id:
+                    continue
+                folder = None if self.dry_run else get_document_folder(detail.email, folder_name)
+                stem = f"{safe_email_folder(detail.email)}_{field}_{file_id}"
+                tasks.append((detail, field, file_id, folder, stem))
+        return tasks
+
+    def _marksheet_tasks(self, chunk):
+        tasks = []
+        for upload in chunk:
+            file_id = extract_file_id(upload.file_url)
+            if not file_id:
+                continue
+            folder = None
+            if not self.dry_run:
+                folder_name = MARKSHEET_FOLDERS.get(upload.qualification_type, 'UG')
+                folder = get_document_folder(upload.email, folder_name)
+            stem = f"{safe_email_folder(upload.email)}_marksheet_{file_id}"
+            tasks.append((upload, 'file_url', file_id, folder, stem))
+        return tasks
+
+    def _report(self, started, notify=True):
+        self.stats['elapsed'] = round(time.monotonic() - started, 2)
+        files = self.stats['migrated'] + self.stats['reused']
+        if self.stats['elapsed']:
+            self.stats['files_per_second'] = round(files / self.stats['elapsed'], 2)
+        if notify and self.progress:
+            self.progress(self.stats)
+
+    def run(self):
+        started = time.monotonic()
+        drive_filter = Q()
+        for field in STUDENT_FIELD_FOLDERS:
+            drive_filter |= Q(**{f'{field}__contains': DRIVE_HOST})
+        students = StudentDetails.objects.filter(drive_filter).only(
+            'id', 'email', *STUDENT_FIELD_FOLDERS
+        )
+        marksheets = MarksheetUpload.objects.filter(file_url__contains=DRIVE_HOST).only(
+            'id', 'email', 'qualification_type', 'file_url'
+        )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for chunk in self._chunks(students, 'studentdetails'):
+                self._process(StudentDetails, chunk, self._student_tasks(chunk), executor)
+                self._report(started)
+            for chunk in self._chunks(marksheets, 'marksheetupload'):
+                self._process(MarksheetUpload, chunk, self._marksheet_tasks(chunk), executor)
+                self._report(started)
+
+        self._report(started, notify=False)
+        logger.info(f"Drive migration finished: {self.stats}")
+        return self.stats
@@ -0,0 +1,440 @@
+"""
+Streaming, cached proxy for Google Drive files.
+
+- Upstream fetches share one pooled requests.Session (keep-alive, bounded
+  retries on 502/503/504) instead of opening a new connection per preview.
+- Responses are streamed in chunks; on a cache miss the same chunks are
+  written to a temporary file that is atomically moved into the cache once
+  the download completes.
+- The cache lives in DRIVE_PROXY_CACHE_DIR, keyed by file_id, and is bounded
+  by DRIVE_PROXY_CACHE_MAX_BYTES with least-recently-used eviction (hits
+  touch the file's mtime). Each worker keeps a running total of the bytes
+  it has cached and only walks the directory once that total passes the
+  limit, or every DRIVE_PROXY_CACHE_RESCAN_SECONDS to pick up other
+  workers' fills. Upstream ETag/Last-Modified are kept alongside so
+  entries older than DRIVE_PROXY_CACHE_MAX_AGE are revalidated with a
+  conditional request rather than downloaded again.
+- Cached files honour single-range `Range: bytes=a-b` requests (206/416) and
+  the client's If-None-Match. A Range request on a miss first downloads the
+  file into the cache, up to DRIVE_PROXY_MAX_FILE_BYTES; larger files, and
+  any file when the cache is not writable, are streamed whole instead.
+
+DRIVE_PROXY_URL is a format string with {file_id}, so a local HTTP server
+can stand in for Drive in development and tests.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.instrumentation import track_outbound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'https://drive.google.com/uc?export=download&id={file_id}'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_FILE_BYTES = 25 * 1024 * 1024
+DEFAULT_MAX_AGE = 24 * 60 * 60
+DEFAULT_RESCAN_SECONDS = 5 * 60
+DEFAULT_TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024
+
+FILE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,200}$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_session():
+    """Process-wide pooled session for upstream requests."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=_setting('DRIVE_PROXY_POOL_SIZE', 20),
+                    max_retries=Retry(
+                        total=2,
+                        backoff_factor=0.3,
+                        status_forcelist=(502, 503, 504),
+                        allowed_methods=frozenset(['GET', 'HEAD']),
+                    ),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class CacheEntry:
+    def __init__(self, data_path, meta):
+        self.data_path = data_path
+        self.meta = meta
+
+    @property
+    def size(self):
+        return self.meta['size']
+
+    @property
+    def etag(self):
+        return self.meta['etag']
+
+    def is_stale(self, max_age):
+        return time.time() - self.meta.get('validated_at', 0) > max_age
+
+
+class DriveFileCache:
+    """Bounded on-disk LRU cache of proxied files."""
+
+    def __init__(self, root, max_bytes, rescan_seconds=DEFAULT_RESCAN_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self._size = None  # bytes on disk as of the last scan, plus fills since
+        self._scanned_at = 0.0
+        self._size_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, file_id):
+        bucket = os.path.join(self.root, hashlib.sha1(file_id.encode('utf-8')).hexdigest()[:2])
+        return bucket, os.path.join(bucket, f'{file_id}.bin'), os.path.join(bucket, f'{file_id}.json')
+
+    def get(self, file_id):
+        _, data_path, meta_path = self._paths(file_id)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if os.path.getsize(data_path) != meta['size']:
+                return None
+            os.utime(data_path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        return CacheEntry(data_path, meta)
+
+    def write_meta(self, file_id, meta):
+        bucket, _, meta_path = self._paths(file_id)
+        os.makedirs(bucket, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=bucket, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def open_writer(self, file_id):
+        bucket, data_path, _ = self._paths(file_id)
+        os.makedirs(bucket, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=bucket, suffix='.part')
+        return os.fdopen(fd, 'wb'), tmp_path, data_path
+
+    def commit(self, file_id, tmp_path, data_path, meta):
+        meta['size'] = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(data_path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, data_path)
+        self.write_meta(file_id, meta)
+        with self._size_lock:
+            if self._size is not None:
+                self._size += meta['size'] - replaced
+            due = (self._size is None or self._size > self.max_bytes
+                   or time.monotonic() - self._scanned_at > self.rescan_seconds)
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Walk the cache and delete least recently used files until it fits max_bytes."""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                for victim in (path, path[:-len('.bin')] + '.json'):
+                    try:
+                        os.remove(victim)
+                    except OSError:
+                        pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._size_lock:
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        root = _setting('DRIVE_PROXY_CACHE_DIR', os.path.join(settings.BASE_DIR, 'drive_cache'))
+        _cache = DriveFileCache(
+            root,
+            _setting('DRIVE_PROXY_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+            _setting('DRIVE_PROXY_CACHE_RESCAN_SECONDS', DEFAULT_RESCAN_SECONDS),
+        )
+    return _cache
+
+
+def _content_type(kind, upstream_type):
+    if kind == 'image':
+        if not upstream_type.startswith('image/'):
+            logger.warning(f"Unexpected content type for image: {upstream_type}")
+            return 'image/jpeg'
+        return upstream_type
+    if not upstream_type.startswith('application/pdf'):
+        logger.warning(f"Correcting content type from {upstream_type} to application/pdf")
+        return 'application/pdf'
+    return upstream_type
+
+
+def _content_disposition(kind, upstream_disposition, file_id):
+    if upstream_disposition:
+        return upstream_disposition
+    if kind == 'image':
+        return 'inline; filename="image.jpg"'
+    return f'inline; filename="{quote(f"document_{file_id}.pdf")}"'
+
+
+def _meta_from_upstream(upstream, file_id, kind):
+    headers = upstream.headers
+    etag = headers.get('ETag')
+    return {
+        'content_type': _content_type(kind, headers.get('content-type', '')),
+        'content_disposition': _content_disposition(kind, headers.get('content-disposition', ''), file_id),
+        'upstream_etag': etag,
+        'upstream_last_modified': headers.get('Last-Modified'),
+        # Drive's download endpoint rarely sends a validator; fall back to our own
+        'etag': etag or f'"{hashlib.sha1(f"{file_id}:{time.time()}".encode()).hexdigest()}"',
+        'validated_at': time.time(),
+    }
+
+
+def _fetch(file_id, meta=None):
+    url = _setting('DRIVE_PROXY_URL', DEFAULT_URL).format(file_id=file_id)
+    headers = {}
+    if meta:
+        if meta.get('upstream_etag'):
+            headers['If-None-Match'] = meta['upstream_etag']
+        if meta.get('upstream_last_modified'):
+            headers['If-Modified-Since'] = meta['upstream_last_modified']
+    with track_outbound('drive'):
+        return get_session().get(url, headers=headers, stream=True,
+                                 timeout=_setting('DRIVE_PROXY_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def _apply_headers(response, meta):
+    response['Content-Type'] = meta['content_type']
+    response['Content-Disposition'] = meta['content_disposition']
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = meta['etag']
+    if meta.get('upstream_last_modified'):
+        response['Last-Modified'] = meta['upstream_last_modified']
+    response['Cache-Control'] = f"private, max-age={_setting('DRIVE_PROXY_CACHE_MAX_AGE', DEFAULT_MAX_AGE)}"
+    return response
+
+
+def _parse_range(header, size):
+    """Return (start, end) for a single satisfiable range, None for no/unsupported range, or 'invalid'."""
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # multi-range or other units: serve the whole file
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _serve_cached(request, entry):
+    if request.META.get('HTTP_IF_NONE_MATCH') == entry.etag:
+        return _apply_headers(HttpResponse(status=304), entry.meta)
+
+    byte_range = _parse_range(request.META.get('HTTP_RANGE'), entry.size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{entry.size}'
+        return response
+    if byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(entry.data_path, start, end), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{entry.size}'
+        response['Content-Length'] = str(end - start + 1)
+        return _apply_headers(response, entry.meta)
+
+    response = FileResponse(open(entry.data_path, 'rb'))
+    response['Content-Length'] = str(entry.size)
+    return _apply_headers(response, entry.meta)
+
+
+def _tee(upstream, cache, file_id, meta, max_file_bytes):
+    """Yield upstream chunks to the client while filling the cache."""
+    writer = tmp_path = data_path = None
+    try:
+        writer, tmp_path, data_path = cache.open_writer(file_id)
+    except OSError as e:
+        logger.warning(f"Drive cache unavailable for {file_id}: {str(e)}")
+    written = 0
+    complete = False
+    try:
+        for chunk in upstream.iter_content(chunk_size=CHUNK_SIZE):
+            if writer is not None:
+                written += len(chunk)
+                if written > max_file_bytes:
+                    writer.close()
+                    os.remove(tmp_path)
+                    writer = None
+                else:
+                    writer.write(chunk)
+            yield chunk
+        complete = True
+    finally:
+        upstream.close()
+        if writer is not None:
+            writer.close()
+            if complete:
+                cache.commit(file_id, tmp_path, data_path, meta)
+            else:
+                # Client went away or upstream failed mid-transfer
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+def _fill(upstream, writer, tmp_path, data_path, cache, file_id, meta, max_file_bytes):
+    """
+    Download the whole file into the cache and return the entry (for Range on
+    a miss). Returns None, with the partial file removed, when the file turns
+    out larger than max_file_bytes or the disk write fails.
+    """
+    written = 0
+    try:
+        with writer:
+            for chunk in upstream.iter_content(chunk_size=CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_file_bytes:
+                    break
+                writer.write(chunk)
+        if written > max_file_bytes:
+            os.remove(tmp_path)
+            return None
+        cache.commit(file_id, tmp_path, data_path, meta)
+    except Exception as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        if not isinstance(e, OSError):
+            raise
+        logger.warning("Drive cache write failed for %s: %s", file_id, e)
+        return None
+    finally:
+        upstream.close()
+    return cache.get(file_id)
+
+
+def serve(request, file_id, kind):
+    """Proxy Drive `file_id` as an image ('image') or a PDF ('file')."""
+    if not FILE_ID_RE.match(file_id):
+        return HttpResponse(status=404, content="File not found")
+
+    cache = get_cache()
+    max_age = _setting('DRIVE_PROXY_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+    entry = cache.get(file_id)
+
+    try:
+        if entry is not None and not entry.is_stale(max_age):
+            return _serve_cached(request, entry)
+
+        upstream = _fetch(file_id, entry.meta if entry else None)
+        if entry is not None and upstream.status_code == 304:
+            upstream.close()
+            entry.meta['validated_at'] = time.time()
+            cache.write_meta(file_id, entry.meta)
+            return _serve_cached(request, entry)
+
+        if upstream.status_code != 200:
+            upstream.close()
+            if entry is not None:
+                logger.warning(f"Drive returned {upstream.status_code} revalidating {file_id}; serving cached copy")
+                return _serve_cached(request, entry)
+            logger.error(f"Google Drive returned status {upstream.status_code} for file_id {file_id}")
+            return HttpResponse(status=404, content=f"File not found: Status {upstream.status_code}")
+
+        meta = _meta_from_upstream(upstream, file_id, kind)
+        max_file_bytes = _setting('DRIVE_PROXY_MAX_FILE_BYTES', DEFAULT_MAX_FILE_BYTES)
+        length = upstream.headers.get('content-length')
+        fits = length is None or int(length) <= max_file_bytes
+
+        if request.META.get('HTTP_RANGE') and fits:
+            try:
+                writer, tmp_path, data_path = cache.open_writer(file_id)
+            except OSError as e:
+                # Nothing read from upstream yet: stream it without Range support
+                logger.warning("Drive cache unavailable for %s: %s", file_id, e)
+            else:
+                entry = _fill(upstream, writer, tmp_path, data_path, cache, file_id, meta, max_file_bytes)
+                if entry is not None:
+                    return _serve_cached(request, entry)
+                upstream = _fetch(file_id)
+
+        response = StreamingHttpResponse(_tee(upstream, cache, file_id, meta, max_file_bytes))
+        if length:
+            response['Content-Length'] = length
+        logger.info(f"Proxying {kind} {file_id} from Drive")
+        return _apply_headers(response, meta)
+    except requests.RequestException as e:
+        if entry is not None:
+            logger.warning(f"Drive unreachable revalidating {file_id}; serving cached copy: {str(e)}")
+            return _serve_cached(request, entry)
+        logger.error(f"Error proxying {kind} {file_id}: {str(e)}")
+        return HttpResponse(status=500, content=f"Error fetching file: {str(e)}")
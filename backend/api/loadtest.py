@@ -0,0 +1,505 @@
+"""
+Synthetic data and a concurrent driver for the student admission flow.
+
+seed() bulk-loads students, applications, payments and LSC data at a given
+scale; every synthetic row is recognisable (emails @loadtest.invalid, "LT"
+codes) so purge() can remove it again. run_load() sends simulated students
+through the whole journey, from send-otp to download-application, on
+concurrent threads. Each thread drives the full Django stack (middleware,
+authentication, views, every database alias) in-process through the test
+client, so the numbers reflect the application and database rather than
+the HTTP server in front of it.
+
+SMTP and Paytm are replaced by local stand-ins. OTP mails are captured by
+LoadTestEmailBackend, and the harness plays the gateway by posting a signed
+success callback to pgResponse. Both stand-ins can add a fixed latency.
+
+Everything here writes to (or deletes from) the configured databases, so it
+refuses to run unless LOADTEST_ENABLED is set: LOADTEST_ENABLED=1 in the
+environment, or a settings module for a dedicated load-test deployment.
+"""
+import io
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connections, router, transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from backend.instrumentation import track_outbound
+from lsc_auth.models import LSCUser
+from portal.models import Program as PortalProgram
+from portal.models import Student as PortalStudent
+
+from .models import Application, ApplicationPayment, Courses, Student, StudentDetails
+from .paytm_checksum import form_checksum
+from .utils import get_real_academic_year
+
+logger = logging.getLogger(__name__)
+
+DOMAIN = 'loadtest.invalid'
+CODE_PREFIX = 'LT'
+PASSWORD = 'LoadTest@123'
+MERCHANT_KEY = 'loadtest-merchant-key'
+MERCHANT_MID = 'LOADTEST000000000000'
+
+COURSES = ('LT B.A.', 'LT B.Com.', 'LT M.B.A.')
+PROGRAMS = ('LTBA', 'LTBCOM', 'LTMBA', 'LTMA', 'LTMSC')
+STUDENTS_PER_LSC = 1000
+# Share of seeded applications in each status; Completed ones are paid
+APPLICATION_MIX = (('Completed', 0.6), ('Draft', 0.3), ('In Progress', 0.1))
+
+JOURNEY_STEPS = (
+    'send-otp', 'verify-otp', 'signup', 'login', 'academic-year', 'courses',
+    'page1', 'page2', 'page3', 'upload-documents', 'initiate-payment',
+    'pgResponse', 'download-application',
+)
+
+
+# Seeding ----------------------------------------------------------------------
+
+class LoadTestNotEnabled(ImproperlyConfigured):
+    pass
+
+
+def ensure_enabled():
+    """Raise LoadTestNotEnabled unless this deployment opted in to load tests."""
+    if not getattr(settings, 'LOADTEST_ENABLED', False):
+        raise LoadTestNotEnabled(
+            f"Load-test data is only written with LOADTEST_ENABLED set "
+            f"(settings module {settings.SETTINGS_MODULE}); point the command at a "
+            f"dedicated load-test deployment and set LOADTEST_ENABLED=1"
+        )
+
+
+def ensure_reference_data(lsc_count):
+    """Courses, LSC programmes and LSC centres the synthetic rows point at."""
+    existing = set(Courses.objects.filter(degree__in=COURSES).values_list('degree', flat=True))
+    for degree in COURSES:
+        if degree not in existing:
+            Courses.objects.create(
+                course_short_code=degree, course_full_name=degree, branch_name='Load test',
+                num_semesters=6, num_years=3, course_code=degree, degree=degree,
+            )
+    existing = set(PortalProgram.objects.filter(code__in=PROGRAMS).values_list('code', flat=True))
+    PortalProgram.objects.bulk_create(
+        [PortalProgram(code=code, name=f'Load test {code}') for code in PROGRAMS if code not in existing]
+    )
+    centres = [f'{CODE_PREFIX}{i:05d}' for i in range(lsc_count)]
+    existing = set(LSCUser.objects.filter(lsc_number__in=centres).values_list('lsc_number', flat=True))
+    LSCUser.objects.bulk_create([
+        LSCUser(lsc_number=code, lsc_name=f'Load test centre {code}', email=f'{code.lower()}@{DOMAIN}', password='!')
+        for code in centres if code not in existing
+    ])
+    programs = list(PortalProgram.objects.filter(code__in=PROGRAMS).values_list('id', flat=True))
+    return programs, centres
+
+
+def _pick_status(rng):
+    roll = rng.random()
+    for status, share in APPLICATION_MIX:
+        if roll < share:
+            return status
+        roll -= share
+    return APPLICATION_MIX[-1][0]
+
+
+def seed(students, batch_size=1000, seed=1, progress=None):
+    """
+    Add `students` synthetic students, each with a login, an application
+    and (when completed) a payment and page 3 details, plus one LSC student
+    record. Numbering continues after earlier runs, so the data set can be
+    grown in steps. Returns {model label: rows created}.
+    """
+    ensure_enabled()
+    start = User.objects.filter(username__startswith='student', username__endswith=f'@{DOMAIN}').count()
+    programs, centres = ensure_reference_data(max(1, (start + students) // STUDENTS_PER_LSC))
+    academic_year = get_real_academic_year()
+    rng = random.Random(f'{seed}:{start}')
+    created = {'users': 0, 'students': 0, 'applications': 0, 'payments': 0, 'details': 0, 'lsc_students': 0}
+
+    for offset in range(start, start + students, batch_size):
+        indexes = range(offset, min(offset + batch_size, start + students))
+        emails = {i: f'student{i}@{DOMAIN}' for i in indexes}
+        User.objects.bulk_create([User(username=email, email=email, password='!') for email in emails.values()])
+        # bulk_create does not return primary keys on MySQL
+        user_ids = dict(User.objects.filter(username__in=emails.values()).values_list('username', 'id'))
+
+        api_students, applications, payments, details, lsc_students = [], [], [], [], []
+        for i in indexes:
+            email = emails[i]
+            status = _pick_status(rng)
+            course = rng.choice(COURSES)
+            api_students.append(Student(
+                user_id=user_ids[email], name=f'Student {i}', email=email, phone=f'7{i:09d}',
+                password=PASSWORD, is_verified=True, lsc_code=rng.choice(centres),
+            ))
+            applications.append(Application(
+                user_id=user_ids[email], email=email, course=course, academic_year=academic_year,
+                mode_of_study='ODL', programme_applied='UG', medium='English', name_initial=f'Student {i}',
+                application_id=f'PU/ODL/{CODE_PREFIX}/{i:08d}', status=status,
+                payment_status='P' if status == 'Completed' else 'N',
+            ))
+            if status == 'Completed':
+                payments.append(ApplicationPayment(
+                    user_id=user_ids[email], application_id=f'PU/PA/LT/{i:08d}', user_name=f'Student {i}',
+                    email=email, order_id=f'{CODE_PREFIX}ORDER{i:09d}', transaction_id=f'{CODE_PREFIX}TXN{i:09d}',
+                    amount=Decimal('236.00'), course=course, payment_status='TXN_SUCCESS',
+                    payment_type='APPLICATION_FEE', transaction_date=timezone.now(), mid=MERCHANT_MID,
+                ))
+                details.append(StudentDetails(
+                    user_id=user_ids[email], email=email, name_initial=f'Student {i}',
+                    qualifications=[], semester_marks=[], percentage=round(rng.uniform(40, 95), 2),
+                ))
+            lsc_students.append(PortalStudent(
+                application_no=f'{CODE_PREFIX}{i:08d}', name=f'Student {i}', program_id=rng.choice(programs),
+                community=rng.choice(('General', 'OBC', 'SC', 'ST')),
+                payment_status='Paid' if status == 'Completed' else 'Pending',
+            ))
+
+        Student.objects.bulk_create(api_students)
+        Application.objects.bulk_create(applications)
+        ApplicationPayment.objects.bulk_create(payments)
+        StudentDetails.objects.bulk_create(details)
+        PortalStudent.objects.bulk_create(lsc_students)
+        created['users'] += len(emails)
+        created['students'] += len(api_students)
+        created['applications'] += len(applications)
+        created['payments'] += len(payments)
+        created['details'] += len(details)
+        created['lsc_students'] += len(lsc_students)
+        if progress:
+            progress(indexes.stop - start, students)
+    return created
+
+
+def _delete_users(users):
+    """
+    Delete auth users on their own alias. Their api/portal rows live on other
+    aliases and are deleted first; a cascading QuerySet.delete() would look
+    for them on the users' database, so the rows are removed with a plain
+    DELETE per batch.
+    """
+    using = router.db_for_write(User)
+    pks = list(users.using(using).values_list('pk', flat=True))
+    Token.objects.using(using).filter(user_id__in=pks).delete()
+    connection = connections[using]
+    table = connection.ops.quote_name(User._meta.db_table)
+    deleted = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for start in range(0, len(pks), 1000):
+            batch = pks[start:start + 1000]
+            placeholders = ', '.join(['%s'] * len(batch))
+            for through in (User.groups.through, User.user_permissions.through):
+                cursor.execute(
+                    f"DELETE FROM {connection.ops.quote_name(through._meta.db_table)} "
+                    f"WHERE user_id IN ({placeholders})",
+                    batch,
+                )
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", batch)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def purge():
+    """Delete every synthetic row created by seed() and run_load(), alias by alias."""
+    ensure_enabled()
+    emails = {'email__endswith': f'@{DOMAIN}'}
+    deleted = {}
+    for label, queryset in (
+        ('payments', ApplicationPayment.objects.filter(**emails)),
+        ('details', StudentDetails.objects.filter(**emails)),
+        ('applications', Application.objects.filter(**emails)),
+        ('students', Student.objects.filter(**emails)),
+        ('lsc_students', PortalStudent.objects.filter(application_no__startswith=CODE_PREFIX)),
+        ('programs', PortalProgram.objects.filter(code__in=PROGRAMS)),
+        ('lsc_centres', LSCUser.objects.filter(**emails)),
+        ('courses', Courses.objects.filter(degree__in=COURSES)),
+    ):
+        using = router.db_for_write(queryset.model)
+        deleted[label] = queryset.using(using).delete()[0]
+    deleted['users'] = _delete_users(User.objects.filter(username__endswith=f'@{DOMAIN}'))
+    return deleted
+
+
+# Stand-ins --------------------------------------------------------------------
+
+_inbox = {}
+_inbox_lock = threading.Lock()
+
+
+class LoadTestEmailBackend(BaseEmailBackend):
+    """Keeps the last mail per recipient instead of talking to SMTP."""
+
+    def send_messages(self, email_messages):
+        delay = getattr(settings, 'LOADTEST_SMTP_LATENCY_MS', 0) / 1000
+        with track_outbound('smtp'):
+            if delay:
+                time.sleep(delay)
+            with _inbox_lock:
+                for message in email_messages:
+                    for recipient in message.recipients():
+                        _inbox[recipient] = message.body
+        return len(email_messages)
+
+
+def read_otp(email):
+    with _inbox_lock:
+        body = _inbox.pop(email, '')
+    match = re.search(r'\b(\d{6})\b', body)
+    return match.group(1) if match else None
+
+
+def gateway_callback(payment_data, status='TXN_SUCCESS'):
+    """The form Paytm posts to pgResponse after a payment, signed with the merchant key."""
+    order_id = payment_data['ORDER_ID']
+    params = {
+        'MID': payment_data['MID'],
+        'ORDERID': order_id,
+        'TXNAMOUNT': payment_data['TXN_AMOUNT'],
+        'CURRENCY': 'INR',
+        'TXNID': f'LTTXN{order_id}',
+        'BANKTXNID': f'LTBANK{order_id}',
+        'STATUS': status,
+        'RESPCODE': '01' if status == 'TXN_SUCCESS' else '227',
+        'RESPMSG': 'Txn Success' if status == 'TXN_SUCCESS' else 'Txn Failure',
+        'TXNDATE': timezone.now().isoformat(),
+        'GATEWAYNAME': 'LOADTEST',
+        'BANKNAME': 'LOADTEST',
+        'PAYMENTMODE': 'UPI',
+    }
+    params['CHECKSUMHASH'] = form_checksum(params, settings.PAYTM_MERCHANT_KEY)
+    return params
+
+
+def stand_in_settings(media_root, smtp_latency_ms=0):
+    """Settings overrides that point mail, Paytm and uploads at the stand-ins."""
+    return {
+        'EMAIL_BACKEND': 'api.loadtest.LoadTestEmailBackend',
+        'LOADTEST_SMTP_LATENCY_MS': smtp_latency_ms,
+        'PAYTM_MERCHANT_KEY': MERCHANT_KEY,
+        'PAYTM_MERCHANT_MID': MERCHANT_MID,
+        'MEDIA_ROOT': media_root,
+    }
+
+
+# Journey ----------------------------------------------------------------------
+
+_jpeg = None
+
+
+def _tiny_jpeg():
+    global _jpeg
+    if _jpeg is None:
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (120, 160), (200, 200, 200)).save(buffer, 'JPEG', quality=60)
+        _jpeg = buffer.getvalue()
+    return _jpeg
+
+
+class StepFailed(Exception):
+    pass
+
+
+class LatencyRecorder:
+    """Per-endpoint latencies (seconds) and error counts, shared by all threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, endpoint, elapsed, ok):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(elapsed)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, wall_seconds):
+        """{endpoint: {count, errors, rps, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        with self._lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self.samples.items()}
+            errors = dict(self.errors)
+        order = {step: i for i, step in enumerate(JOURNEY_STEPS)}
+        report = {}
+        for endpoint in sorted(samples, key=lambda e: order.get(e, len(order))):
+            values = samples[endpoint]
+            report[endpoint] = {
+                'count': len(values),
+                'errors': errors.get(endpoint, 0),
+                'rps': round(len(values) / wall_seconds, 2) if wall_seconds else 0.0,
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        return report
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class StudentJourney:
+    """One simulated student going from OTP to the downloaded application."""
+
+    def __init__(self, number, recorder, gateway_latency_ms=0):
+        self.email = f'journey{number}@{DOMAIN}'
+        self.phone = f'8{number:09d}'
+        self.number = number
+        self.recorder = recorder
+        self.gateway_latency = gateway_latency_ms / 1000
+        self.client = Client()
+
+    def _call(self, endpoint, method, path, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        response = getattr(self.client, method)(path, **kwargs)
+        elapsed = time.perf_counter() - started
+        ok = response.status_code in expect
+        if self.recorder is not None:
+            self.recorder.record(endpoint, elapsed, ok)
+        if not ok:
+            raise StepFailed(f'{endpoint} returned {response.status_code}')
+        return response
+
+    def _post(self, endpoint, path, data, **kwargs):
+        return self._call(endpoint, 'post', path, data=data, content_type='application/json', **kwargs)
+
+    def run(self):
+        self._post('send-otp', '/api/send-otp/', {'email': self.email})
+        self._post('verify-otp', '/api/verify-otp/', {'email': self.email, 'otp': read_otp(self.email)})
+        self._post('signup', '/api/signup/', {
+            'name': f'Journey {self.number}', 'email': self.email, 'phone': self.phone,
+            'password': PASSWORD, 'lsc_code': f'{CODE_PREFIX}00000', 'lsc_name': 'Load test centre',
+        })
+        token = self._post('login', '/api/login/', {'email': self.email, 'password': PASSWORD}).json()['token']
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+        academic_year = self._call('academic-year', 'get', '/api/academic-year/').json()['academic_year']
+        self._call('courses', 'get', '/api/courses/')
+        course = COURSES[self.number % len(COURSES)]
+        self._post('page1', '/api/application/page1/', {
+            'academic_year': academic_year, 'course': course, 'mode_of_study': 'ODL',
+            'programme_applied': 'UG', 'medium': 'English',
+        })
+        self._post('page2', '/api/application/page2/', {
+            'name_initial': f'Journey {self.number}', 'dob': '2000-01-01', 'gender': 'Female',
+            'aadhaar_no': f'9{self.number:011d}', 'name_as_aadhaar': f'Journey {self.number}',
+            'parent_selected': True, 'father_name': 'Father', 'mother_name': 'Mother',
+            'nationality': 'Indian', 'religion': 'Hindu', 'community': 'BC', 'mother_tongue': 'Tamil',
+            'differently_abled': 'No', 'comm_pincode': '636011', 'comm_district': 'Salem',
+            'comm_state': 'Tamil Nadu', 'comm_country': 'India', 'comm_town': 'Salem',
+            'comm_area': 'Urban', 'same_as_comm': True,
+        })
+        self._post('page3', '/api/application/page3/', {
+            'qualifications': [
+                {'course': course_name, 'institute_name': 'Govt School', 'subject_studied': 'General',
+                 'reg_no': f'{course_name[:3]}{self.number}', 'percentage': '82', 'month_year': '03/2018',
+                 'mode_of_study': 'Regular', 'board': 'State Board'}
+                for course_name in ('S.S.L.C', 'HSC')
+            ],
+            'sslc_marksheet_url': '/media/loadtest/sslc.pdf',
+            'hsc_marksheet_url': '/media/loadtest/hsc.pdf',
+        })
+        self._call('upload-documents', 'post', '/api/upload-documents/', data={
+            'email': self.email,
+            'photo': _upload('photo.jpg'),
+            'signature': _upload('signature.jpg'),
+            'community_certificate': _upload('community.jpg'),
+            'aadhar_card': _upload('aadhaar.jpg'),
+            'transfer_certificate': _upload('tc.jpg'),
+        })
+        payment = self._post('initiate-payment', '/api/initiate-payment/', {}).json()['data']
+
+        # Time the student spends on the gateway page; not part of any endpoint
+        if self.gateway_latency:
+            time.sleep(self.gateway_latency)
+        callback = gateway_callback(payment['payment_data'])
+        body = self._call('pgResponse', 'post', '/api/pgResponse/', data=callback).content
+        if b'PAYMENT SUCCESSFUL' not in body:
+            raise StepFailed('pgResponse did not accept the payment')
+
+        self._call('download-application', 'get', '/api/download-application/')
+
+
+def _upload(name):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    return SimpleUploadedFile(name, _tiny_jpeg(), content_type='image/jpeg')
+
+
+def next_journey_number():
+    """First journey number not used by an earlier run (keeps emails and phones unique)."""
+    return Student.objects.filter(email__startswith='journey', email__endswith=f'@{DOMAIN}').count()
+
+
+def run_load(journeys, concurrency, gateway_latency_ms=0, warmup=0, progress=None):
+    """
+    Run `journeys` student journeys on `concurrency` threads (after `warmup`
+    unrecorded ones). Returns (LatencyRecorder, wall seconds, completed, failures).
+    """
+    ensure_enabled()
+    ensure_reference_data(1)
+    first = next_journey_number()
+    for number in range(first, first + warmup):
+        try:
+            StudentJourney(number, None, gateway_latency_ms).run()
+        except StepFailed as e:
+            logger.warning(f"Warm-up journey {number} failed: {e}")
+    first += warmup
+
+    recorder = LatencyRecorder()
+    failures = []
+    done = [0]
+    lock = threading.Lock()
+
+    def worker(number):
+        try:
+            StudentJourney(number, recorder, gateway_latency_ms).run()
+        except StepFailed as e:
+            with lock:
+                failures.append((number, str(e)))
+        except Exception as e:
+            logger.exception(f"Journey {number} crashed")
+            with lock:
+                failures.append((number, f'{type(e).__name__}: {e}'))
+        finally:
+            connections.close_all()
+            with lock:
+                done[0] += 1
+                if progress:
+                    progress(done[0], journeys)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(first, first + journeys)))
+    wall = time.perf_counter() - started
+    return recorder, wall, journeys - len(failures), failures
+
+
+def run_metadata(**options):
+    """Environment details stored next to results so runs can be compared."""
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'databases': {alias: settings.DATABASES[alias]['ENGINE'].rsplit('.', 1)[-1] for alias in settings.DATABASES},
+        'debug': settings.DEBUG,
+        'options': options,
+    }
@@ -0,0 +1,110 @@
+"""
+Django management command to micro-benchmark Paytm checksum generation and verification
+"""
+import base64
+import hashlib
+import timeit
+
+from Crypto.Cipher import AES
+from django.core.management.base import BaseCommand
+
+from api.paytm_checksum import PaytmChecksum, form_checksum, verify_form_checksum
+
+MERCHANT_KEY = 'bKMfNxPPf_QdZppa'
+SAMPLE_PARAMS = {
+    'MID': 'PERIYA12345678901234',
+    'ORDERID': 'PU/PA/2025/3F9A1C',
+    'CUST_ID': 'student@example.com',
+    'TXN_AMOUNT': '234.00',
+    'CHANNEL_ID': 'WEB',
+    'WEBSITE': 'DEFAULT',
+    'INDUSTRY_TYPE_ID': 'Retail',
+    'CALLBACK_URL': 'https://admissions.example.edu/api/pgResponse/',
+    'EMAIL': 'student@example.com',
+    'MOBILE_NO': '9876543210',
+}
+
+
+# Previous implementations, kept here only as the benchmark baseline
+def _legacy_form_checksum(param_dict, merchant_key):
+    params_string = ""
+    for key in sorted(param_dict.keys()):
+        if key == "CHECKSUMHASH":
+            continue
+        value = str(param_dict[key]) if param_dict[key] is not None else ""
+        params_string += f"{key}={value}|"
+    params_string += merchant_key
+    return hashlib.sha256(params_string.encode('utf-8')).hexdigest().upper()
+
+
+def _legacy_verify_form_checksum(param_dict, merchant_key, checksumhash):
+    return _legacy_form_checksum(param_dict, merchant_key) == checksumhash.upper()
+
+
+def _legacy_verify_signature(params, merchant_key, checksum):
+    params = dict(params)
+    params_list = []
+    for key in sorted(params.keys()):
+        if key not in ['CHECKSUMHASH', 'REFUND']:
+            value = params[key]
+            params_list.append('' if value == 'null' else str(value))
+    params_string = '|'.join(params_list)
+    key = hashlib.md5(merchant_key.encode()).digest()
+    cipher = AES.new(key, AES.MODE_CBC, PaytmChecksum.iv.encode())
+    decrypted = cipher.decrypt(base64.b64decode(checksum))
+    decrypted = decrypted[0:-decrypted[-1]].decode()
+    salt = decrypted[-4:]
+    hash_string = hashlib.sha256((params_string + "|" + salt).encode()).hexdigest() + salt
+    return hash_string == decrypted
+
+
+class Command(BaseCommand):
+    help = 'Compare the Paytm checksum engine against the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20000,
+            help='Calls per measurement (default 20000)'
+        )
+
+    def _measure(self, label, legacy, current, iterations):
+        legacy_time = min(timeit.repeat(legacy, number=iterations, repeat=3))
+        current_time = min(timeit.repeat(current, number=iterations, repeat=3))
+        self.stdout.write(
+            f"  {label:<28} legacy {legacy_time / iterations * 1e6:8.2f} us   "
+            f"current {current_time / iterations * 1e6:8.2f} us   "
+            f"x{legacy_time / current_time:.2f}"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        params = dict(SAMPLE_PARAMS)
+        form_hash = form_checksum(params, MERCHANT_KEY)
+        signature = PaytmChecksum.generate_signature(params, MERCHANT_KEY)
+
+        # Both engines must agree before timing them
+        assert form_hash == _legacy_form_checksum(params, MERCHANT_KEY)
+        assert _legacy_verify_signature(params, MERCHANT_KEY, signature)
+        assert PaytmChecksum.verify_signature(params, MERCHANT_KEY, signature)
+
+        self.stdout.write(f'Paytm checksum micro-benchmark ({iterations} calls per measurement, best of 3)')
+        self._measure(
+            'form checksum',
+            lambda: _legacy_form_checksum(params, MERCHANT_KEY),
+            lambda: form_checksum(params, MERCHANT_KEY),
+            iterations,
+        )
+        self._measure(
+            'form verify',
+            lambda: _legacy_verify_form_checksum(params, MERCHANT_KEY, form_hash),
+            lambda: verify_form_checksum(params, MERCHANT_KEY, form_hash),
+            iterations,
+        )
+        self._measure(
+            'AES signature verify',
+            lambda: _legacy_verify_signature(params, MERCHANT_KEY, signature),
+            lambda: PaytmChecksum.verify_signature(params, MERCHANT_KEY, signature),
+            iterations,
+        )
@@ -0,0 +1,103 @@
+"""
+Django management command to load-test the student admission journey and report latency per endpoint
+"""
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.loadtest import LoadTestNotEnabled, ensure_enabled, run_load, run_metadata, stand_in_settings
+
+
+class Command(BaseCommand):
+    help = 'Drive concurrent simulated students from send-otp to download-application (SMTP and Paytm stand-ins)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journeys',
+            type=int,
+            default=100,
+            help='Students to send through the full flow (default 100)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Concurrent clients (default 10)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Unrecorded journeys run first to fill caches (default 2)'
+        )
+        parser.add_argument(
+            '--smtp-latency-ms',
+            type=int,
+            default=0,
+            help='Delay added to every OTP mail by the SMTP stand-in'
+        )
+        parser.add_argument(
+            '--gateway-latency-ms',
+            type=int,
+            default=0,
+            help='Time each student spends on the payment page before the callback (not measured)'
+        )
+        parser.add_argument(
+            '--json',
+            default=None,
+            help='Also write the report and run settings to this file'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ensure_enabled()
+        except LoadTestNotEnabled as e:
+            raise CommandError(str(e))
+
+        def progress(done, total):
+            if done % max(1, total // 10) == 0 or done == total:
+                self.stdout.write(f'  {done}/{total} journeys')
+
+        with tempfile.TemporaryDirectory(prefix='loadtest-media-') as media_root:
+            with override_settings(**stand_in_settings(media_root, options['smtp_latency_ms'])):
+                recorder, wall, completed, failures = run_load(
+                    options['journeys'],
+                    options['concurrency'],
+                    gateway_latency_ms=options['gateway_latency_ms'],
+                    warmup=options['warmup'],
+                    progress=progress,
+                )
+
+        report = recorder.summary(wall)
+        self.stdout.write(
+            f"\n{'endpoint':<22}{'count':>7}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        )
+        for endpoint, row in report.items():
+            self.stdout.write(
+                f"{endpoint:<22}{row['count']:>7}{row['errors']:>8}{row['rps']:>9}"
+                f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+            )
+        for number, error in failures[:10]:
+            self.stdout.write(self.style.WARNING(f'  journey {number}: {error}'))
+
+        requests = sum(row['count'] for row in report.values())
+        summary = (
+            f'{completed}/{options["journeys"]} journeys completed in {wall:.1f}s '
+            f'({completed / wall:.2f} journeys/s, {requests / wall:.1f} requests/s, '
+            f'concurrency {options["concurrency"]})'
+        )
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'run': run_metadata(**{k: options[k] for k in (
+                        'journeys', 'concurrency', 'warmup', 'smtp_latency_ms', 'gateway_latency_ms')}),
+                    'wall_seconds': round(wall, 3),
+                    'completed': completed,
+                    'failures': failures,
+                    'endpoints': report,
+                }, f, indent=2)
+        style = self.style.SUCCESS if not failures else self.style.WARNING
+        self.stdout.write(style(f'Load test finished: {summary}'))
@@ -0,0 +1,79 @@
+"""
+Django management command to move legacy Google Drive document URLs to local storage
+"""
+from django.core.management.base import BaseCommand
+
+from api.drive_migration import DriveMigration
+
+
+class Command(BaseCommand):
+    help = 'Download Google Drive photos, signatures, marksheets and certificates to local storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Rows per chunk and bulk_update (default DRIVE_MIGRATION_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Concurrent downloads (default DRIVE_MIGRATION_WORKERS)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default='drive_migration.checkpoint.json',
+            help='File recording the last migrated primary key per table'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint and scan from the beginning (retries failed rows)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Stop after this many rows'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the files that would be migrated without downloading or saving'
+        )
+
+    def handle(self, *args, **options):
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['rows']} rows, {stats['migrated']} migrated, {stats['reused']} reused, "
+                f"{stats['failed']} failed, {stats['bytes'] / (1024 * 1024):.1f} MB, "
+                f"{stats['files_per_second']} files/s"
+            )
+
+        migration = DriveMigration(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+            checkpoint_path=options['checkpoint'],
+            restart=options['restart'],
+            limit=options['limit'],
+            progress=progress,
+        )
+        if migration.checkpoint and not options['restart']:
+            self.stdout.write(f"Resuming from checkpoint {migration.checkpoint}")
+        stats = migration.run()
+
+        for error in migration.errors:
+            self.stdout.write(self.style.WARNING(
+                f"  {error['model']} {error['pk']} {error['field']} ({error['file_id']}): {error['error']}"
+            ))
+
+        summary = (
+            f"{stats['migrated']} files migrated, {stats['reused']} reused, {stats['failed']} failed "
+            f"in {stats['elapsed']}s"
+        )
+        if options['dry_run']:
+            summary = f"{stats['migrated']} files would be migrated (dry run, nothing downloaded)"
+        self.stdout.write(self.style.SUCCESS(f'Drive migration finished: {summary}'))
@@ -0,0 +1,60 @@
+"""
+Django management command to seed synthetic students, applications, payments and LSC data for load tests
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import DOMAIN, LoadTestNotEnabled, ensure_enabled, purge, seed
+
+
+class Command(BaseCommand):
+    help = f'Bulk-load synthetic admission data (emails @{DOMAIN}) or remove it with --purge'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=10000,
+            help='Students to add; each gets a login, application and LSC record (default 10000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert (default 1000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed, so the same command produces the same data (default 1)'
+        )
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help='Delete all synthetic load-test data and exit'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ensure_enabled()
+        except LoadTestNotEnabled as e:
+            raise CommandError(str(e))
+
+        if options['purge']:
+            deleted = purge()
+            self.stdout.write(self.style.SUCCESS(
+                'Load-test data removed: ' + ', '.join(f'{count} {label}' for label, count in deleted.items())
+            ))
+            return
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} students')
+
+        started = time.monotonic()
+        created = seed(options['students'], batch_size=options['batch_size'], seed=options['seed'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {label}' for label, count in created.items())
+            + f' in {time.monotonic() - started:.1f}s'
+        ))
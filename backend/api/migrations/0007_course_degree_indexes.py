@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_application_missing_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='allcourses',
+            index=models.Index(fields=['degree'], name='allcourses_degree_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courses',
+            index=models.Index(fields=['degree'], name='tbl_course_degree_idx'),
+        ),
+    ]
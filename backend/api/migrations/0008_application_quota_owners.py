@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_course_degree_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='quota_owners',
+            field=models.JSONField(blank=True, default=list, help_text='Quotas holding a place for this application ("scope:id", see portal.quota)'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-19 18:40
+
+from django.db import migrations
+
+DOCUMENT_URL_FIELDS = (
+    'sslc_marksheet_url',
+    'hsc_marksheet_url',
+    'ug_marksheet_url',
+    'semester_marksheet_url',
+    'photo_url',
+    'signature_url',
+    'community_certificate_url',
+    'aadhaar_url',
+    'transfer_certificate_url',
+)
+
+
+def unsign_media_urls(apps, schema_editor):
+    """
+    Media URLs are now signed when served, with an expiry; drop the
+    non-expiring `?sig=` stored with earlier uploads.
+    """
+    alias = schema_editor.connection.alias
+    StudentDetails = apps.get_model('api', 'StudentDetails')
+    MarksheetUpload = apps.get_model('api', 'MarksheetUpload')
+
+    for field in DOCUMENT_URL_FIELDS:
+        rows = StudentDetails.objects.using(alias).filter(**{f'{field}__contains': '?sig='})
+        for pk, url in rows.values_list('pk', field).iterator():
+            StudentDetails.objects.using(alias).filter(pk=pk).update(**{field: url.split('?', 1)[0]})
+    rows = MarksheetUpload.objects.using(alias).filter(file_url__contains='?sig=')
+    for pk, url in rows.values_list('pk', 'file_url').iterator():
+        MarksheetUpload.objects.using(alias).filter(pk=pk).update(file_url=url.split('?', 1)[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_application_quota_owners'),
+    ]
+
+    operations = [
+        migrations.RunPython(unsign_media_urls, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:05
+
+import re
+
+from django.db import migrations
+
+ACADEMIC_YEAR_RE = re.compile(r'^\s*(\d{4})\s*[-/–]\s*(\d{2}|\d{4})\s*$')
+
+
+def normalize_academic_year(apps, schema_editor):
+    """Rewrite "2025-2026" style academic years to the canonical "2025-26"."""
+    alias = schema_editor.connection.alias
+    Application = apps.get_model('api', 'Application')
+    rows = Application.objects.using(alias).exclude(academic_year__isnull=True).exclude(academic_year='')
+    for pk, value in rows.values_list('pk', 'academic_year').iterator():
+        match = ACADEMIC_YEAR_RE.match(value)
+        if match:
+            canonical = f"{match.group(1)}-{match.group(2)[-2:]}"
+            if canonical != value:
+                Application.objects.using(alias).filter(pk=pk).update(academic_year=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_unsign_stored_media_urls'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_academic_year, migrations.RunPython.noop, elidable=True),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User  # Import User
 
+from .course_catalog import invalidate_catalog
+
 
 
 class Student(models.Model):
@@ -15,6 +17,7 @@ class Student(models.Model):
     lsc_code = models.CharField(max_length=50, blank=True, null=True, help_text="LSC Center Code")
     lsc_name = models.CharField(max_length=200, blank=True, null=True, help_text="LSC Center Name")
     referral_date = models.DateTimeField(auto_now_add=True, null=True, blank=True, help_text="Date when student signed up via LSC")
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     def __str__(self):
         return self.name
@@ -98,6 +101,8 @@ class Application(models.Model):
         default='Draft'
     )
     is_active = models.BooleanField(default=True)
+    quota_owners = models.JSONField(default=list, blank=True, help_text='Quotas holding a place for this application ("scope:id", see portal.quota)')
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     
     def __str__(self):
         return f"{self.user.email} - Application"
@@ -130,6 +135,7 @@ class StudentDetails(models.Model):
     community_certificate_url = models.CharField(max_length=500, null=True, blank=True)
     aadhaar_url = models.CharField(max_length=500, null=True, blank=True)
     transfer_certificate_url = models.CharField(max_length=500, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     class Meta:
         db_table = 'api_studentdetails'
@@ -143,6 +149,7 @@ class MarksheetUpload(models.Model):
     qualification_type = models.CharField(max_length=50)  
     file_url = models.CharField(max_length=500)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     class Meta:
         db_table = 'api_marksheet_uploads'
@@ -175,6 +182,7 @@ class Payment(models.Model):
         default='created',
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     class Meta:
         db_table = 'payments'  # Map to the 'payments' table
@@ -197,10 +205,21 @@ class Courses(models.Model):
 
     class Meta:
         db_table = 'tbl_course'
+        indexes = [models.Index(fields=['degree'], name='tbl_course_degree_idx')]
 
     def __str__(self):
         return self.degree
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(invalidate_catalog, using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_catalog, using=using)
+        return result
+
 
 
 # api/models.py
@@ -222,10 +241,21 @@ class AllCourses(models.Model):
 
     class Meta:
         db_table = 'allcourses'
+        indexes = [models.Index(fields=['degree'], name='allcourses_degree_idx')]
 
     def __str__(self):
         return self.degree
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(invalidate_catalog, using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_catalog, using=using)
+        return result
+
 # api/models.py
 class ApplicationPayment(models.Model):
     id = models.AutoField(primary_key=True)
@@ -259,6 +289,7 @@ class ApplicationPayment(models.Model):
     mid = models.CharField(max_length=1000, blank=True, null=True)
     transaction_date = models.DateTimeField(blank=True, null=True)
     payment_type = models.CharField(max_length=45, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True)
 
     class Meta:
         db_table = 'feepayment'
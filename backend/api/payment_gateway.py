@@ -0,0 +1,279 @@
+"""
+Process-wide Razorpay gateway client.
+
+- One razorpay.Client per process over a pooled requests.Session, so
+  create_order / verify_payment reuse keep-alive connections and TLS sessions.
+- Retries live on the HTTP adapter and cover only the outbound call:
+  connection failures for any method, 429/5xx responses for GETs. Orders are
+  never re-posted after the gateway may have seen them, and view code
+  (database writes) is never re-run.
+- A circuit breaker opens after RAZORPAY_CIRCUIT_FAILURES consecutive gateway
+  failures and fails fast with GatewayUnavailable for
+  RAZORPAY_CIRCUIT_RESET_SECONDS, then lets one trial call through.
+- Per-operation call counts, errors and latency are kept in-process
+  (get_gateway_stats()).
+
+RAZORPAY_GATEWAY_CLASS selects the implementation; FakeRazorpayGateway
+keeps orders and payments in memory for tests and local development.
+"""
+import hashlib
+import hmac
+import logging
+import threading
+import time
+import uuid
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.instrumentation import track_outbound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CIRCUIT_FAILURES = 5
+DEFAULT_CIRCUIT_RESET = 30
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+class GatewayError(Exception):
+    """The payment gateway could not complete the call."""
+
+
+class GatewayUnavailable(GatewayError):
+    """The circuit is open; the gateway was not called."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open trial call."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error("Payment gateway circuit opened after %d failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class GatewayMetrics:
+    """Per-operation counters and latency (milliseconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def record(self, operation, elapsed, ok):
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            entry = self._operations.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            })
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            if not ok:
+                entry['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: dict(entry, avg_ms=round(entry['total_ms'] / entry['calls'], 2))
+                for operation, entry in self._operations.items()
+            }
+
+
+class BaseGateway:
+    """Shared call wrapper: circuit breaker, metrics, error translation."""
+
+    service = 'razorpay'
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            getattr(settings, 'RAZORPAY_CIRCUIT_FAILURES', DEFAULT_CIRCUIT_FAILURES),
+            getattr(settings, 'RAZORPAY_CIRCUIT_RESET_SECONDS', DEFAULT_CIRCUIT_RESET),
+        )
+        self.metrics = GatewayMetrics()
+
+    def _is_gateway_failure(self, exc):
+        """Errors that say the gateway is unhealthy (not a bad request from us)."""
+        return isinstance(exc, requests.exceptions.RequestException)
+
+    def _call(self, operation, func, *args, **kwargs):
+        if not self.breaker.allow():
+            self.metrics.record(operation, 0, ok=False)
+            raise GatewayUnavailable(f'Payment gateway unavailable ({operation}); try again shortly')
+        started = time.monotonic()
+        try:
+            with track_outbound(self.service):
+                result = func(*args, **kwargs)
+        except Exception as e:
+            self.metrics.record(operation, time.monotonic() - started, ok=False)
+            if self._is_gateway_failure(e):
+                self.breaker.record_failure()
+                raise GatewayError(f'{operation} failed: {str(e)}') from e
+            self.breaker.record_success()
+            raise
+        self.metrics.record(operation, time.monotonic() - started, ok=True)
+        self.breaker.record_success()
+        return result
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        """Checkout signature check; local HMAC, no gateway call."""
+        if not isinstance(signature, str) or not signature.isascii():
+            # Client-supplied; compare_digest would raise on non-ASCII text
+            return False
+        expected = hmac.new(
+            key=settings.RAZORPAY_KEY_SECRET.encode(),
+            msg=f"{order_id}|{payment_id}".encode(),
+            digestmod=hashlib.sha256,
+        ).hexdigest()
+        return hmac.compare_digest(expected.encode(), signature.encode())
+
+    def stats(self):
+        return {
+            'backend': type(self).__name__,
+            'circuit': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'operations': self.metrics.snapshot(),
+        }
+
+
+class RazorpayGateway(BaseGateway):
+
+    def __init__(self):
+        super().__init__()
+        import razorpay
+
+        self.timeout = getattr(settings, 'RAZORPAY_TIMEOUT', DEFAULT_TIMEOUT)
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=getattr(settings, 'RAZORPAY_POOL_SIZE', DEFAULT_POOL_SIZE),
+            max_retries=Retry(
+                total=3,
+                connect=3,
+                read=0,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False,
+            ),
+        )
+        session.mount('https://', adapter)
+        self.client = razorpay.Client(
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        )
+        self._server_errors = (razorpay.errors.ServerError, razorpay.errors.GatewayError)
+
+    def _is_gateway_failure(self, exc):
+        return super()._is_gateway_failure(exc) or isinstance(exc, self._server_errors)
+
+    def create_order(self, amount, currency='INR', receipt=None):
+        data = {'amount': int(amount), 'currency': currency, 'payment_capture': 1}
+        if receipt:
+            data['receipt'] = receipt
+        return self._call('create_order', self.client.order.create, data=data, timeout=self.timeout)
+
+    def fetch_payment(self, payment_id):
+        return self._call('fetch_payment', self.client.payment.fetch, payment_id, timeout=self.timeout)
+
+
+class FakeRazorpayGateway(BaseGateway):
+    """
+    In-memory gateway for tests. Orders are accepted, and every payment is
+    reported with `payment_status` (default 'captured'). Set `fail_next` to
+    a count to make that many calls raise a connection error.
+    """
+
+    def __init__(self, payment_status='captured'):
+        super().__init__()
+        self.payment_status = payment_status
+        self.orders = {}
+        self.fail_next = 0
+        self._lock = threading.Lock()
+
+    def _maybe_fail(self):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise requests.exceptions.ConnectionError('Simulated gateway outage')
+
+    def _create_order(self, amount, currency, receipt):
+        self._maybe_fail()
+        order = {
+            'id': f"order_fake{uuid.uuid4().hex[:14]}",
+            'amount': int(amount),
+            'currency': currency,
+            'receipt': receipt,
+            'status': 'created',
+        }
+        self.orders[order['id']] = order
+        return order
+
+    def _fetch_payment(self, payment_id):
+        self._maybe_fail()
+        return {'id': payment_id, 'status': self.payment_status, 'amount': 23400}
+
+    def create_order(self, amount, currency='INR', receipt=None):
+        return self._call('create_order', self._create_order, amount, currency, receipt)
+
+    def fetch_payment(self, payment_id):
+        return self._call('fetch_payment', self._fetch_payment, payment_id)
+
+
+def get_gateway():
+    """The process-wide gateway selected by RAZORPAY_GATEWAY_CLASS."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                path = getattr(settings, 'RAZORPAY_GATEWAY_CLASS', 'api.payment_gateway.RazorpayGateway')
+                _gateway = import_string(path)()
+    return _gateway
+
+
+def set_gateway(gateway):
+    """Replace the process-wide gateway (tests); None re-reads settings."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
+
+
+def get_gateway_stats():
+    return _gateway.stats() if _gateway is not None else {}
@@ -1,97 +1,108 @@
 """
 Paytm Checksum Generation and Verification Library for Python/Django
 Based on Paytm's official PHP library
+
+Two schemes are supported:
+
+- PaytmChecksum: the official AES-128-CBC signature. The AES key derived
+  from a merchant key (md5) is computed once per key and cached.
+- form_checksum / verify_form_checksum: the SHA256 "KEY=value|...|merchant_key"
+  CHECKSUMHASH the payment form and callback use.
+
+Parameters are canonicalised with a single sorted join in both schemes.
 """
 import base64
-import string
-import random
 import hashlib
+import hmac
+import secrets
+import string
+from functools import lru_cache
+
 from Crypto.Cipher import AES
 
+EXCLUDED_PARAMS = frozenset(['CHECKSUMHASH', 'REFUND'])
+FORM_EXCLUDED_PARAMS = frozenset(['CHECKSUMHASH'])
+SALT_CHARS = string.ascii_lowercase + string.ascii_uppercase + string.digits
+
+
+@lru_cache(maxsize=32)
+def _derived_key(merchant_key):
+    """AES key for a merchant key, computed once per key."""
+    return hashlib.md5(merchant_key.encode()).digest()
+
+
+def _signature_string(params):
+    """Official scheme: sorted values joined with "|" ("null" becomes "")."""
+    return '|'.join(
+        '' if params[key] == 'null' else str(params[key])
+        for key in sorted(params)
+        if key not in EXCLUDED_PARAMS
+    )
+
 
 class PaytmChecksum:
-    
+
     iv = '@@@@&&&&####$$$$'
-    
+    _iv = iv.encode()
+
     @staticmethod
     def generate_signature(params, merchant_key):
         """Generate signature for Paytm"""
-        params_string = PaytmChecksum.__get_string_by_params(params)
+        params_string = _signature_string(params)
         return PaytmChecksum.__generate_signature(params_string, merchant_key)
-    
+
     @staticmethod
     def verify_signature(params, merchant_key, checksum):
-        """Verify Paytm signature"""
-        if 'CHECKSUMHASH' in params:
-            del params['CHECKSUMHASH']
-        params_string = PaytmChecksum.__get_string_by_params(params)
+        """Verify Paytm signature (CHECKSUMHASH in params is ignored, not removed)"""
+        params_string = _signature_string(params)
         return PaytmChecksum.__verify_signature(params_string, merchant_key, checksum)
-    
+
     @staticmethod
     def __generate_signature(params_string, merchant_key):
         """Internal method to generate signature"""
         salt = PaytmChecksum.__generate_random_string(4)
-        final_string = params_string + "|" + salt
-        hasher = hashlib.sha256(final_string.encode())
-        hash_string = hasher.hexdigest() + salt
+        hash_string = hashlib.sha256(f"{params_string}|{salt}".encode()).hexdigest() + salt
         return PaytmChecksum.__encrypt(hash_string, merchant_key)
-    
+
     @staticmethod
     def __verify_signature(params_string, merchant_key, checksum):
         """Internal method to verify signature"""
         try:
             decrypted = PaytmChecksum.__decrypt(checksum, merchant_key)
             salt = decrypted[-4:]
-            final_string = params_string + "|" + salt
-            hasher = hashlib.sha256(final_string.encode())
-            hash_string = hasher.hexdigest() + salt
-            return hash_string == decrypted
+            hash_string = hashlib.sha256(f"{params_string}|{salt}".encode()).hexdigest() + salt
+            return hmac.compare_digest(hash_string, decrypted)
         except Exception:
             return False
-    
-    @staticmethod
-    def __get_string_by_params(params):
-        """Convert params dict to string"""
-        params_list = []
-        for key in sorted(params.keys()):
-            if key not in ['CHECKSUMHASH', 'REFUND']:
-                value = params[key]
-                params_list.append('' if value == 'null' else str(value))
-        return '|'.join(params_list)
-    
+
     @staticmethod
     def __generate_random_string(length):
         """Generate random string"""
-        chars = string.ascii_lowercase + string.ascii_uppercase + string.digits
-        return ''.join(random.choice(chars) for _ in range(length))
-    
+        return ''.join(secrets.choice(SALT_CHARS) for _ in range(length))
+
     @staticmethod
     def __pad(data):
         """Add PKCS7 padding"""
         length = 16 - (len(data) % 16)
-        return data + (chr(length) * length).encode()
-    
+        return data + bytes([length]) * length
+
     @staticmethod
     def __unpad(data):
         """Remove PKCS7 padding"""
         return data[0:-data[-1]]
-    
+
     @staticmethod
     def __encrypt(data, key):
         """Encrypt using AES-128-CBC"""
-        key = hashlib.md5(key.encode()).digest()
-        data = PaytmChecksum.__pad(data.encode())
-        cipher = AES.new(key, AES.MODE_CBC, PaytmChecksum.iv.encode())
-        encrypted = cipher.encrypt(data)
+        cipher = AES.new(_derived_key(key), AES.MODE_CBC, PaytmChecksum._iv)
+        encrypted = cipher.encrypt(PaytmChecksum.__pad(data.encode()))
         return base64.b64encode(encrypted).decode()
-    
+
     @staticmethod
     def __decrypt(data, key):
         """Decrypt using AES-128-CBC"""
-        key = hashlib.md5(key.encode()).digest()
-        encrypted = base64.b64decode(data)
-        cipher = AES.new(key, AES.MODE_CBC, PaytmChecksum.iv.encode())
-        decrypted = cipher.decrypt(encrypted)
+        cipher = AES.new(_derived_key(key), AES.MODE_CBC, PaytmChecksum._iv)
+        decrypted = cipher.decrypt(base64.b64decode(data))
         return PaytmChecksum.__unpad(decrypted).decode()
 
 
@@ -104,3 +115,26 @@ def generate_checksum(params, merchant_key):
 def verify_checksum(params, merchant_key, checksum):
     """Verify Paytm checksum"""
     return PaytmChecksum.verify_signature(params, merchant_key, checksum)
+
+
+# Payment form / callback CHECKSUMHASH
+def form_checksum_string(params, merchant_key):
+    """"KEY=value|" for each sorted param (None becomes ""), then the merchant key"""
+    parts = [
+        f"{key}={'' if params[key] is None else params[key]}|"
+        for key in sorted(params)
+        if key not in FORM_EXCLUDED_PARAMS
+    ]
+    parts.append(merchant_key)
+    return ''.join(parts)
+
+
+def form_checksum(params, merchant_key):
+    """Uppercase SHA256 hex of form_checksum_string()"""
+    return hashlib.sha256(form_checksum_string(params, merchant_key).encode('utf-8')).hexdigest().upper()
+
+
+def verify_form_checksum(params, merchant_key, checksum):
+    """Constant-time check of a form/callback CHECKSUMHASH"""
+    return hmac.compare_digest(form_checksum(params, merchant_key), (checksum or '').upper())
+
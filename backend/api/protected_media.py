@@ -0,0 +1,212 @@
+"""
+Authorized serving of uploaded student documents (MEDIA_ROOT).
+
+Django only decides whether a request may read a file; the bytes are sent by
+the front proxy when one is configured:
+
+- PROTECTED_MEDIA_BACKEND = 'nginx': respond with X-Accel-Redirect to
+  PROTECTED_MEDIA_ACCEL_PREFIX + path, served by an `internal` location
+  aliased to MEDIA_ROOT.
+- 'sendfile': respond with X-Sendfile (Apache mod_xsendfile, lighttpd).
+- 'python' (default): FileResponse, which the WSGI server hands to
+  wsgi.file_wrapper and so to sendfile(2) where available.
+
+A request is allowed when it carries a valid, unexpired `sig` for the path,
+or when it is authenticated as the student whose StudentDetails or
+MarksheetUpload row records the file, as an LSC admin or as Django staff.
+Everything else under MEDIA_ROOT is admin-only.
+
+Media URLs are stored unsigned and signed when they are sent to a client
+(sign_media_url, media_url_fields on the api serializers), so plain <img>
+tags keep working. Signatures are timestamped and expire after
+PROTECTED_MEDIA_URL_MAX_AGE; the timestamp is rounded down to
+media_signature_epoch() so responses that embed signed URLs stay
+byte-identical, and ETag-able, within one epoch.
+"""
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .utils import DOCUMENTS_DIR
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_PARAM = 'sig'
+DEFAULT_URL_MAX_AGE = 12 * 60 * 60
+
+# StudentDetails columns holding a student's document URLs
+DOCUMENT_URL_FIELDS = (
+    'sslc_marksheet_url',
+    'hsc_marksheet_url',
+    'ug_marksheet_url',
+    'semester_marksheet_url',
+    'photo_url',
+    'signature_url',
+    'community_certificate_url',
+    'aadhaar_url',
+    'transfer_certificate_url',
+)
+
+
+def _url_max_age():
+    return getattr(settings, 'PROTECTED_MEDIA_URL_MAX_AGE', DEFAULT_URL_MAX_AGE)
+
+
+def media_signature_epoch():
+    """
+    Start of the current signing period. A signature issued at the start of
+    a period is still valid for at least half of PROTECTED_MEDIA_URL_MAX_AGE.
+    """
+    step = max(1, _url_max_age() // 2)
+    return int(time.time()) // step * step
+
+
+class _MediaSigner(signing.TimestampSigner):
+    def timestamp(self):
+        return signing.b62_encode(media_signature_epoch())
+
+
+_signer = _MediaSigner(salt='api.protected_media')
+
+
+def media_path(url):
+    """The MEDIA_ROOT-relative path of a MEDIA_URL URL (query dropped), or None."""
+    if not url:
+        return None
+    path = url.split('?', 1)[0]
+    if not path.startswith(settings.MEDIA_URL):
+        return None
+    return path[len(settings.MEDIA_URL):]
+
+
+def unsigned_media_url(url):
+    """A media URL as stored: without the `sig` query (other URLs unchanged)."""
+    if media_path(url) is None:
+        return url
+    return url.split('?', 1)[0]
+
+
+def sign_media_url(url):
+    """Append a fresh `sig` to a MEDIA_URL URL so it loads without auth headers."""
+    relative = media_path(url)
+    if relative is None:
+        return url
+    token = _signer.sign(relative)[len(relative) + 1:]
+    return f"{settings.MEDIA_URL}{relative}?{SIGNATURE_PARAM}={token}"
+
+
+def _has_valid_signature(request, path):
+    token = request.GET.get(SIGNATURE_PARAM)
+    if not token:
+        return False
+    try:
+        return _signer.unsign(f"{path}{_signer.sep}{token}", max_age=_url_max_age()) == path
+    except signing.BadSignature:
+        return False
+
+
+def _is_admin(user):
+    if getattr(user, 'is_staff', False) or getattr(user, 'is_superuser', False):
+        return True
+    # LSCAdmin / LSCUser from lsc_auth.authentication.LSCJWTAuthentication
+    return bool(getattr(user, 'is_admin', False))
+
+
+def _is_owner(user, path):
+    """True if one of the user's StudentDetails / MarksheetUpload rows records `path`."""
+    from .models import MarksheetUpload, StudentDetails
+
+    if not path.startswith(f"{DOCUMENTS_DIR}/"):
+        return False
+    urls = [
+        url
+        for row in StudentDetails.objects.filter(user=user).values_list(*DOCUMENT_URL_FIELDS)
+        for url in row
+    ]
+    urls.extend(MarksheetUpload.objects.filter(student__user=user).values_list('file_url', flat=True))
+    return any(media_path(url) == path for url in urls)
+
+
+def _may_read(request, path):
+    if _has_valid_signature(request, path):
+        return True
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+    return _is_admin(user) or _is_owner(user, path)
+
+
+def _send(request, path, full_path, stat):
+    backend = getattr(settings, 'PROTECTED_MEDIA_BACKEND', 'python')
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if backend == 'nginx':
+        prefix = getattr(settings, 'PROTECTED_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{quote(path)}"
+    elif backend == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(os.path.basename(path))}"
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([AllowAny])
+def serve_protected_media(request, path):
+    """Serve MEDIA_ROOT/<path> to its owner, an LSC admin or a signed URL."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+
+    if not _may_read(request, path):
+        if not request.user or not request.user.is_authenticated:
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        logger.warning("Denied media access to %s for user %s", path, getattr(request.user, 'pk', None))
+        return Response({'error': 'You do not have access to this file'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+    return _send(request, path, full_path, stat)
+
+
+def protected_media_urlpatterns():
+    """URL patterns serving MEDIA_URL through serve_protected_media."""
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    return [
+        re_path(rf'^{prefix}(?P<path>.*)$', serve_protected_media, name='protected_media'),
+    ]
@@ -1,5 +1,30 @@
 from rest_framework import serializers
 from .models import Student, MarksheetUpload, StudentDetails
+from .academic_calendar import normalize_academic_year
+from .protected_media import DOCUMENT_URL_FIELDS, sign_media_url, unsigned_media_url
+
+
+class SignedMediaUrlsMixin:
+    """
+    `media_url_fields` are stored as plain MEDIA_URL paths: they are signed
+    on the way out and stripped of any `sig` sent back by the client.
+    """
+    media_url_fields = ()
+
+    def to_internal_value(self, data):
+        if any(isinstance(data.get(field), str) for field in self.media_url_fields):
+            data = data.copy()
+            for field in self.media_url_fields:
+                if isinstance(data.get(field), str):
+                    data[field] = unsigned_media_url(data[field])
+        return super().to_internal_value(data)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for field in self.media_url_fields:
+            if data.get(field):
+                data[field] = sign_media_url(data[field])
+        return data
 
 
 class StudentSerializer(serializers.ModelSerializer):
@@ -14,14 +39,21 @@ class ApplicationSerializer(serializers.ModelSerializer):
         model = Application
         fields = '__all__'
 
+    def validate_academic_year(self, value):
+        return normalize_academic_year(value)
+
+
+class MarksheetUploadSerializer(SignedMediaUrlsMixin, serializers.ModelSerializer):
+    media_url_fields = ('file_url',)
 
-class MarksheetUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = MarksheetUpload
         fields = ['qualification_type', 'file_url', 'uploaded_at']
 
 
-class StudentDetailsSerializer(serializers.ModelSerializer):
+class StudentDetailsSerializer(SignedMediaUrlsMixin, serializers.ModelSerializer):
+    media_url_fields = DOCUMENT_URL_FIELDS
+
     def validate_semester_marks(self, value):
         if not value:
             return value
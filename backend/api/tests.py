@@ -1,3 +1,593 @@
-from django.test import TestCase
+import pytest
+from django.core.cache import cache
 
-# Create your tests here.
+from backend.query_budget import DEFAULT_DUPLICATE_THRESHOLD
+
+from api.models import AllCourses, Courses
+from portal.models import ApplicationSettings
+
+ROWS = DEFAULT_DUPLICATE_THRESHOLD * 3
+
+pytestmark = pytest.mark.django_db(databases='__all__')
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def courses():
+    for i in range(ROWS):
+        for model in (Courses, AllCourses):
+            model.objects.create(
+                course_short_code=f'C{i}', course_full_name=f'Course {i}', branch_name='General',
+                num_semesters=6, num_years=3, course_code=f'CC{i}', degree=f'Degree {i}',
+            )
+
+
+def test_courses_within_budget(courses, budget_client):
+    response = budget_client.get('/api/courses/')
+    assert response.status_code == 200
+    assert len(response.data['data']) == ROWS
+
+
+def test_academic_year_within_budget(budget_client):
+    for i in range(ROWS):
+        ApplicationSettings.objects.create(
+            admission_code=f'A{i}', admission_type='UG', admission_year=f'20{20 + i}-{21 + i}',
+            admission_key=f'KEY{i}', is_open=True, is_close=False,
+        )
+    response = budget_client.get('/api/academic-year/')
+    assert response.status_code == 200
+    assert response.data['academic_year']
+
+
+def _user(email):
+    from django.contrib.auth.models import User
+    return User.objects.create_user(email, email=email, password='x')
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    from api.utils import get_document_folder
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PROTECTED_MEDIA_BACKEND = 'python'
+
+    def store(email, name='photo.jpg'):
+        folder = get_document_folder(email, 'Photo')
+        with open(f'{folder}/{name}', 'wb') as f:
+            f.write(b'\xff\xd8 jpeg')
+        relative = f'{folder}/{name}'[len(str(tmp_path)) + 1:]
+        return f'{settings.MEDIA_URL}{relative}'
+    return store
+
+
+def test_media_owner_is_the_recorded_student_not_the_folder(media):
+    from rest_framework.test import APIClient
+    from api.models import StudentDetails
+
+    owner, lookalike = _user('a.b@example.com'), _user('a_b@example.com')
+    url = media('a.b@example.com')
+    StudentDetails.objects.create(user=owner, email=owner.email, name_initial='A', photo_url=url)
+    # Both emails map to the same student_documents folder
+    StudentDetails.objects.create(user=lookalike, email=lookalike.email, name_initial='B')
+
+    client = APIClient()
+    client.force_authenticate(owner)
+    assert client.get(url).status_code == 200
+    client.force_authenticate(lookalike)
+    assert client.get(url).status_code == 403
+
+
+def test_media_signatures_expire(media, settings, monkeypatch):
+    from rest_framework.test import APIClient
+    from api import protected_media
+
+    settings.PROTECTED_MEDIA_URL_MAX_AGE = 3600
+    url = media('c@example.com')
+    client = APIClient()
+    assert client.get(url).status_code == 401
+
+    signed = protected_media.sign_media_url(url)
+    assert client.get(signed).status_code == 200
+    assert client.get(signed[:-2] + 'xx').status_code == 401
+
+    now = protected_media.time.time()
+    monkeypatch.setattr(protected_media.time, 'time', lambda: now + 2 * 3600)
+    assert client.get(signed).status_code == 401
+    assert client.get(protected_media.sign_media_url(url)).status_code == 200
+
+
+def test_media_urls_are_stored_unsigned_and_signed_on_read(media):
+    from api.models import StudentDetails
+    from api.serializers import StudentDetailsSerializer
+
+    user = _user('d@example.com')
+    url = media('d@example.com')
+    # Stored before signing existed, or sent back signed by the client
+    details = StudentDetails.objects.create(user=user, email=user.email, name_initial='D', photo_url=url)
+    data = StudentDetailsSerializer(details).data
+    assert data['photo_url'].startswith(f'{url}?sig=')
+
+    serializer = StudentDetailsSerializer(details, data={'photo_url': data['photo_url']}, partial=True)
+    assert serializer.is_valid(), serializer.errors
+    serializer.save()
+    details.refresh_from_db()
+    assert details.photo_url == url
+
+
+@pytest.mark.parametrize('value,expected', [
+    ('2025-26', '2025-26'),
+    ('2025-2026', '2025-26'),
+    (' 2025 / 2026 ', '2025-26'),
+    ('2025', '2025'),
+    (None, None),
+])
+def test_normalize_academic_year(value, expected):
+    from api.academic_calendar import normalize_academic_year
+    assert normalize_academic_year(value) == expected
+
+
+def test_current_academic_year_is_canonical_with_and_without_a_window(django_capture_on_commit_callbacks):
+    from django.utils import timezone
+    from api.academic_calendar import current_academic_year
+
+    today = timezone.localdate()
+    assert current_academic_year() == f'{today.year}-{str(today.year + 1)[-2:]}'
+
+    with django_capture_on_commit_callbacks(execute=True, using='lsc_admindb'):
+        ApplicationSettings.objects.create(
+            admission_code='A99', admission_type='PG', admission_year='2030-2031',
+            admission_key='KEY99', is_open=True, is_close=False,
+        )
+    assert current_academic_year() == '2030-31'
+
+
+def test_page1_updates_the_application_whatever_the_year_format(budget_client):
+    from api.models import Application
+
+    user = _user('e@example.com')
+    budget_client.force_authenticate(user)
+    for academic_year in ('2025-26', '2025-2026'):
+        response = budget_client.post('/api/application/page1/', {
+            'academic_year': academic_year, 'mode_of_study': 'ODL', 'programme_applied': 'Postgraduate',
+        }, format='json')
+        assert response.status_code in (200, 201), response.data
+    assert list(Application.objects.filter(user=user).values_list('academic_year', flat=True)) == ['2025-26']
+
+
+def test_academic_year_etag_follows_the_resolved_year(django_capture_on_commit_callbacks):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    first = client.get('/api/academic-year/')
+    assert client.get('/api/academic-year/', HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True, using='lsc_admindb'):
+        ApplicationSettings.objects.create(
+            admission_code='A98', admission_type='UG', admission_year='2031-32',
+            admission_key='KEY98', is_open=True, is_close=False,
+        )
+    # Same day, new year: the old ETag no longer matches
+    response = client.get('/api/academic-year/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 200
+    assert response.data['academic_year'] == '2031-32'
+    assert response['ETag'] != first['ETag']
+
+
+@pytest.fixture
+def token_client():
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    user = _user('token@example.com')
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    # First request caches the token snapshot
+    assert client.get('/api/current-user-email/').status_code == 200
+    return client, user, token
+
+
+def test_cached_token_is_revoked_on_logout(token_client):
+    client, user, token = token_client
+    assert client.post('/api/logout/').status_code == 200
+    assert client.get('/api/current-user-email/').status_code == 401
+
+
+def test_cached_token_is_revoked_when_the_token_is_deleted(token_client):
+    client, user, token = token_client
+    # Deleted outside the logout view (admin, another worker, a purge)
+    token.delete()
+    assert client.get('/api/current-user-email/').status_code == 401
+
+
+def test_cached_token_is_revoked_when_the_user_is_deactivated(token_client):
+    client, user, token = token_client
+    user.is_active = False
+    user.save()
+    assert client.get('/api/current-user-email/').status_code == 401
+
+
+def test_token_cache_is_shared_between_workers():
+    from backend import settings as base_settings
+
+    backend = base_settings.CACHES['default']['BACKEND']
+    assert 'locmem' not in backend and 'dummy' not in backend
+
+
+def test_loadtest_commands_refuse_without_opt_in(settings):
+    from django.core.management import CommandError, call_command
+    from api.models import Application
+
+    settings.LOADTEST_ENABLED = False
+    for command, args in (('seed_loadtest_data', ['--students', '5']),
+                          ('seed_loadtest_data', ['--purge']),
+                          ('loadtest_student_flow', ['--journeys', '1'])):
+        with pytest.raises(CommandError, match='LOADTEST_ENABLED'):
+            call_command(command, *args)
+    assert not Application.objects.exists()
+
+
+def test_loadtest_seed_and_purge_round_trip(settings):
+    from django.contrib.auth.models import User
+    from api import loadtest
+    from api.models import Application
+
+    settings.LOADTEST_ENABLED = True
+    real = _user('real@example.com')
+    created = loadtest.seed(ROWS, batch_size=4)
+    assert Application.objects.filter(email__endswith=f'@{loadtest.DOMAIN}').count() == ROWS
+    assert created
+
+    deleted = loadtest.purge()
+    assert deleted['users'] == ROWS
+    assert not User.objects.filter(username__endswith=f'@{loadtest.DOMAIN}').exists()
+    assert not Application.objects.filter(email__endswith=f'@{loadtest.DOMAIN}').exists()
+    assert User.objects.filter(pk=real.pk).exists()
+
+
+def test_send_otp_goes_through_the_email_backend(settings, monkeypatch):
+    import smtplib
+    from django.core import mail
+    from rest_framework.test import APIClient
+
+    def no_direct_smtp(*args, **kwargs):
+        raise AssertionError('send_otp must not open its own SMTP connection')
+
+    monkeypatch.setattr(smtplib, 'SMTP', no_direct_smtp)
+    response = APIClient().post('/api/send-otp/', {'email': 'otp@example.com'}, format='json')
+    assert response.status_code == 200
+    assert len(mail.outbox) == 1
+    message = mail.outbox[0]
+    assert message.to == ['otp@example.com'] and message.from_email == settings.DEFAULT_FROM_EMAIL
+    assert cache.get('otp@example.com') in message.body
+
+
+def test_production_mail_is_sent_over_verified_tls():
+    from backend import settings as base_settings
+    from backend.instrumentation import InstrumentedEmailBackend
+    import ssl
+
+    assert base_settings.EMAIL_BACKEND == 'backend.instrumentation.InstrumentedEmailBackend'
+    backend = InstrumentedEmailBackend(host='smtp.example.com', use_tls=True, fail_silently=False)
+    assert backend.ssl_context.verify_mode == ssl.CERT_REQUIRED
+    assert backend.ssl_context.check_hostname
+
+
+def test_order_ids_are_unique_within_the_same_second(monkeypatch):
+    import re
+    from datetime import datetime
+    from api import views
+
+    frozen = datetime(2026, 1, 1, 10, 0, 0)
+    monkeypatch.setattr(views, 'datetime', type('FrozenDatetime', (datetime,), {'now': classmethod(lambda cls: frozen)}))
+    order_ids = {views.new_order_id() for _ in range(1000)}
+    assert len(order_ids) == 1000
+    # Paytm accepts at most 50 characters from [A-Za-z0-9@._-]
+    assert all(re.fullmatch(r'PUCDOE\d+[0-9A-F]{6}', order_id) and len(order_id) <= 50 for order_id in order_ids)
+
+
+@pytest.mark.parametrize('gateway_status,css_class', [('TXN_SUCCESS', 'success'), ('TXN_FAILURE', 'failure')])
+def test_payment_callback_renders_the_response_page(settings, gateway_status, css_class):
+    from django.test import Client
+    from api import loadtest
+    from api.models import ApplicationPayment
+
+    settings.PAYTM_MERCHANT_KEY = loadtest.MERCHANT_KEY
+    user = _user('paid@example.com')
+    payment = ApplicationPayment.objects.create(
+        user=user, application_id='PU/PA/2026/ABC123', email=user.email, order_id='PUCDOE1700000000ABC123', amount=236,
+    )
+    callback = loadtest.gateway_callback({
+        'ORDER_ID': payment.order_id, 'MID': loadtest.MERCHANT_MID, 'TXN_AMOUNT': '236.00',
+    }, status=gateway_status)
+
+    # Paytm posts the form without a CSRF token
+    response = Client(enforce_csrf_checks=True).post('/api/pgResponse/', callback)
+    assert response.status_code == 200
+    assert f'class="header {css_class}"' in response.content.decode()
+    payment.refresh_from_db()
+    assert payment.payment_status == gateway_status
+
+
+def test_preview_etag_reads_row_versions_not_row_contents(budget_client):
+    from types import SimpleNamespace
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+    from api import views
+    from api.models import Application, StudentDetails
+
+    user = _user('etag@example.com')
+    Application.objects.create(user=user, email=user.email, academic_year='2025-26', quota_owners=['application_settings:1'])
+    details = StudentDetails.objects.create(user=user, email=user.email, name_initial='E', qualifications=[{'exam': 'HSC'}])
+    budget_client.force_authenticate(user)
+
+    with CaptureQueriesContext(connections['online_edu']) as queries:
+        views._preview_etag(SimpleNamespace(user=user))
+    assert len(queries) == 4
+    for query in queries.captured_queries:
+        # Only the pk and updated_at columns are selected
+        columns = query['sql'].split(' FROM ', 1)[0]
+        assert columns.count(',') == 1 and columns.endswith('."updated_at"'), query['sql']
+
+    first = budget_client.get('/api/application/preview/')
+    assert budget_client.get('/api/application/preview/', HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+    details.qualifications = [{'exam': 'HSC'}, {'exam': 'UG'}]
+    details.save()
+    response = budget_client.get('/api/application/preview/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 200
+    assert response['ETag'] != first['ETag']
+
+
+def test_course_lookups_ignore_case_and_surrounding_spaces(courses):
+    from api.course_catalog import all_course_for_degree, course_for_degree
+
+    Courses.objects.create(
+        course_short_code='DUP', course_full_name='Duplicate', branch_name='General',
+        num_semesters=6, num_years=3, course_code='DUP', degree='DEGREE 1 ',
+    )
+    # The lowest id still wins among rows that differ only in case or spacing
+    assert course_for_degree('  degree 1').course_code == 'CC1'
+    assert all_course_for_degree('DEGREE 2').course_code == 'CC2'
+    assert course_for_degree('Degree 99') is None
+    assert course_for_degree('') is None
+
+
+@pytest.fixture
+def drive_stand_in(settings, tmp_path, monkeypatch):
+    """A local HTTP server in place of Drive, serving one versioned file."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from api import drive_proxy
+
+    state = {'body': b'%PDF-1.4 stand-in', 'etag': '"v1"', 'send_length': True, 'requests': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['requests'].append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == state['etag']:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            if state['send_length']:
+                self.send_header('Content-Length', str(len(state['body'])))
+            # Otherwise the HTTP/1.0 body ends when the connection closes
+            self.send_header('ETag', state['etag'])
+            self.end_headers()
+            self.wfile.write(state['body'])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.DRIVE_PROXY_URL = f'http://127.0.0.1:{server.server_port}/{{file_id}}'
+    settings.DRIVE_PROXY_CACHE_DIR = str(tmp_path / 'drive_cache')
+    settings.DRIVE_PROXY_CACHE_MAX_AGE = 3600
+    monkeypatch.setattr(drive_proxy, '_cache', None)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_drive_proxy_fetches_caches_and_revalidates(drive_stand_in, settings):
+    from django.test import Client
+
+    client = Client()
+    url = '/api/proxy-file/FILE_id-1/'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == drive_stand_in['body']
+    assert drive_stand_in['requests'] == [None]
+
+    # Fresh cache entry: no upstream request, client validators honoured
+    cached = client.get(url)
+    assert b''.join(cached.streaming_content) == drive_stand_in['body']
+    assert client.get(url, HTTP_IF_NONE_MATCH=cached['ETag']).status_code == 304
+    assert client.get(url, HTTP_RANGE='bytes=0-3')['Content-Range'] == f"bytes 0-3/{len(drive_stand_in['body'])}"
+    assert drive_stand_in['requests'] == [None]
+
+    # Stale entry: a conditional request, answered 304, keeps the cached copy
+    settings.DRIVE_PROXY_CACHE_MAX_AGE = 0
+    revalidated = client.get(url)
+    assert b''.join(revalidated.streaming_content) == drive_stand_in['body']
+    assert drive_stand_in['requests'] == [None, '"v1"']
+
+    # Changed upstream: downloaded again
+    drive_stand_in.update(body=b'%PDF-1.4 replaced', etag='"v2"')
+    response = client.get(url)
+    assert b''.join(response.streaming_content) == b'%PDF-1.4 replaced'
+    assert drive_stand_in['requests'] == [None, '"v1"', '"v1"']
+
+
+def test_drive_cache_walks_the_directory_only_when_over_budget(tmp_path, monkeypatch):
+    import os
+    from api import drive_proxy
+
+    cache = drive_proxy.DriveFileCache(str(tmp_path), max_bytes=100, rescan_seconds=3600)
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(drive_proxy.os, 'walk', lambda root: walks.append(root) or real_walk(root))
+
+    def fill(file_id, age):
+        writer, tmp_file, data_path = cache.open_writer(file_id)
+        with writer:
+            writer.write(b'x' * 30)
+        cache.commit(file_id, tmp_file, data_path, {'etag': file_id})
+        os.utime(data_path, (1_000_000 + age, 1_000_000 + age))
+
+    for age, file_id in enumerate(['a', 'b', 'c']):
+        fill(file_id, age)
+    assert len(walks) == 1  # the first fill measures the directory
+    fill('b', 3)  # replacing an entry does not grow the total
+    assert len(walks) == 1
+
+    fill('d', 4)  # 120 bytes: over budget, walk and evict the least recently used
+    assert len(walks) == 2
+    assert cache.get('a') is None
+    assert all(cache.get(file_id) for file_id in 'bcd')
+
+
+def _cached_files(settings):
+    import os
+    return [name for _, _, names in os.walk(settings.DRIVE_PROXY_CACHE_DIR) for name in names]
+
+
+def test_drive_range_miss_without_length_is_capped(drive_stand_in, settings):
+    from django.test import Client
+
+    drive_stand_in.update(send_length=False, body=b'%PDF-1.4 ' + b'x' * 40)
+    settings.DRIVE_PROXY_MAX_FILE_BYTES = 16
+    response = Client().get('/api/proxy-file/LARGE/', HTTP_RANGE='bytes=0-3')
+    # Too large to cache: the whole file is streamed, nothing is left on disk
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == drive_stand_in['body']
+    assert _cached_files(settings) == []
+
+    settings.DRIVE_PROXY_MAX_FILE_BYTES = 1024
+    response = Client().get('/api/proxy-file/SMALL/', HTTP_RANGE='bytes=0-3')
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == b'%PDF'
+
+
+def test_drive_range_miss_streams_when_the_cache_is_unwritable(drive_stand_in, settings, monkeypatch):
+    from django.test import Client
+    from api import drive_proxy
+
+    def unwritable(self, file_id):
+        raise PermissionError(13, 'Permission denied', self.root)
+
+    monkeypatch.setattr(drive_proxy.DriveFileCache, 'open_writer', unwritable)
+    response = Client().get('/api/proxy-file/RO/', HTTP_RANGE='bytes=0-3')
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == drive_stand_in['body']
+    assert len(drive_stand_in['requests']) == 1
+
+
+@pytest.fixture
+def fake_gateway(settings):
+    from api.payment_gateway import FakeRazorpayGateway, set_gateway
+
+    settings.RAZORPAY_CIRCUIT_FAILURES = 2
+    settings.RAZORPAY_CIRCUIT_RESET_SECONDS = 30
+    gateway = FakeRazorpayGateway()
+    set_gateway(gateway)
+    yield gateway
+    set_gateway(None)
+
+
+def _advance_clock(monkeypatch, seconds):
+    from api import payment_gateway
+
+    now = payment_gateway.time.monotonic()
+    monkeypatch.setattr(payment_gateway.time, 'monotonic', lambda: now + seconds)
+
+
+def test_gateway_circuit_opens_then_recovers_through_one_trial(fake_gateway, monkeypatch):
+    from api.payment_gateway import GatewayError, GatewayUnavailable
+
+    fake_gateway.fail_next = 2
+    for _ in range(2):
+        with pytest.raises(GatewayError):
+            fake_gateway.create_order(23400)
+    assert fake_gateway.breaker.state == 'open'
+
+    # Open: fails fast without calling the gateway
+    with pytest.raises(GatewayUnavailable):
+        fake_gateway.create_order(23400)
+    assert fake_gateway.orders == {}
+
+    # Half-open trial fails: open again for another reset period
+    _advance_clock(monkeypatch, 31)
+    fake_gateway.fail_next = 1
+    with pytest.raises(GatewayError):
+        fake_gateway.fetch_payment('pay_1')
+    assert fake_gateway.breaker.state == 'open'
+    with pytest.raises(GatewayUnavailable):
+        fake_gateway.fetch_payment('pay_1')
+
+    # Half-open trial succeeds: closed
+    _advance_clock(monkeypatch, 62)
+    assert fake_gateway.create_order(23400)['status'] == 'created'
+    assert fake_gateway.breaker.state == 'closed' and fake_gateway.breaker.failures == 0
+
+
+def test_gateway_circuit_lets_a_single_trial_through(monkeypatch):
+    from api.payment_gateway import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    assert not breaker.allow()
+    _advance_clock(monkeypatch, 31)
+    assert breaker.allow() and breaker.state == 'half_open'
+    # Other requests keep failing fast while the trial is in flight
+    assert not breaker.allow()
+
+
+def test_create_order_returns_503_while_the_circuit_is_open(fake_gateway):
+    from rest_framework.test import APIClient
+    from api.models import Payment
+
+    client = APIClient()
+    client.force_authenticate(_user('razorpay@example.com'))
+    fake_gateway.fail_next = 2
+    for _ in range(2):
+        assert client.post('/api/create-order/', {'amount': 23400}, format='json').status_code == 500
+    response = client.post('/api/create-order/', {'amount': 23400}, format='json')
+    assert response.status_code == 503
+    assert not Payment.objects.exists()
+
+
+def test_gateway_stats(fake_gateway):
+    from api.payment_gateway import GatewayError, get_gateway_stats
+
+    fake_gateway.create_order(23400)
+    fake_gateway.fail_next = 1
+    with pytest.raises(GatewayError):
+        fake_gateway.fetch_payment('pay_1')
+
+    stats = get_gateway_stats()
+    assert (stats['backend'], stats['circuit'], stats['consecutive_failures']) == ('FakeRazorpayGateway', 'closed', 1)
+    assert {name: (op['calls'], op['errors']) for name, op in stats['operations'].items()} == {
+        'create_order': (1, 0), 'fetch_payment': (1, 1),
+    }
+
+
+@pytest.mark.parametrize('signature', ['', None, 'é' * 64, 12345, 'deadbeef'])
+def test_bad_checkout_signatures_are_rejected_not_raised(fake_gateway, signature):
+    assert fake_gateway.verify_payment_signature('order_1', 'pay_1', signature) is False
+
+
+def test_valid_checkout_signature_is_accepted(fake_gateway, settings):
+    import hashlib
+    import hmac
+
+    signature = hmac.new(settings.RAZORPAY_KEY_SECRET.encode(), b'order_1|pay_1', hashlib.sha256).hexdigest()
+    assert fake_gateway.verify_payment_signature('order_1', 'pay_1', signature) is True
@@ -5,10 +5,9 @@ from .views import save_application_page1
 from .views import get_academic_year_view
 from .views import ApplicationPage3View,upload_marksheet
 from .views import upload_documents
-from django.conf import settings
-from django.conf.urls.static import static
+from .authentication import apply_namespace_authentication
 
-urlpatterns = [
+urlpatterns = apply_namespace_authentication([
     path('send-otp/', send_otp, name='send_otp'),
     path('current-user-email/', views.get_user_profile, name='get_current_user_email'), 
     path('user-profile/', views.get_user_profile, name='get_user_profile'),
@@ -16,6 +15,7 @@ urlpatterns = [
     path('verify-otp/', verify_otp, name='verify_otp'),
     path('signup/', signup, name='signup'),
     path('login/', views.login_view, name='login'),
+    path('logout/', views.logout_view, name='logout'),
     path('forgot-password/', views.forgot_password, name='forgot_password'),
     path('verify-reset-otp/', views.verify_reset_otp, name='verify_reset_otp'),
     path('reset-password/', views.reset_password, name='reset_password'),
@@ -48,4 +48,4 @@ urlpatterns = [
     path('download-receipt/', views.download_receipt, name='download_receipt'),
     
   
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+], 'api')
\ No newline at end of file
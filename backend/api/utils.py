@@ -1,66 +1,66 @@
 # utils.py
-import requests
+import hashlib
 import os
 import shutil
 from django.conf import settings
-from pathlib import Path
 
 def get_real_academic_year():
-    try:
-        response = requests.get("http://worldtimeapi.org/api/timezone/Etc/UTC")
-        response.raise_for_status()
-        current_year = int(response.json()["datetime"][:4])
-        return f"{current_year}-{current_year + 1}"
-    except Exception as e:
-        print("Error fetching real-time:", e)
-        # fallback to system time if API fails
-        from datetime import datetime
-        current_year = datetime.now().year
-        return f"{current_year}-{current_year + 1}"
+    """Current academic year from local time and the active admission rows (no network)."""
+    from .academic_calendar import current_academic_year
+    return current_academic_year()
+
+DOCUMENTS_DIR = 'student_documents'
+
+# Per-document folders inside a student's directory
+DOCUMENT_FOLDERS = (
+    'SSLC',
+    'HSC',
+    'UG',
+    'Semester',
+    'Photo',
+    'Signature',
+    'Community_Certificate',
+    'Aadhar_Card',
+    'Transfer_Certificate',
+)
+
+# Directories this process has already created or seen
+_known_dirs = set()
+
+
+def safe_email_folder(email):
+    """Directory name for a student's documents, derived from the email."""
+    return email.replace('@', '_at_').replace('.', '_')
+
+
+def document_shard(folder):
+    """Hash-prefix shard for a student directory, e.g. "3f"."""
+    width = getattr(settings, 'DOCUMENT_SHARD_WIDTH', 2)
+    return hashlib.md5(folder.encode('utf-8')).hexdigest()[:width]
+
 
-def create_user_folder_structure(email):
+def user_document_root(email):
     """
-    Create a folder structure for the user to store documents locally.
-    Structure: MEDIA_ROOT/student_documents/{email}/
-        - SSLC/
-        - HSC/
-        - UG/
-        - Semester/
-        - Photo/
-        - Signature/
-        - Community_Certificate/
-        - Aadhar_Card/
-        - Transfer_Certificate/
-    
-    Returns: Dictionary with folder names and their absolute paths
+    Relative path of a student's documents under MEDIA_ROOT:
+    student_documents/{shard}/{safe_email}. Sharding keeps each directory to
+    a few thousand entries however many students register.
     """
-    # Sanitize email for folder name
-    safe_email = email.replace('@', '_at_').replace('.', '_')
-    
-    # Base path for student documents
-    base_path = os.path.join(settings.MEDIA_ROOT, 'student_documents', safe_email)
-    
-    # Define subfolders
-    subfolders = [
-        'SSLC',
-        'HSC', 
-        'UG',
-        'Semester',
-        'Photo',
-        'Signature',
-        'Community_Certificate',
-        'Aadhar_Card',
-        'Transfer_Certificate'
-    ]
-    
-    # Create directories
-    folder_paths = {}
-    for subfolder in subfolders:
-        folder_path = os.path.join(base_path, subfolder)
-        Path(folder_path).mkdir(parents=True, exist_ok=True)
-        folder_paths[subfolder] = folder_path
-    
-    return folder_paths
+    folder = safe_email_folder(email)
+    return os.path.join(DOCUMENTS_DIR, document_shard(folder), folder)
+
+
+def get_document_folder(email, folder_name):
+    """
+    Absolute path of one document folder (e.g. "Photo") for a student.
+    Only that folder is created, and only the first time this process sees it.
+    """
+    if folder_name not in DOCUMENT_FOLDERS:
+        raise ValueError(f"Unknown document folder: {folder_name}")
+    folder_path = os.path.join(settings.MEDIA_ROOT, user_document_root(email), folder_name)
+    if folder_path not in _known_dirs:
+        os.makedirs(folder_path, exist_ok=True)
+        _known_dirs.add(folder_path)
+    return folder_path
 
 
 def upload_to_local_storage(file_path, file_name, folder_path):
@@ -73,14 +73,18 @@ def upload_to_local_storage(file_path, file_name, folder_path):
         folder_path: Destination folder path
     
     Returns:
-        Relative URL path to access the file
+        MEDIA_URL path of the file (unsigned, see api.protected_media)
     """
     try:
         # Full destination path
         dest_path = os.path.join(folder_path, file_name)
         
-        # Copy file to destination
-        shutil.copy2(file_path, dest_path)
+        # Copy file to destination; recreate the folder if it vanished since it was memoized
+        try:
+            shutil.copy2(file_path, dest_path)
+        except FileNotFoundError:
+            os.makedirs(folder_path, exist_ok=True)
+            shutil.copy2(file_path, dest_path)
         
         # Generate relative URL path
         # Extract path relative to MEDIA_ROOT
@@ -89,7 +93,7 @@ def upload_to_local_storage(file_path, file_name, folder_path):
         # Convert to URL path (use forward slashes)
         url_path = relative_path.replace('\\', '/')
         
-        # Return URL path that will be served by Django
+        # Stored unsigned; api.protected_media signs it whenever it is served
         return f"{settings.MEDIA_URL}{url_path}"
     
     except Exception as e:
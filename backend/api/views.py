@@ -12,10 +12,16 @@ from .models import Student, Application, StudentDetails, Courses, Payment, Appl
 from .serializers import ApplicationSerializer, StudentDetailsSerializer
 from .utils import get_real_academic_year
 from .models import StudentDetails, MarksheetUpload
+from .authentication import invalidate_user_tokens
+from .course_catalog import all_course_for_degree, course_for_degree, get_catalog
+from . import drive_proxy
+from .protected_media import media_signature_epoch, sign_media_url
+from .academic_calendar import normalize_academic_year
+from backend.conditional import conditional_get, rows_token
+from backend.query_budget import query_budget
+from portal.quota import QuotaExceeded, SUBMITTED_STATUSES, release_application, reserve_application
 import random
 import time
-import smtplib
-import ssl
 import logging
 from django.db import IntegrityError
 import json
@@ -34,21 +40,19 @@ def send_otp(request):
     cache.set(email, otp, timeout=300)
 
     try:
-        logger.info(f"Sending OTP to {email}: {otp}")
-        context = ssl._create_unverified_context()
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-            server.sendmail(
-                settings.DEFAULT_FROM_EMAIL,
-                email,
-                f"Subject: Your OTP Code\n\nYour OTP code is {otp}"
-            )
-        logger.info(f"OTP sent successfully to {email}")
+        logger.info("Sending OTP to %s", email)
+        # Goes through EMAIL_BACKEND (SMTP settings above) like every other mail
+        send_mail(
+            'Your OTP Code',
+            f'Your OTP code is {otp}',
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+            fail_silently=False
+        )
+        logger.info("OTP sent successfully to %s", email)
         return Response({'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
     except Exception as e:
-        logger.error(f"Failed to send OTP to {email}: {str(e)}")
+        logger.error("Failed to send OTP to %s: %s", email, e)
         return Response({'error': f'Failed to send OTP: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
@@ -57,16 +61,16 @@ def verify_otp(request):
     email = request.data.get('email')
     otp = request.data.get('otp')
     if not all([email, otp]):
-        logger.warning(f"Missing fields in verify_otp: email={email}, otp={otp}")
+        logger.warning("Missing fields in verify_otp: email=%s, otp given=%s", email, bool(otp))
         return Response({'status': 'error', 'message': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
     cached_otp = cache.get(email)
-    logger.info(f"Verifying OTP for {email}: cached={cached_otp}, provided={otp}")
+    logger.debug("Verifying OTP for %s", email)
     if cached_otp == otp:
         cache.set(email, 'VERIFIED', timeout=300)
-        logger.info(f"OTP verified for {email}, set cache to VERIFIED")
+        logger.info("OTP verified for %s, set cache to VERIFIED", email)
         return Response({'status': 'success', 'message': 'OTP verified successfully'}, status=status.HTTP_200_OK)
-    logger.warning(f"Invalid OTP for {email}: cached={cached_otp}, provided={otp}")
+    logger.warning("Invalid OTP for %s (pending OTP: %s)", email, cached_otp is not None)
     return Response({'status': 'error', 'message': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -84,14 +88,14 @@ def signup(request):
     
     if not all([name, email, phone, password]):
         missing_fields = [field for field, value in [('name', name), ('email', email), ('phone', phone), ('password', password)] if not value]
-        logger.warning(f"Missing fields in signup: {', '.join(missing_fields)} for email: {email}")
+        logger.warning("Missing fields in signup: %s for email: %s", ', '.join(missing_fields), email)
         return Response({
             'status': 'error',
             'message': f"Please provide all required fields: {', '.join(missing_fields)}"
         }, status=status.HTTP_400_BAD_REQUEST)
 
     if cache.get(email) != 'VERIFIED':
-        logger.warning(f"OTP not verified for email: {email}")
+        logger.warning("OTP not verified for email: %s", email)
         return Response({
             'status': 'error',
             'message': 'Please verify your email with the OTP sent to you'
@@ -110,17 +114,17 @@ def signup(request):
         if lsc_code:
             student_data['lsc_code'] = lsc_code
             student_data['lsc_name'] = lsc_name
-            logger.info(f"Student signup via LSC: {lsc_code} - {lsc_name}")
+            logger.info("Student signup via LSC: %s - %s", lsc_code, lsc_name)
         
         Student.objects.using('online_edu').create(**student_data)
         cache.delete(email)
-        logger.info(f"Signup successful for email: {email}")
+        logger.info("Signup successful for email: %s", email)
         return Response({
             'status': 'success',
             'message': 'Account created successfully. You can now log in.'
         }, status=status.HTTP_200_OK)
     except IntegrityError as e:
-        logger.error(f"Integrity error during signup for {email}: {str(e)}")
+        logger.error("Integrity error during signup for %s: %s", email, e)
         # Check if error is due to email or phone uniqueness
         if 'email' in str(e).lower():
             return Response({
@@ -138,7 +142,7 @@ def signup(request):
                 'message': 'Unable to create account. Please try again later.'
             }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        logger.error(f"Signup error for {email}: {str(e)}")
+        logger.error("Signup error for %s: %s", email, e)
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred. Please try again later.'
@@ -152,7 +156,7 @@ def login_view(request):
     
     if not all([email, password]):
         missing_fields = [field for field, value in [('email', email), ('password', password)] if not value]
-        logger.warning(f"Missing fields in login: {', '.join(missing_fields)} for email: {email}")
+        logger.warning("Missing fields in login: %s for email: %s", ', '.join(missing_fields), email)
         return Response({
             'status': 'error',
             'message': f"Please provide {', '.join(missing_fields)}"
@@ -170,14 +174,14 @@ def login_view(request):
         # Create token in default database
         token, _ = Token.objects.using('default').get_or_create(user=user)
         
-        logger.info(f"Login successful for {email}")
+        logger.info("Login successful for %s", email)
         return Response({
             'status': 'success',
             'message': 'Login successful. Welcome back!',
             'token': token.key
         }, status=status.HTTP_200_OK)
     except Student.DoesNotExist:
-        logger.warning(f"Invalid login attempt for {email}")
+        logger.warning("Invalid login attempt for %s", email)
         # Check if the email exists but is unverified or has wrong password
         if Student.objects.using('online_edu').filter(email=email, is_verified=False).exists():
             return Response({
@@ -195,13 +199,25 @@ def login_view(request):
                 'message': 'No account found with this email. Please sign up or check your email.'
             }, status=status.HTTP_401_UNAUTHORIZED)
     except Exception as e:
-        logger.error(f"Login error for {email}: {str(e)}")
+        logger.error("Login error for %s: %s", email, e)
         return Response({
             'status': 'error',
             'message': 'An unexpected error occurred. Please try again later.'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_view(request):
+    # Drop the cached snapshot before the token itself so no request can
+    # authenticate with the deleted key from cache.
+    invalidate_user_tokens(request.user)
+    Token.objects.using('default').filter(user_id=request.user.pk).delete()
+    logger.info("Logout successful for %s", request.user.email)
+    return Response({
+        'status': 'success',
+        'message': 'Logged out successfully.'
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -257,6 +273,7 @@ def reset_password(request):
         user = User.objects.using('default').get(username=email)
         user.set_password(new_password)
         user.save(using='default')
+        invalidate_user_tokens(user)
         student.save(using='online_edu')
         cache.delete(email)
         return Response({'status': 'success', 'message': 'Password reset successful'}, status=status.HTTP_200_OK)
@@ -283,7 +300,7 @@ def get_user_profile(request):
             status=status.HTTP_200_OK
         )
     except Exception as e:
-        logger.error(f"Error fetching user profile: {str(e)}")
+        logger.error("Error fetching user profile: %s", e)
         return Response(
             {"status": "error", "message": "An error occurred while fetching profile"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -313,8 +330,15 @@ def applications_view(request):
         }
     }, status=200)
     
+def _academic_year_etag(request):
+    # The resolved year (cached per day, dropped when admission rows change),
+    # so opening a window for another year changes the ETag the same day
+    return f"academic-year-{get_real_academic_year()}"
+
+@query_budget(lsc_admindb=3)
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(etag_func=_academic_year_etag)
 def get_academic_year_view(request):
     academic_year = get_real_academic_year()
     return Response({"academic_year": academic_year}, status=status.HTTP_200_OK)
@@ -325,19 +349,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+@query_budget(online_edu=2)
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(etag_func=lambda request: get_catalog().etag, name='get_courses')
 def get_courses(request):
     try:
-        courses = Courses.objects.all().values('degree')
-        course_list = list(courses)
-        logger.info(f"Fetched {len(course_list)} courses: {[course['degree'] for course in course_list]}")
+        course_list = get_catalog().degrees
+        logger.info("Fetched %s courses", len(course_list))
         return Response({
             'status': 'success',
             'data': course_list
         }, status=status.HTTP_200_OK)
     except Exception as e:
-        logger.error(f"Error fetching courses: {str(e)}")
+        logger.error("Error fetching courses: %s", e)
         return Response({
             'status': 'error',
             'message': f'Error fetching courses: {str(e)}'
@@ -351,14 +376,17 @@ def save_application_page1(request):
     data['user'] = user.id
     data['email'] = user.email
 
-    academic_year = data.get('academic_year')
+    # Stored as "2025-26" whichever form the client sent, so the lookup
+    # below finds the student's existing application
+    academic_year = normalize_academic_year(data.get('academic_year'))
+    data['academic_year'] = academic_year
     course = data.get('course')
 
     if not academic_year:
         return Response({"status": "error", "message": "Academic year is required."}, status=400)
 
     # Validate course against Courses table
-    if course and not Courses.objects.filter(degree=course).exists():
+    if course and course_for_degree(course) is None:
         return Response({"status": "error", "message": "Invalid course selected."}, status=400)
 
     try:
@@ -424,11 +452,11 @@ def save_application_page2(request):
             serializer.save()
             return Response({'message': 'Application saved successfully'}, status=200)
         else:
-            print('Serializer errors:', serializer.errors)
+            logger.warning("Page 2 validation failed for %s: %s", user.email, serializer.errors)
             return Response(serializer.errors, status=400)
 
     except Exception as e:
-        print('Exception:', str(e))
+        logger.error("Error saving page 2 for %s: %s", user.email, e)
         return Response({'error': str(e)}, status=400)
 
 
@@ -447,8 +475,6 @@ from .serializers import ApplicationSerializer, StudentDetailsSerializer, Studen
 from .utils import get_real_academic_year
 import random
 import time
-import smtplib
-import ssl
 import logging
 import json
 import os
@@ -476,16 +502,16 @@ logger = logging.getLogger(__name__)
 def get_application(request):
     try:
         user = request.user
-        logger.debug(f"Fetching payments for user: {user.email} (ID: {user.id})")
+        logger.debug("Fetching payments for user: %s (ID: %s)", user.email, user.id)
         
         # Fetch payments by user
         payments = Payment.objects.filter(user=user)
-        logger.debug(f"Payments found by user: {payments.count()}")
+        logger.debug("Payments found by user: %s", payments.count())
 
         # Fallback: Fetch by email if no payments found
         if not payments.exists():
             payments = Payment.objects.filter(email=user.email)
-            logger.debug(f"Payments found by email {user.email}: {payments.count()}")
+            logger.debug("Payments found by email %s: %s", user.email, payments.count())
 
         def serialize_payment(payment):
             return {
@@ -508,10 +534,10 @@ def get_application(request):
             'failed': [serialize_payment(p) for p in payments if p.payment_status == 'failed'],
         }
 
-        logger.debug(f"Response data: {response_data}")
+        logger.debug("Response data: %s", response_data)
         return Response({'status': 'success', 'data': response_data})
     except Exception as e:
-        logger.error(f"Error fetching applications for user {request.user.email}: {str(e)}")
+        logger.error("Error fetching applications for user %s: %s", request.user.email, e)
         return Response({'status': 'error', 'message': str(e)}, status=400)
 
 
@@ -524,7 +550,7 @@ def verify_dummy_payment(request):
     """
     try:
         user = request.user
-        logger.info(f"Processing dummy payment for user: {user.email}")
+        logger.info("Processing dummy payment for user: %s", user.email)
         
         # Get the student to fetch LSC code
         try:
@@ -532,7 +558,7 @@ def verify_dummy_payment(request):
             lsc_code = student.lsc_code or "LC0000"  # Default if no LSC code
         except Student.DoesNotExist:
             lsc_code = "LC0000"
-            logger.warning(f"Student not found for {user.email}, using default LSC code")
+            logger.warning("Student not found for %s, using default LSC code", user.email)
         
         # Get the application to fetch mode_of_study
         try:
@@ -606,17 +632,17 @@ def verify_dummy_payment(request):
         now = timezone.now()
         txn_id = f"TXN{now.strftime('%Y%m%d%H%M%S')}"
         bank_txn_id = f"BANK{now.strftime('%Y%m%d%H%M%S%f')[:20]}"
-        order_id = f"ORDER{now.strftime('%Y%m%d%H%M%S')}"
+        order_id = new_order_id('ORDER')
         
         # Get amount from course or default
         amount = 236.00  # Default application fee
         try:
             if application.course:
-                course = AllCourses.objects.filter(degree=application.course).first()
+                course = all_course_for_degree(application.course)
                 if course:
                     amount = float(course.application_fee)
         except Exception as e:
-            logger.warning(f"Could not fetch course fee: {str(e)}")
+            logger.warning("Could not fetch course fee: %s", e)
         
         # Create ApplicationPayment record (feepayment table)
         try:
@@ -643,9 +669,9 @@ def verify_dummy_payment(request):
                 transaction_date=now,
                 payment_type='APPLICATION_FEE'
             )
-            logger.info(f"Created feepayment record with ID: {fee_payment.id} for application: {application_id}")
+            logger.info("Created feepayment record with ID: %s for application: %s", fee_payment.id, application_id)
         except Exception as e:
-            logger.warning(f"Could not create feepayment record: {str(e)}")
+            logger.warning("Could not create feepayment record: %s", e)
         
         # Create/Update Payment record in online_edu.payments table
         try:
@@ -663,11 +689,11 @@ def verify_dummy_payment(request):
                 }
             )
             action = "Created" if created else "Updated"
-            logger.info(f"{action} Payment record in online_edu.payments for {user.email} with transaction_id: {txn_id}")
+            logger.info("%s Payment record in online_edu.payments for %s with transaction_id: %s", action, user.email, txn_id)
         except Exception as e:
-            logger.warning(f"Could not create/update payment record in online_edu.payments: {str(e)}")
+            logger.warning("Could not create/update payment record in online_edu.payments: %s", e)
         
-        logger.info(f"Generated Application ID: {application_id} for user: {user.email}")
+        logger.info("Generated Application ID: %s for user: %s", application_id, user.email)
         
         return Response({
             'status': 'success',
@@ -692,7 +718,7 @@ def verify_dummy_payment(request):
         }, status=200)
         
     except Exception as e:
-        logger.error(f"Error verifying dummy payment for {request.user.email}: {str(e)}")
+        logger.error("Error verifying dummy payment for %s: %s", request.user.email, e)
         import traceback
         logger.error(traceback.format_exc())
         return Response({
@@ -714,7 +740,7 @@ def clear_payment(request):
     """
     try:
         user = request.user
-        logger.info(f"Clearing payment for user: {user.email}")
+        logger.info("Clearing payment for user: %s", user.email)
         
         # Get the application
         try:
@@ -726,9 +752,13 @@ def clear_payment(request):
             }, status=404)
         
         # Reset application
+        was_submitted = application.status in SUBMITTED_STATUSES
         application.application_id = None
         application.payment_status = 'N'  # Not Paid
         application.status = 'Draft'
+        if was_submitted:
+            # Give back the places recorded when the application was submitted
+            release_application(application)
         application.save()
         
         # Delete pending payments from old Payment table
@@ -737,14 +767,14 @@ def clear_payment(request):
         # Delete ApplicationPayment records (feepayment table)
         try:
             ApplicationPayment.objects.filter(user=user).delete()
-            logger.info(f"Deleted ApplicationPayment records for user: {user.email}")
+            logger.info("Deleted ApplicationPayment records for user: %s", user.email)
         except Exception as e:
-            logger.warning(f"Could not delete ApplicationPayment records: {str(e)}")
+            logger.warning("Could not delete ApplicationPayment records: %s", e)
         
         # Delete completed payments (optional - comment out if you want to keep history)
         # Payment.objects.filter(user=user).delete()
         
-        logger.info(f"Payment cleared successfully for user: {user.email}")
+        logger.info("Payment cleared successfully for user: %s", user.email)
         
         return Response({
             'status': 'success',
@@ -752,7 +782,7 @@ def clear_payment(request):
         }, status=200)
         
     except Exception as e:
-        logger.error(f"Error clearing payment for {request.user.email}: {str(e)}")
+        logger.error("Error clearing payment for %s: %s", request.user.email, e)
         import traceback
         logger.error(traceback.format_exc())
         return Response({
@@ -772,7 +802,7 @@ def get_application_payment_data(request):
     """
     try:
         user = request.user
-        logger.info(f"Fetching application payment data for user: {user.email}")
+        logger.info("Fetching application payment data for user: %s", user.email)
         
         # Get Student
         try:
@@ -793,12 +823,9 @@ def get_application_payment_data(request):
             }, status=404)
         
         # Get Active Admission Settings from lsc_admindb (portal_applicationsettings)
-        from portal.models import ApplicationSettings
+        from portal.admission_window import get_active_window
         try:
-            admission_settings = ApplicationSettings.objects.filter(
-                is_active=True,
-                status='OPEN'
-            ).first()
+            admission_settings = get_active_window()
             
             if admission_settings:
                 admission_code = admission_settings.admission_code
@@ -814,7 +841,7 @@ def get_application_payment_data(request):
                     admission_code = "A25"
                     admission_year = "2025-26"
         except Exception as e:
-            logger.warning(f"Could not fetch admission settings: {str(e)}")
+            logger.warning("Could not fetch admission settings: %s", e)
             # Fallback
             if application.academic_year:
                 year_part = application.academic_year.split('-')[0][-2:]
@@ -863,7 +890,7 @@ def get_application_payment_data(request):
             }
         }
         
-        logger.info(f"Application payment data retrieved successfully for {user.email}")
+        logger.info("Application payment data retrieved successfully for %s", user.email)
         
         return Response({
             'status': 'success',
@@ -871,7 +898,7 @@ def get_application_payment_data(request):
         }, status=200)
         
     except Exception as e:
-        logger.error(f"Error fetching application payment data for {request.user.email}: {str(e)}")
+        logger.error("Error fetching application payment data for %s: %s", request.user.email, e)
         import traceback
         logger.error(traceback.format_exc())
         return Response({
@@ -886,8 +913,12 @@ from rest_framework.response import Response
 from .models import Application
 from .serializers import ApplicationSerializer
 
+def _autofill_etag(request):
+    return rows_token(request.user.pk, Application.objects.using('online_edu').filter(user=request.user))
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(etag_func=_autofill_etag)
 def get_autofill_application(request):
     user = request.user
 
@@ -909,7 +940,7 @@ def get_autofill_application(request):
         }, status=200)
 
     except Exception as e:
-        logger.error(f"Error in get_autofill_application: {str(e)}")
+        logger.error("Error in get_autofill_application: %s", e)
         return Response({
             'status': 'error',
             'message': str(e)
@@ -920,14 +951,13 @@ class ApplicationPage3View(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        logger.info(f"Received token: {request.headers.get('Authorization')}")
-        logger.info(f"Authenticated user: {request.user}")
+        logger.debug("Page 3 requested by %s", request.user)
         try:
             application = Application.objects.filter(user=request.user).first()
             email = application.email if application else request.user.email
             name_initial = application.name_initial if application else ''
             
-            logger.info(f"Fetched from Application - email: {email}, name_initial: {name_initial}")
+            logger.info("Fetched from Application - email: %s, name_initial: %s", email, name_initial)
             
             try:
                 student_details = StudentDetails.objects.get(user=request.user)
@@ -936,9 +966,9 @@ class ApplicationPage3View(APIView):
                 # Ensure name_initial and email are always present from Application
                 response_data['email'] = email
                 response_data['name_initial'] = name_initial or response_data.get('name_initial', '')
-                logger.info(f"Returning existing StudentDetails with name_initial: {response_data['name_initial']}")
+                logger.info("Returning existing StudentDetails with name_initial: %s", response_data['name_initial'])
             except StudentDetails.DoesNotExist:
-                logger.info(f"StudentDetails not found, creating default response with name_initial: {name_initial}")
+                logger.info("StudentDetails not found, creating default response with name_initial: %s", name_initial)
                 response_data = {
                     'email': email,
                     'name_initial': name_initial,
@@ -951,7 +981,7 @@ class ApplicationPage3View(APIView):
                 }
             return Response({'status': 'success', 'data': response_data}, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error in GET /api/application/page3/: {str(e)}")
+            logger.error("Error in GET /api/application/page3/: %s", e)
             return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request):
@@ -960,7 +990,8 @@ class ApplicationPage3View(APIView):
             email = application.email if application else request.user.email
             name_initial = application.name_initial if application else ''
 
-            logger.info(f"POST data: {request.data}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Page 3 fields: %s", sorted(request.data.keys()))
             
             # Prepare data ensuring email and name_initial from Application
             data = request.data.copy() if hasattr(request.data, 'copy') else dict(request.data)
@@ -972,23 +1003,23 @@ class ApplicationPage3View(APIView):
                 defaults={'email': email, 'name_initial': name_initial}
             )
             
-            logger.info(f"StudentDetails {'created' if created else 'found'} for user: {request.user.username}")
+            logger.info("StudentDetails %s for user: %s", 'created' if created else 'found', request.user.username)
             
             serializer = StudentDetailsSerializer(student_details, data=data, partial=True)
             if serializer.is_valid():
                 serializer.save()
-                logger.info(f"Page 3 saved successfully for user: {request.user.username}")
+                logger.info("Page 3 saved successfully for user: %s", request.user.username)
                 return Response({
                     'status': 'success',
                     'message': 'Page 3 submitted successfully'
                 }, status=status.HTTP_200_OK)
-            logger.error(f"Serializer validation errors: {serializer.errors}")
+            logger.error("Serializer validation errors: %s", serializer.errors)
             return Response({
                 'status': 'error',
                 'message': serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in POST /api/application/page3/: {str(e)}")
+            logger.error("Error in POST /api/application/page3/: %s", e)
             return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 from rest_framework.decorators import api_view, permission_classes
@@ -1004,7 +1035,8 @@ logger = logging.getLogger(__name__)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_documents(request):
-    logger.info(f"Received document upload request: FILES={list(request.FILES.keys())}, POST={request.POST}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Document upload request: files=%s", sorted(request.FILES.keys()))
     user = request.user
     email = request.data.get('email')
 
@@ -1016,7 +1048,7 @@ def upload_documents(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     if email != user.email:
-        logger.warning(f"Email mismatch: provided={email}, user={user.email}")
+        logger.warning("Email mismatch: provided=%s, user=%s", email, user.email)
         return Response({
             'status': 'error',
             'message': 'Provided email does not match authenticated user'
@@ -1033,28 +1065,24 @@ def upload_documents(request):
     temp_files = []
     uploaded_urls = {}
     try:
-        logger.info(f"Creating/getting folder for email: {email}")
         # Import local storage utility
-        from .utils import create_user_folder_structure, upload_to_local_storage
-        
-        # Create folder structure for user
-        folder_paths = create_user_folder_structure(email)
+        from .utils import get_document_folder, upload_to_local_storage
 
         for doc_type, valid_types, max_size, dimensions in document_types:
             file = request.FILES.get(doc_type)
             if not file:
-                logger.warning(f"No file provided for {doc_type}")
+                logger.warning("No file provided for %s", doc_type)
                 continue
 
             if file.content_type not in valid_types:
-                logger.warning(f"Invalid file type for {doc_type}: {file.content_type}")
+                logger.warning("Invalid file type for %s: %s", doc_type, file.content_type)
                 return Response({
                     'status': 'error',
                     'message': f'Invalid file type for {doc_type}. Allowed: {", ".join(valid_types)}'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             if file.size > max_size:
-                logger.warning(f"File size too large for {doc_type}: {file.size} bytes")
+                logger.warning("File size too large for %s: %s bytes", doc_type, file.size)
                 return Response({
                     'status': 'error',
                     'message': f'File size for {doc_type} exceeds {max_size // 1024 // 1024}MB limit'
@@ -1072,13 +1100,13 @@ def upload_documents(request):
                     with Image.open(temp_file_path) as img:
                         width, height = img.size
                         if (width, height) != dimensions:
-                            logger.warning(f"Invalid dimensions for {doc_type}: got {width}x{height}, expected {dimensions[0]}x{dimensions[1]}")
+                            logger.warning("Invalid dimensions for %s: got %sx%s, expected %sx%s", doc_type, width, height, dimensions[0], dimensions[1])
                             return Response({
                                 'status': 'error',
                                 'message': f'Invalid dimensions for {doc_type}. Required: {dimensions[0]}x{dimensions[1]}px, Got: {width}x{height}px'
                             }, status=status.HTTP_400_BAD_REQUEST)
                 except Exception as e:
-                    logger.error(f"Failed to validate dimensions for {doc_type}: {str(e)}")
+                    logger.error("Failed to validate dimensions for %s: %s", doc_type, e)
                     return Response({
                         'status': 'error',
                         'message': f'Failed to validate image dimensions for {doc_type}: {str(e)}'
@@ -1097,11 +1125,11 @@ def upload_documents(request):
             
             try:
                 # Upload to local storage
-                file_url = upload_to_local_storage(temp_file_path, file_name, folder_paths[folder_name])
-                logger.info(f"Uploaded {doc_type} to local storage: {file_url}")
+                file_url = upload_to_local_storage(temp_file_path, file_name, get_document_folder(email, folder_name))
+                logger.info("Uploaded %s to local storage: %s", doc_type, file_url)
                 uploaded_urls[doc_type] = file_url
             except Exception as e:
-                logger.error(f"Failed to upload {doc_type}: {str(e)}")
+                logger.error("Failed to upload %s: %s", doc_type, e)
                 return Response({
                     'status': 'error',
                     'message': f'Failed to upload {doc_type} to local storage: {str(e)}'
@@ -1131,16 +1159,16 @@ def upload_documents(request):
             setattr(student_details, url_mapping[doc_type], url)
         
         student_details.save()
-        logger.info(f"Updated StudentDetails with document URLs for {email}")
+        logger.info("Updated StudentDetails with document URLs for %s", email)
 
         return Response({
             'status': 'success',
             'message': 'Documents uploaded successfully',
-            'urls': uploaded_urls
+            'urls': {doc_type: sign_media_url(url) for doc_type, url in uploaded_urls.items()}
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error uploading documents: {str(e)}", exc_info=True)
+        logger.error("Error uploading documents: %s", e, exc_info=True)
         return Response({
             'status': 'error',
             'message': f'Error uploading documents: {str(e)}'
@@ -1150,9 +1178,9 @@ def upload_documents(request):
             if os.path.exists(temp_file_path):
                 try:
                     os.remove(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
+                    logger.debug("Cleaned up temporary file: %s", temp_file_path)
                 except Exception as e:
-                    logger.error(f"Error cleaning up temporary file: {str(e)}")
+                    logger.error("Error cleaning up temporary file: %s", e)
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -1184,9 +1212,9 @@ def educational_details(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_marksheet(request):
-    logger.info(f"Received upload request: FILES={request.FILES}, POST={request.POST}")
-    logger.info(f"Request data: {request.data}")
-    logger.info(f"Content-Type: {request.content_type}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Marksheet upload request: files=%s, fields=%s", sorted(request.FILES.keys()), sorted(request.POST.keys()))
+    logger.info("Content-Type: %s", request.content_type)
     
     user = request.user
     file = request.FILES.get('file')
@@ -1195,31 +1223,31 @@ def upload_marksheet(request):
     # Get email from frontend or from authenticated user's records
     email = request.POST.get('email') or request.data.get('email')
     if not email:
-        logger.info(f"Email not in request, looking up for user: {user.username}")
+        logger.info("Email not in request, looking up for user: %s", user.username)
         try:
             # Try Student model first
             student = Student.objects.using('online_edu').get(email=user.email)
             email = student.email
-            logger.info(f"Got email from Student model: {email}")
+            logger.info("Got email from Student model: %s", email)
         except Student.DoesNotExist:
-            logger.warning(f"Student record not found for user: {user.username}, trying Application model")
+            logger.warning("Student record not found for user: %s, trying Application model", user.username)
             try:
                 # Try Application model
                 application = Application.objects.get(user=user)
                 email = application.email
-                logger.info(f"Got email from Application model: {email}")
+                logger.info("Got email from Application model: %s", email)
             except Application.DoesNotExist:
-                logger.error(f"No Student or Application record found for user: {user.username}")
+                logger.error("No Student or Application record found for user: %s", user.username)
                 return Response({
                     'status': 'error',
                     'message': 'User email not found. Please complete your profile first.'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-    logger.info(f"Parsed values - file: {file}, qualification_type: {qualification_type}, email: {email}")
+    logger.info("Parsed values - file: %s, qualification_type: %s, email: %s", file, qualification_type, email)
 
     # Validate inputs
     if not all([file, qualification_type, email]):
-        logger.warning(f"Missing required fields - file: {file is not None}, qualification_type: {qualification_type}, email: {email}")
+        logger.warning("Missing required fields - file: %s, qualification_type: %s, email: %s", file is not None, qualification_type, email)
         return Response({
             'status': 'error',
             'message': 'File, qualification type, and email are required'
@@ -1229,7 +1257,7 @@ def upload_marksheet(request):
     allowed_extensions = ['pdf', 'jpg', 'jpeg']
     file_extension = file.name.split('.')[-1].lower()
     if file_extension not in allowed_extensions:
-        logger.warning(f"Invalid file extension: {file_extension}")
+        logger.warning("Invalid file extension: %s", file_extension)
         return Response({
             'status': 'error',
             'message': 'Only PDF, JPG, or JPEG files are allowed'
@@ -1238,7 +1266,7 @@ def upload_marksheet(request):
     # Validate file size
     max_size = 10 * 1024 * 1024 if qualification_type == 'Semester' else 5 * 1024 * 1024
     if file.size > max_size:
-        logger.warning(f"File size too large: {file.size} bytes")
+        logger.warning("File size too large: %s bytes", file.size)
         return Response({
             'status': 'error',
             'message': f'File size exceeds {max_size // 1024 // 1024}MB limit'
@@ -1247,18 +1275,14 @@ def upload_marksheet(request):
     temp_file_path = None
     try:
         # Import local storage utility
-        from .utils import create_user_folder_structure, upload_to_local_storage
+        from .utils import get_document_folder, upload_to_local_storage
         
         # Save file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
             for chunk in file.chunks():
                 temp_file.write(chunk)
             temp_file_path = temp_file.name
-        logger.info(f"Temporary file saved: {temp_file_path}")
-
-        # Get or create folder structure
-        logger.info(f"Creating/getting folder for email: {email}")
-        folder_paths = create_user_folder_structure(email)
+        logger.info("Temporary file saved: %s", temp_file_path)
 
         # Map qualification types to folders
         folder_mapping = {
@@ -1268,13 +1292,13 @@ def upload_marksheet(request):
             'UG Provisional': 'UG',
         }
         folder_name = folder_mapping.get(qualification_type, 'UG')
-        folder_path = folder_paths[folder_name]
-        logger.info(f"Uploading to folder: {folder_name} for qualification_type: {qualification_type}")
+        folder_path = get_document_folder(email, folder_name)
+        logger.info("Uploading to folder: %s for qualification_type: %s", folder_name, qualification_type)
 
         # Upload to local storage
         file_name = f"{email.replace('@', '_at_').replace('.', '_')}_{qualification_type}_{file.name}"
         file_url = upload_to_local_storage(temp_file_path, file_name, folder_path)
-        logger.info(f"File uploaded to local storage: {file_url}")
+        logger.info("File uploaded to local storage: %s", file_url)
 
         # Update StudentDetails
         student_details, _ = StudentDetails.objects.get_or_create(
@@ -1289,7 +1313,7 @@ def upload_marksheet(request):
         }.get(qualification_type, 'ug_marksheet_url')
         setattr(student_details, url_field, file_url)
         student_details.save()
-        logger.info(f"Updated StudentDetails with {url_field}: {file_url}")
+        logger.info("Updated StudentDetails with %s: %s", url_field, file_url)
 
         # Save to MarksheetUpload model
         MarksheetUpload.objects.create(
@@ -1298,16 +1322,16 @@ def upload_marksheet(request):
             qualification_type=qualification_type,
             file_url=file_url
         )
-        logger.info(f"Created MarksheetUpload entry for {qualification_type}")
+        logger.info("Created MarksheetUpload entry for %s", qualification_type)
 
         return Response({
             'status': 'success',
             'message': 'File uploaded successfully',
-            'file_url': file_url
+            'file_url': sign_media_url(file_url)
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error uploading file: {str(e)}", exc_info=True)
+        logger.error("Error uploading file: %s", e, exc_info=True)
         return Response({
             'status': 'error',
             'message': f'Error uploading file: {str(e)}'
@@ -1317,9 +1341,9 @@ def upload_marksheet(request):
         if temp_file_path and os.path.exists(temp_file_path):
             try:
                 os.remove(temp_file_path)
-                logger.info(f"Cleaned up temporary file: {temp_file_path}")
+                logger.debug("Cleaned up temporary file: %s", temp_file_path)
             except Exception as e:
-                logger.error(f"Error cleaning up temporary file: {str(e)}")
+                logger.error("Error cleaning up temporary file: %s", e)
 
 import os
 import tempfile
@@ -1348,7 +1372,7 @@ def serve_temp_image(request, file_id):
         else:
             raise Http404(f"Image not found: Status {response.status_code}")
     except Exception as e:
-        logger.error(f"Error serving temp image {file_id}: {str(e)}")
+        logger.error("Error serving temp image %s: %s", file_id, e)
         raise Http404
 
 
@@ -1363,8 +1387,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def _preview_etag(request):
+    user = request.user
+    return rows_token(
+        user.pk,
+        media_signature_epoch(),  # the response embeds signed media URLs
+        Student.objects.using('online_edu').filter(email=user.email),
+        Application.objects.using('online_edu').filter(email=user.email),
+        StudentDetails.objects.filter(user=user),
+        MarksheetUpload.objects.filter(student__user=user),
+    )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(etag_func=_preview_etag)
 def get_application_preview(request):
     try:
         user = request.user
@@ -1401,7 +1437,7 @@ def get_application_preview(request):
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error fetching preview data for user {user.email}: {str(e)}")
+        logger.error("Error fetching preview data for user %s: %s", user.email, e)
         return Response({
             'status': 'error',
             'message': str(e)
@@ -1419,84 +1455,17 @@ def proxy_google_drive_image(request, file_id):
     """
     Proxy an image file from Google Drive.
     Handles images (JPEG, PNG) for preview purposes.
+    Streamed and cached on disk by api.drive_proxy.
     """
-    try:
-        # Construct the direct download URL for Google Drive
-        image_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        logger.info(f"Proxying image: {image_url}")
-        
-        # Stream the file from Google Drive
-        response = requests.get(image_url, stream=True, timeout=10)
-        
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', 'image/jpeg')
-            # Validate content type for images
-            if not content_type.startswith('image/'):
-                logger.warning(f"Unexpected content type for image: {content_type}")
-                content_type = 'image/jpeg'  # Fallback to JPEG
-            content_disposition = response.headers.get('content-disposition', '')
-            
-            # Create Django response
-            django_response = HttpResponse(
-                content=response.content,
-                content_type=content_type,
-            )
-            
-            if content_disposition:
-                django_response['Content-Disposition'] = content_disposition
-            else:
-                django_response['Content-Disposition'] = 'inline; filename="image.jpg"'
-                
-            logger.info(f"Successfully proxied image: {file_id}")
-            return django_response
-        else:
-            logger.error(f"Google Drive returned status {response.status_code} for file_id {file_id}")
-            return HttpResponse(status=404, content=f"File not found: Status {response.status_code}")
-    except requests.RequestException as e:
-        logger.error(f"Error proxying image {file_id}: {str(e)}")
-        return HttpResponse(status=500, content=f"Error fetching file: {str(e)}")
+    return drive_proxy.serve(request, file_id, kind='image')
 
 def proxy_google_drive_file(request, file_id):
     """
     Proxy a file (e.g., PDF) from Google Drive for download or preview.
     Ensures proper content type and disposition for PDFs.
+    Streamed and cached on disk by api.drive_proxy, with Range support.
     """
-    try:
-        # Construct the direct download URL for Google Drive
-        file_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        logger.info(f"Proxying file: {file_url}")
-        
-        # Stream the file from Google Drive
-        response = requests.get(file_url, stream=True, timeout=10)
-        
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', 'application/pdf')
-            # Force PDF content type if not correctly set
-            if content_type == 'application/octet-stream' or not content_type.startswith('application/pdf'):
-                logger.warning(f"Correcting content type from {content_type} to application/pdf")
-                content_type = 'application/pdf'
-            # Set filename for download
-            filename = quote(f"document_{file_id}.pdf")
-            content_disposition = response.headers.get('content-disposition', f'inline; filename="{filename}"')
-            
-            # Create Django response for streaming
-            django_response = FileResponse(
-                response.raw,
-                content_type=content_type,
-                as_attachment=False,  # Inline for preview
-            )
-            
-            django_response['Content-Disposition'] = content_disposition
-            django_response['Content-Length'] = response.headers.get('content-length', '')
-            
-            logger.info(f"Successfully proxied file: {file_id}")
-            return django_response
-        else:
-            logger.error(f"Google Drive returned status {response.status_code} for file_id {file_id}")
-            return HttpResponse(status=404, content=f"File not found: Status {response.status_code}")
-    except requests.RequestException as e:
-        logger.error(f"Error proxying file {file_id}: {str(e)}")
-        return HttpResponse(status=500, content=f"Error fetching file: {str(e)}")
+    return drive_proxy.serve(request, file_id, kind='file')
 
 
 
@@ -1537,8 +1506,6 @@ from .serializers import ApplicationSerializer, StudentSerializer, StudentDetail
 from .utils import get_real_academic_year
 import random
 import time
-import smtplib
-import ssl
 import logging
 import json
 import os
@@ -1576,7 +1543,7 @@ def confirm_preview(request):
     try:
         application_id = request.data.get('application_id')
         if not application_id:
-            logger.warning(f"Missing application_id for user: {request.user.email}")
+            logger.warning("Missing application_id for user: %s", request.user.email)
             return Response(
                 {"status": "error", "message": "Application ID is required"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -1589,9 +1556,22 @@ def confirm_preview(request):
                 status='Draft',
                 is_active=True
             )
+            # Hold a place in the admission quota before submitting
+            try:
+                quota_owners = reserve_application(application)
+            except QuotaExceeded as e:
+                logger.warning("%s; rejected application %s for user: %s", e, application_id, request.user.email)
+                return Response(
+                    {"status": "error", "message": "The admission quota for this session is full. No more applications can be accepted."},
+                    status=status.HTTP_409_CONFLICT
+                )
             application.status = 'In Progress'
-            application.save()
-            logger.info(f"Application {application_id} status updated to 'In Progress' for user: {request.user.email}")
+            try:
+                application.save()
+            except Exception:
+                release_application(application, quota_owners)
+                raise
+            logger.info("Application %s status updated to 'In Progress' for user: %s", application_id, request.user.email)
             return Response(
                 {
                     "status": "success",
@@ -1601,56 +1581,43 @@ def confirm_preview(request):
                 status=status.HTTP_200_OK
             )
         except Application.DoesNotExist:
-            logger.warning(f"No active Draft application found with ID {application_id} for user: {request.user.email}")
+            logger.warning("No active Draft application found with ID %s for user: %s", application_id, request.user.email)
             return Response(
                 {"status": "error", "message": "No active Draft application found with the provided ID"},
                 status=status.HTTP_404_NOT_FOUND
             )
     except Exception as e:
-        logger.error(f"Error in confirm_preview for user {request.user.email}: {str(e)}")
+        logger.error("Error in confirm_preview for user %s: %s", request.user.email, e)
         return Response(
             {"status": "error", "message": f"An error occurred: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-def get_razorpay_client():
-    session = requests.Session()
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-    session.mount('https://', HTTPAdapter(max_retries=retries))
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    client.session = session
-    return client
-
-
+from .payment_gateway import GatewayUnavailable, get_gateway
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_fixed(1),
-    retry=retry_if_exception_type((requests.exceptions.ConnectionError, requests.exceptions.Timeout)),
-    before_sleep=lambda retry_state: logger.warning(f"Retrying create_order: attempt {retry_state.attempt_number}")
-)
 def create_order(request):
     try:
         amount = request.data.get('amount')  # In paise
         currency = request.data.get('currency', 'INR')
         if not amount or int(amount) <= 0:
-            logger.warning(f"Invalid amount provided: {amount}")
+            logger.warning("Invalid amount provided: %s", amount)
             return Response(
                 {"status": "error", "message": "Invalid amount"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        client = get_razorpay_client()
-        order_data = {
-            'amount': int(amount),
-            'currency': currency,
-            'payment_capture': 1
-        }
-        order = client.order.create(data=order_data, timeout=10)
-        logger.info(f"Order created: {order['id']} for user: {request.user.email}")
+        try:
+            order = get_gateway().create_order(amount=int(amount), currency=currency)
+        except GatewayUnavailable as e:
+            logger.warning("Order not created for user %s: %s", request.user.email, e)
+            return Response(
+                {"status": "error", "message": "Payment gateway is temporarily unavailable. Please try again shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        logger.info("Order created: %s for user: %s", order['id'], request.user.email)
 
         # Generate unique application ID
         application_id = f"PU/PA/{datetime.now().year}/{str(uuid.uuid4())[:6].upper()}"
@@ -1675,9 +1642,9 @@ def create_order(request):
                 course=course,
                 payment_status='created'
             )
-            logger.info(f"Created payment entry with application_id: {application_id}, status: created, payment_id: {payment.id}")
+            logger.info("Created payment entry with application_id: %s, status: created, payment_id: %s", application_id, payment.id)
         except Exception as db_error:
-            logger.error(f"Database error creating payment entry: {str(db_error)}")
+            logger.error("Database error creating payment entry: %s", db_error)
             return Response(
                 {"status": "error", "message": f"Failed to save payment: {str(db_error)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1694,7 +1661,7 @@ def create_order(request):
             status=status.HTTP_200_OK
         )
     except Exception as e:
-        logger.error(f"Error creating order for user {request.user.email}: {str(e)}")
+        logger.error("Error creating order for user %s: %s", request.user.email, e)
         return Response(
             {"status": "error", "message": f"Failed to create order: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1712,7 +1679,7 @@ def verify_payment(request):
         payment_status = request.data.get('payment_status', 'unknown')
 
         if not all([razorpay_payment_id, razorpay_order_id, application_id]):
-            logger.warning(f"Missing required fields: payment_id={razorpay_payment_id}, order_id={razorpay_order_id}, application_id={application_id}")
+            logger.warning("Missing required fields: payment_id=%s, order_id=%s, application_id=%s", razorpay_payment_id, razorpay_order_id, application_id)
             return Response(
                 {"status": "error", "message": "Missing payment details or application ID"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -1736,20 +1703,20 @@ def verify_payment(request):
         try:
             payment = Payment.objects.get(application_id=application_id, user=request.user)
         except Payment.DoesNotExist:
-            logger.warning(f"No payment found for application_id: {application_id}")
+            logger.warning("No payment found for application_id: %s", application_id)
             return Response(
                 {"status": "error", "message": "No payment found for the provided application ID"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         # Check Razorpay payment status
-        client = get_razorpay_client()
+        gateway = get_gateway()
         try:
-            razorpay_payment = client.payment.fetch(razorpay_payment_id)
+            razorpay_payment = gateway.fetch_payment(razorpay_payment_id)
             razorpay_status = razorpay_payment.get('status', 'unknown')
-            logger.info(f"Razorpay payment status for {razorpay_payment_id}: {razorpay_status}")
+            logger.info("Razorpay payment status for %s: %s", razorpay_payment_id, razorpay_status)
         except Exception as e:
-            logger.error(f"Failed to fetch Razorpay payment status for {razorpay_payment_id}: {str(e)}")
+            logger.error("Failed to fetch Razorpay payment status for %s: %s", razorpay_payment_id, e)
             razorpay_status = payment_status
 
         # Map Razorpay status to Payments table status
@@ -1765,13 +1732,8 @@ def verify_payment(request):
 
         # Verify signature for successful payments
         if razorpay_status == 'captured' and razorpay_signature:
-            generated_signature = hmac.new(
-                key=settings.RAZORPAY_KEY_SECRET.encode(),
-                msg=f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
-            if generated_signature != razorpay_signature:
-                logger.warning(f"Invalid signature for payment {razorpay_payment_id}")
+            if not gateway.verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
+                logger.warning("Invalid signature for payment %s", razorpay_payment_id)
                 payment_status = 'failed'
 
         # Update application status for successful payments
@@ -1786,9 +1748,9 @@ def verify_payment(request):
                 application.status = 'Completed'
                 application.is_active = False
                 application.save()
-                logger.info(f"Application {application.id} status updated to 'Completed' for user: {request.user.email}")
+                logger.info("Application %s status updated to 'Completed' for user: %s", application.id, request.user.email)
             except Application.DoesNotExist:
-                logger.warning(f"No active Draft or In Progress application found for user: {request.user.email}")
+                logger.warning("No active Draft or In Progress application found for user: %s", request.user.email)
                 return Response(
                     {"status": "error", "message": "No active application found"},
                     status=status.HTTP_404_NOT_FOUND
@@ -1803,7 +1765,7 @@ def verify_payment(request):
         payment.course = course
         payment.amount = float(razorpay_payment.get('amount', 23400)) / 100 if razorpay_status != 'unknown' else 234.00
         payment.save()
-        logger.info(f"Updated payment {application_id} with status: {payment_status}")
+        logger.info("Updated payment %s with status: %s", application_id, payment_status)
 
         return Response(
             {
@@ -1817,7 +1779,7 @@ def verify_payment(request):
         )
 
     except Exception as e:
-        logger.error(f"Payment verification error for user {request.user.email}: {str(e)}")
+        logger.error("Payment verification error for user %s: %s", request.user.email, e)
         try:
             payment = Payment.objects.get(application_id=application_id, user=request.user)
         except Payment.DoesNotExist:
@@ -1834,7 +1796,7 @@ def verify_payment(request):
             )
         payment.payment_status = 'failed'
         payment.save()
-        logger.info(f"Saved failed payment for application_id: {application_id}")
+        logger.info("Saved failed payment for application_id: %s", application_id)
         return Response(
             {"status": "error", "message": f"Payment verification failed: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1855,7 +1817,7 @@ logger = logging.getLogger(__name__)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_student_details(request):
-    logger.info(f"Authenticated user: {request.user.email}, ID: {request.user.id}")
+    logger.info("Authenticated user: %s, ID: %s", request.user.email, request.user.id)
     try:
         # Try to get Student by user
         student = Student.objects.filter(user=request.user).first()
@@ -1875,7 +1837,7 @@ def get_student_details(request):
                     phone='',
                     is_verified=True,
                 )
-                logger.info(f"Created new Student profile for user: {request.user.email}")
+                logger.info("Created new Student profile for user: %s", request.user.email)
         
         return Response(
             {
@@ -1889,7 +1851,7 @@ def get_student_details(request):
             status=status.HTTP_200_OK
         )
     except Exception as e:
-        logger.error(f"Error fetching student details: {str(e)}")
+        logger.error("Error fetching student details: %s", e)
         return Response(
             {"status": "error", "message": f"An error occurred while fetching student details: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1921,48 +1883,21 @@ import base64
 import hmac
 import hmac
 
+from .paytm_checksum import form_checksum, verify_form_checksum
+from backend.instrumentation import track_outbound
+
 def generate_checksum(param_dict, merchant_key):
     """
     Generate Paytm form CHECKSUMHASH using the exact algorithm Paytm expects.
     Creates a pipe-separated string of sorted key=value pairs, then SHA256 hash.
     """
-    params_string = ""
-    for key in sorted(param_dict.keys()):
-        if key == "CHECKSUMHASH":
-            continue
-        value = str(param_dict[key]) if param_dict[key] is not None else ""
-        params_string += f"{key}={value}|"
-    
-    # Append merchant key at the end
-    params_string += merchant_key
-    
-    # Log the string being hashed (first 100 chars for security)
-    logger.debug(f"Checksum string (first 100 chars): {params_string[:100]}...")
-    
-    # Generate SHA256 hash
-    checksum_hash = hashlib.sha256(params_string.encode('utf-8')).hexdigest()
-    
-    # Return as uppercase (Paytm expects uppercase hex)
-    return checksum_hash.upper()
+    return form_checksum(param_dict, merchant_key)
 
 def verify_checksum(param_dict, merchant_key, checksumhash):
     """
     Verify Paytm form CHECKSUMHASH by regenerating it and comparing.
     """
-    params_string = ""
-    for key in sorted(param_dict.keys()):
-        if key == "CHECKSUMHASH":
-            continue
-        value = str(param_dict[key]) if param_dict[key] is not None else ""
-        params_string += f"{key}={value}|"
-    
-    # Append merchant key at the end
-    params_string += merchant_key
-    
-    # Generate SHA256 hash
-    generated_checksum = hashlib.sha256(params_string.encode('utf-8')).hexdigest().upper()
-    
-    return generated_checksum == checksumhash.upper()
+    return verify_form_checksum(param_dict, merchant_key, checksumhash)
 
 def generate_v3_signature(body_str, merchant_key: str) -> str:
     """
@@ -1982,13 +1917,13 @@ def get_payment_status(request):
         if not student:
             # Try to get from User model
             student_name = user.get_full_name() or user.username or user.email
-            logger.info(f"No api.Student profile found for user: {user.email}, using User model")
+            logger.info("No api.Student profile found for user: %s, using User model", user.email)
         else:
             student_name = student.name
 
         application = Application.objects.filter(user=user).first()
         if not application:
-            logger.warning(f"No application found for user: {user.email}")
+            logger.warning("No application found for user: %s", user.email)
             return Response(
                 {"status": "error", "message": "No application found. Please fill out the application form first."},
                 status=status.HTTP_404_NOT_FOUND
@@ -1996,7 +1931,7 @@ def get_payment_status(request):
 
         # If application is in Draft status or course not selected, return no payment pending
         if application.status == 'Draft' or not application.course:
-            logger.info(f"Application in Draft status or no course selected for user: {user.email}")
+            logger.info("Application in Draft status or no course selected for user: %s", user.email)
             return Response(
                 {"status": "success",
                  "data": {
@@ -2011,9 +1946,9 @@ def get_payment_status(request):
                  }
                 }, status=status.HTTP_200_OK)
 
-        course = Courses.objects.filter(degree=application.course).first()
+        course = course_for_degree(application.course)
         if not course:
-            logger.warning(f"Course {application.course} not found for user: {user.email}")
+            logger.warning("Course %s not found for user: %s", application.course, user.email)
             # If course not found in Courses, try fallback with default fee
             return Response(
                 {"status": "success",
@@ -2045,12 +1980,16 @@ def get_payment_status(request):
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error fetching payment status for user {user.email}: {str(e)}")
+        logger.error("Error fetching payment status for user %s: %s", user.email, e)
         return Response(
             {"status": "error", "message": f"An error occurred: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def new_order_id(prefix='PUCDOE'):
+    """Paytm ORDER_ID: callbacks find the payment by it, so orders started in the same second need the random suffix."""
+    return f"{prefix}{int(datetime.now().timestamp())}{uuid.uuid4().hex[:6].upper()}"
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def initiate_payment(request):
@@ -2069,10 +2008,10 @@ def initiate_payment(request):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            course = Courses.objects.filter(degree=application.course).first()
+            course = course_for_degree(application.course)
             application_fee = course.application_fee if course else 236.00
             
-            order_id = f"TEST{int(datetime.now().timestamp())}"
+            order_id = new_order_id('TEST')
             application_id = f"PU/PA/{datetime.now().year}/{str(uuid.uuid4())[:6].upper()}"
             
             # Create payment record with success status
@@ -2102,7 +2041,7 @@ def initiate_payment(request):
             application.status = 'Completed'
             application.save()
             
-            logger.info(f"TEST PAYMENT created for user {user.email}: {order_id}")
+            logger.info("TEST PAYMENT created for user %s: %s", user.email, order_id)
             
             return Response({
                 "status": "success",
@@ -2120,15 +2059,15 @@ def initiate_payment(request):
         # Normal Paytm flow
         application = Application.objects.filter(user=user, status__in=['Draft', 'In Progress']).first()
         if not application:
-            logger.warning(f"No active application found for user: {user.email}")
+            logger.warning("No active application found for user: %s", user.email)
             return Response(
                 {"status": "error", "message": "No active application found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        course = Courses.objects.filter(degree=application.course).first()
+        course = course_for_degree(application.course)
         if not course:
-            logger.warning(f"Course {application.course} not found for user: {user.email}")
+            logger.warning("Course %s not found for user: %s", application.course, user.email)
             # Use default fee if course not found
             application_fee = 236.00
         else:
@@ -2136,13 +2075,13 @@ def initiate_payment(request):
 
         student = Student.objects.filter(email=user.email).first()
         if not student:
-            logger.warning(f"No student profile found for user: {user.email}")
+            logger.warning("No student profile found for user: %s", user.email)
             return Response(
                 {"status": "error", "message": "Student profile not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        order_id = f"PUCDOE{int(datetime.now().timestamp())}"
+        order_id = new_order_id()
         application_id = f"PU/PA/{datetime.now().year}/{str(uuid.uuid4())[:6].upper()}"
 
         # Build payment data matching the exact structure from working PHP code
@@ -2161,7 +2100,7 @@ def initiate_payment(request):
         # Validate Paytm gateway URL to avoid mis-redirects
         paytm_url = settings.PAYTM_TXN_URL
         if not paytm_url or 'paytm.in' not in paytm_url:
-            logger.error(f"Invalid PAYTM_TXN_URL configured: {paytm_url}")
+            logger.error("Invalid PAYTM_TXN_URL configured: %s", paytm_url)
             return Response({
                 "status": "error",
                 "message": "Payment gateway is not configured correctly. Please contact support.",
@@ -2169,7 +2108,7 @@ def initiate_payment(request):
 
         # Generate checksum BEFORE adding it to payment_data
         checksum = generate_checksum(payment_data, settings.PAYTM_MERCHANT_KEY)
-        logger.info(f"Generated CHECKSUMHASH for order {payment_data['ORDER_ID']}: {checksum[:20]}...")
+        logger.debug("Generated CHECKSUMHASH for order %s", payment_data['ORDER_ID'])
 
         payment = ApplicationPayment.objects.create(
             user=user,
@@ -2186,7 +2125,7 @@ def initiate_payment(request):
             mid=getattr(settings, 'PAYTM_MERCHANT_MID', '') or ''
         )
 
-        logger.info(f"Initiated payment for user {user.email}: order_id={order_id}, paytm_url={paytm_url}, website={settings.PAYTM_MERCHANT_WEBSITE}, env={settings.PAYTM_ENVIRONMENT}")
+        logger.info("Initiated payment for user %s: order_id=%s, paytm_url=%s, website=%s, env=%s", user.email, order_id, paytm_url, settings.PAYTM_MERCHANT_WEBSITE, settings.PAYTM_ENVIRONMENT)
         return Response({
             "status": "success",
             "data": {
@@ -2197,7 +2136,7 @@ def initiate_payment(request):
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error initiating payment for user {user.email}: {str(e)}")
+        logger.error("Error initiating payment for user %s: %s", user.email, e)
         return Response(
             {"status": "error", "message": f"Failed to initiate payment: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -2226,7 +2165,7 @@ def payment_callback(request):
         payment = ApplicationPayment.objects.filter(order_id=order_id).first()
         
         if not payment:
-            logger.warning(f"Payment record not found for order_id: {order_id}")
+            logger.warning("Payment record not found for order_id: %s", order_id)
             # Create a new payment record if not exists
             payment = ApplicationPayment.objects.create(order_id=order_id)
 
@@ -2256,11 +2195,11 @@ def payment_callback(request):
                         application.payment_status = 'P'
                         application.status = 'Completed'
                         application.save()
-                        logger.info(f"Updated application status to Completed for user: {payment.user.email}")
+                        logger.info("Updated application status to Completed for user: %s", payment.user.email)
             except Exception as app_error:
-                logger.error(f"Error updating application status: {str(app_error)}")
+                logger.error("Error updating application status: %s", app_error)
 
-        logger.info(f"Payment callback processed - order_id: {order_id}, status: {payment.payment_status}")
+        logger.info("Payment callback processed - order_id: %s, status: %s", order_id, payment.payment_status)
         
         # Return HTML response showing payment status
         context = {
@@ -2275,7 +2214,7 @@ def payment_callback(request):
         return render(request, 'payment_response.html', context)
 
     except Exception as e:
-        logger.error(f"Error processing payment callback: {str(e)}")
+        logger.error("Error processing payment callback: %s", e)
         return render(request, 'payment_response.html', {
             'status': 'error',
             'message': f'Failed to process payment: {str(e)}'
@@ -2302,26 +2241,26 @@ def verify_payment(request):
         application_id = request.data.get('application_id')
 
         if not order_id or not application_id:
-            logger.error(f"Missing order_id or application_id for user {user.email}")
+            logger.error("Missing order_id or application_id for user %s", user.email)
             return Response(
                 {"status": "error", "message": "Order ID and Application ID are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        logger.info(f"Verifying payment - order_id: {order_id}, application_id: {application_id}")
+        logger.info("Verifying payment - order_id: %s, application_id: %s", order_id, application_id)
 
         payment = ApplicationPayment.objects.filter(
             user=user, order_id=order_id, application_id=application_id
         ).first()
         if not payment:
-            logger.error(f"No payment found for order_id: {order_id}")
+            logger.error("No payment found for order_id: %s", order_id)
             return Response(
                 {"status": "error", "message": "Payment record not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        logger.info(f"Payment verification requested for order_id: {order_id}, application_id: {application_id}")
-        logger.info(f"Current payment status: {payment.payment_status}")
+        logger.info("Payment verification requested for order_id: %s, application_id: %s", order_id, application_id)
+        logger.info("Current payment status: %s", payment.payment_status)
 
         # If already successful via callback, return immediately
         if payment.payment_status == 'TXN_SUCCESS':
@@ -2364,9 +2303,10 @@ def verify_payment(request):
             if 'merchant-status' in (status_url or '').lower():
                 status_url = 'https://securegw.paytm.in/v3/order/status' if getattr(settings, 'PAYTM_ENVIRONMENT', 'PROD') == 'PROD' else 'https://securegw-stage.paytm.in/v3/order/status'
 
-            logger.info(f"Querying Paytm status at {status_url} for order_id={order_id}")
-            resp = requests.post(status_url, json=payload, headers=headers, timeout=12)
-            logger.info(f"Paytm status HTTP {resp.status_code}: {resp.text[:500]}")
+            logger.info("Querying Paytm status at %s for order_id=%s", status_url, order_id)
+            with track_outbound('paytm'):
+                resp = requests.post(status_url, json=payload, headers=headers, timeout=12)
+            logger.info("Paytm status HTTP %s: %s", resp.status_code, resp.text[:500])
 
             resp_json = resp.json() if resp.content else {}
             body = resp_json.get('body', {})
@@ -2396,7 +2336,7 @@ def verify_payment(request):
                         application.status = 'Completed'
                         application.save()
                 except Exception as app_err:
-                    logger.warning(f"Failed to update application state post success: {app_err}")
+                    logger.warning("Failed to update application state post success: %s", app_err)
 
                 return Response({
                     "status": "success",
@@ -2435,9 +2375,10 @@ def verify_payment(request):
                         params['CHECKSUMHASH'] = legacy_checksum
                     except Exception as _:
                         pass
-                    logger.info(f"Fallback querying legacy Paytm status at {legacy_url} with params {list(params.keys())}")
-                    legacy_resp = requests.get(legacy_url, params=params, timeout=12)
-                    logger.info(f"Legacy Paytm status HTTP {legacy_resp.status_code}: {legacy_resp.text[:500]}")
+                    logger.info("Fallback querying legacy Paytm status at %s with params %s", legacy_url, list(params.keys()))
+                    with track_outbound('paytm'):
+                        legacy_resp = requests.get(legacy_url, params=params, timeout=12)
+                    logger.info("Legacy Paytm status HTTP %s: %s", legacy_resp.status_code, legacy_resp.text[:500])
                     legacy_json = legacy_resp.json() if legacy_resp.content else {}
                     legacy_status = legacy_json.get('STATUS')
                     if legacy_status == 'TXN_SUCCESS':
@@ -2458,7 +2399,7 @@ def verify_payment(request):
                                 application.status = 'Completed'
                                 application.save()
                         except Exception as app_err:
-                            logger.warning(f"Failed to update application state post success (legacy): {app_err}")
+                            logger.warning("Failed to update application state post success (legacy): %s", app_err)
                         return Response({
                             "status": "success",
                             "data": {
@@ -2481,7 +2422,7 @@ def verify_payment(request):
                             "data": {"payment_status": payment.payment_status, "order_id": order_id}
                         }, status=status.HTTP_200_OK)
                 except Exception as legacy_err:
-                    logger.error(f"Legacy Paytm status fallback failed: {legacy_err}")
+                    logger.error("Legacy Paytm status fallback failed: %s", legacy_err)
 
             # Failures or unexpected responses (final)
             payment.payment_status = 'TXN_FAILURE' if result_status else payment.payment_status
@@ -2498,7 +2439,7 @@ def verify_payment(request):
             }, status=status.HTTP_200_OK)
 
         except Exception as paytm_err:
-            logger.error(f"Error querying Paytm status for order {order_id}: {paytm_err}")
+            logger.error("Error querying Paytm status for order %s: %s", order_id, paytm_err)
             # Fall back to local status without changing it
             if payment.payment_status in ['CREATED', 'PENDING', 'PENDING_VERIFICATION']:
                 return Response({
@@ -2520,13 +2461,26 @@ def verify_payment(request):
             }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Unexpected error in verify_payment: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in verify_payment: %s", e, exc_info=True)
         return Response(
             {"status": "error", "message": f"Internal server error: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+def _download_application_etag(request):
+    user = request.user
+    return rows_token(
+        user.pk,
+        media_signature_epoch(),  # the response embeds signed media URLs
+        Application.objects.filter(user=user, status__in=['In Progress', 'Completed']),
+        Student.objects.filter(email=user.email),
+        StudentDetails.objects.filter(user=user),
+        Payment.objects.filter(user=user),
+        ApplicationPayment.objects.filter(user=user),
+    )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(etag_func=_download_application_etag)
 def download_application(request):
     """
     Returns complete application data as JSON for client-side PDF generation.
@@ -2536,7 +2490,7 @@ def download_application(request):
         user = request.user
         application = Application.objects.filter(user=user, status__in=['In Progress', 'Completed']).first()
         if not application:
-            logger.warning(f"No application found for user: {user.email}")
+            logger.warning("No application found for user: %s", user.email)
             return Response(
                 {"status": "error", "message": "No application found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -2563,7 +2517,7 @@ def download_application(request):
                 if len(parts) >= 3:
                     lsc_code = parts[2]  # LSC code is the 3rd part
             except Exception as e:
-                logger.warning(f"Could not extract LSC code from application_id: {e}")
+                logger.warning("Could not extract LSC code from application_id: %s", e)
         
         # Prepare complete application data
         # Resolve photo_url: prefer StudentDetails.photo_url, fall back to Application.photo_url if present
@@ -2587,8 +2541,8 @@ def download_application(request):
             'application_id': application.application_id or '',
             'enrollment_no': application.enrollment_no if hasattr(application, 'enrollment_no') else '',
             'applied_date': application.created_at.strftime('%d-%m-%Y') if hasattr(application, 'created_at') else '',
-            'photo_url': resolved_photo_url,
-            'signature_url': resolved_signature_url,
+            'photo_url': sign_media_url(resolved_photo_url),
+            'signature_url': sign_media_url(resolved_signature_url),
             
             # Page 1 - Programme Details
             'programme_applied': application.programme_applied or '',
@@ -2707,14 +2661,14 @@ def download_application(request):
             'university_address': 'Salem, Tamil Nadu, India',
         }
 
-        logger.info(f"Returning complete application data for user {user.email}")
+        logger.info("Returning complete application data for user %s", user.email)
         return Response({
             "status": "success",
             "data": application_data
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error fetching application data for user {user.email}: {str(e)}")
+        logger.error("Error fetching application data for user %s: %s", user.email, e)
         import traceback
         logger.error(traceback.format_exc())
         return Response(
@@ -2735,7 +2689,7 @@ def download_receipt(request):
         application = Application.objects.filter(user=user, payment_status='P').first()
         
         if not application:
-            logger.warning(f"No paid application found for user: {user.email}")
+            logger.warning("No paid application found for user: %s", user.email)
             return Response(
                 {"status": "error", "message": "No payment receipt found. Please complete payment first."},
                 status=status.HTTP_404_NOT_FOUND
@@ -2761,9 +2715,9 @@ def download_receipt(request):
         
         # Log the fee payment details for debugging
         if fee_payment:
-            logger.info(f"Found fee_payment for {user.email}: TXN={fee_payment.transaction_id}, Bank TXN={fee_payment.bank_transaction_id}, Order={fee_payment.order_id}")
+            logger.info("Found fee_payment for %s: TXN=%s, Bank TXN=%s, Order=%s", user.email, fee_payment.transaction_id, fee_payment.bank_transaction_id, fee_payment.order_id)
         else:
-            logger.warning(f"No fee_payment record found for {user.email} with application_id={application.application_id}")
+            logger.warning("No fee_payment record found for %s with application_id=%s", user.email, application.application_id)
         
         # Extract LSC code from application_id if student doesn't have it
         lsc_code = student.lsc_code if student and student.lsc_code else ''
@@ -2776,7 +2730,7 @@ def download_receipt(request):
                 if len(parts) >= 3:
                     lsc_code = parts[2]  # LSC code is the 3rd part
             except Exception as e:
-                logger.warning(f"Could not extract LSC code from application_id: {e}")
+                logger.warning("Could not extract LSC code from application_id: %s", e)
         
         # Prepare receipt data
         receipt_data = {
@@ -2813,10 +2767,10 @@ def download_receipt(request):
         }
 
         # Log the complete receipt data being returned
-        logger.info(f"Returning receipt data for user {user.email}, Application ID: {application.application_id}")
-        logger.info(f"Receipt data transaction_id: {receipt_data.get('transaction_id')}")
-        logger.info(f"Receipt data bank_transaction_id: {receipt_data.get('bank_transaction_id')}")
-        logger.info(f"Receipt data order_id: {receipt_data.get('order_id')}")
+        logger.info("Returning receipt data for user %s, Application ID: %s", user.email, application.application_id)
+        logger.info("Receipt data transaction_id: %s", receipt_data.get('transaction_id'))
+        logger.info("Receipt data bank_transaction_id: %s", receipt_data.get('bank_transaction_id'))
+        logger.info("Receipt data order_id: %s", receipt_data.get('order_id'))
         
         return Response({
             "status": "success",
@@ -2824,7 +2778,7 @@ def download_receipt(request):
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error fetching receipt data for user {user.email}: {str(e)}")
+        logger.error("Error fetching receipt data for user %s: %s", user.email, e)
         import traceback
         logger.error(traceback.format_exc())
         return Response(
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BackendConfig(AppConfig):
+    name = 'backend'
+    verbose_name = 'Project infrastructure'
+
+    def ready(self):
+        # Register project-wide system checks
+        from . import checks  # noqa: F401
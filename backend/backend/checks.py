@@ -0,0 +1,115 @@
+"""
+Project-wide system checks.
+
+backend.W001 - a hardcoded Model.objects.using('alias') call disagrees with the
+DATABASE_APP_ROUTES / DATABASE_MODEL_ROUTES registry used by the router.
+"""
+import ast
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.checks import Warning, register
+from django.db import DEFAULT_DB_ALIAS
+
+from .db_router import resolve_alias
+
+
+def _project_app_configs():
+    base_dir = str(settings.BASE_DIR)
+    for app_config in apps.get_app_configs():
+        if os.path.abspath(app_config.path).startswith(base_dir):
+            yield app_config
+
+
+def _iter_source_files(app_config):
+    for root, dirs, files in os.walk(app_config.path):
+        dirs[:] = [d for d in dirs if d not in ('migrations', '__pycache__')]
+        for name in files:
+            if name.endswith('.py'):
+                yield os.path.join(root, name)
+
+
+def _imported_models(tree, app_config):
+    """Map local names to (app_label, model_name) using the file's imports."""
+    names = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        if node.level:
+            # Relative import from inside the app (from .models import X)
+            module = app_config.name
+            if node.module:
+                module = f'{module}.{node.module}'
+        else:
+            module = node.module or ''
+        containing = apps.get_containing_app_config(module)
+        if containing is None:
+            continue
+        for alias in node.names:
+            names.setdefault(alias.asname or alias.name, (containing.label, alias.name))
+    return names
+
+
+def _model_name_for_using(call):
+    """Return the Name in `Name.objects[...].using(...)`, if any."""
+    node = call.func.value
+    while True:
+        if isinstance(node, ast.Attribute):
+            if node.attr == 'objects' and isinstance(node.value, ast.Name):
+                return node.value.id
+            node = node.value
+        elif isinstance(node, ast.Call):
+            node = node.func
+        else:
+            return None
+
+
+def find_using_mismatches(source, app_config, filename='<string>'):
+    """Yield (lineno, model label, used alias, registry alias) for bad .using() calls."""
+    tree = ast.parse(source, filename=filename)
+    imported = _imported_models(tree, app_config)
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'using'
+                and node.args
+                and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str)):
+            continue
+        name = _model_name_for_using(node)
+        if name not in imported:
+            continue
+        app_label, model_name = imported[name]
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            continue
+        used = node.args[0].value
+        expected = resolve_alias(model._meta.app_label, model._meta.object_name) or DEFAULT_DB_ALIAS
+        if used != expected:
+            yield node.lineno, model._meta.label, used, expected
+
+
+@register('routing')
+def check_using_matches_registry(app_configs=None, **kwargs):
+    errors = []
+    for app_config in _project_app_configs():
+        if app_configs is not None and app_config not in app_configs:
+            continue
+        for path in _iter_source_files(app_config):
+            with open(path, encoding='utf-8') as f:
+                source = f.read()
+            try:
+                mismatches = list(find_using_mismatches(source, app_config, path))
+            except SyntaxError:
+                continue
+            for lineno, label, used, expected in mismatches:
+                errors.append(Warning(
+                    f"{label}.objects.using('{used}') but the database registry routes "
+                    f"{label} to '{expected}'.",
+                    hint="Drop the .using() call or update DATABASE_MODEL_ROUTES.",
+                    obj=f"{os.path.relpath(path, settings.BASE_DIR)}:{lineno}",
+                    id='backend.W001',
+                ))
+    return errors
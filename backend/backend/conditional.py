@@ -0,0 +1,124 @@
+"""
+Conditional GET (ETag / Last-Modified) for read-mostly endpoints.
+
+Views opt in with @conditional_get(etag_func, last_modified_func). The
+functions receive the view's arguments and return a cheap version token (a
+hash of row pks and updated_at, a max(updated_at), a catalog version) computed before the
+view serializes anything. A matching If-None-Match / If-Modified-Since gets a
+304 without running the view. For DRF function views put the decorator below
+@api_view so the request is already authenticated:
+
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @conditional_get(etag_func=preview_etag)
+    def get_application_preview(request): ...
+
+Per-endpoint request and 304 counts are kept in-process for metrics.
+"""
+import hashlib
+import json
+import logging
+import threading
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(endpoint, not_modified):
+    with _stats_lock:
+        entry = _stats.setdefault(endpoint, {'requests': 0, 'not_modified': 0})
+        entry['requests'] += 1
+        if not_modified:
+            entry['not_modified'] += 1
+
+
+def get_conditional_stats():
+    """{endpoint: {'requests', 'not_modified', 'not_modified_ratio'}}"""
+    with _stats_lock:
+        return {
+            endpoint: dict(entry, not_modified_ratio=(
+                entry['not_modified'] / entry['requests'] if entry['requests'] else 0.0
+            ))
+            for endpoint, entry in _stats.items()
+        }
+
+
+VERSION_FIELDS = ('updated_at', 'version')
+
+
+def _row_versions(queryset):
+    """
+    pk plus the model's version columns (updated_at / version), so the token
+    never reads wide text or JSON columns. Models without one fall back to
+    every column.
+    """
+    if queryset._fields:  # already .values() / .values_list()
+        return list(queryset)
+    names = {field.name for field in queryset.model._meta.concrete_fields}
+    versions = [name for name in VERSION_FIELDS if name in names]
+    if not versions:
+        return list(queryset.values())
+    return list(queryset.order_by('pk').values_list('pk', *versions))
+
+
+def rows_token(*parts):
+    """
+    Hash of the given values, for use as an ETag. Querysets are reduced to
+    their row versions (_row_versions), so no model instances or serializers
+    are involved.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if hasattr(part, 'values') and hasattr(part, 'query'):
+            part = _row_versions(part)
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def conditional_get(etag_func=None, last_modified_func=None, name=None):
+    def decorator(view_func):
+        endpoint = name or view_func.__name__
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or not getattr(settings, 'CONDITIONAL_GET_ENABLED', True)):
+                return view_func(request, *args, **kwargs)
+
+            try:
+                etag = etag_func(request, *args, **kwargs) if etag_func else None
+                last_modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+            except Exception as e:
+                # A failing version check must never break the endpoint itself
+                logger.warning(f"Conditional GET version check failed for {endpoint}: {str(e)}")
+                return view_func(request, *args, **kwargs)
+
+            etag = quote_etag(etag) if etag else None
+            timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            _record(endpoint, response is not None)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            if etag and not response.has_header('ETag'):
+                response['ETag'] = etag
+            if timestamp and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(timestamp)
+            # Let browsers keep the body but revalidate on every use
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+            return response
+
+        return wrapper
+    return decorator
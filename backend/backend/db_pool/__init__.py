@@ -0,0 +1,12 @@
+"""
+Pooled MySQL database backend.
+
+Use ENGINE = 'backend.db_pool' in DATABASES to hand closed connections back to
+an in-process pool instead of dropping them. Each alias gets its own pool,
+sized by the alias' POOL setting:
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'RECYCLE': 3600}
+"""
+from .pool import ConnectionPool, get_pool, get_pool_stats
+
+__all__ = ['ConnectionPool', 'get_pool', 'get_pool_stats']
@@ -0,0 +1,29 @@
+"""
+MySQL DatabaseWrapper that borrows connections from ConnectionPool.
+
+Django still opens/closes connections per request (or per CONN_MAX_AGE); the
+only difference is that "open" reuses an idle pooled connection and "close"
+returns it to the pool.
+"""
+from django.db.backends.mysql import base as mysql_base
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL'))
+
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        return self.pool.acquire(lambda: parent(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                if self.errors_occurred and not self.is_usable():
+                    self.pool.discard(self.connection)
+                else:
+                    self.pool.release(self.connection)
@@ -0,0 +1,178 @@
+"""
+In-process connection pool shared by all threads of a worker.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_OPTIONS = {
+    'MAX_SIZE': 10,  # Connections open at once (idle + in use)
+    'TIMEOUT': 5,  # Seconds to wait for a free connection before failing
+    'RECYCLE': 3600,  # Seconds after which a connection is reopened
+}
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded LIFO pool of DB-API connections for one database alias.
+
+    Connections are created lazily by the factory passed to acquire(), pinged
+    before reuse, and discarded once they are older than RECYCLE seconds.
+    """
+
+    def __init__(self, alias, max_size=10, timeout=5, recycle=3600):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = []  # [(connection, created_at)]
+        self._created_at = {}  # id(connection) -> created_at for checked out connections
+        self._size = 0
+        self._condition = threading.Condition()
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'idle': 0,
+        }
+
+    def acquire(self, factory):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                while self._idle:
+                    connection, created_at = self._idle.pop()
+                    self.stats['idle'] = len(self._idle)
+                    if self._is_usable(connection, created_at):
+                        self._checkout(connection, created_at)
+                        self.stats['reused'] += 1
+                        return connection
+                    self._discard(connection)
+
+                if self._size < self.max_size:
+                    # Reserve the slot, then connect outside the lock.
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolExhausted(
+                        f"No free connection for '{self.alias}' within {self.timeout}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self.stats['waits'] += 1
+                self._condition.wait(remaining)
+
+        try:
+            connection = factory()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._checkout(connection, time.monotonic())
+            self.stats['created'] += 1
+        return connection
+
+    def release(self, connection):
+        with self._condition:
+            created_at = self._created_at.pop(id(connection), None)
+            self.stats['in_use'] = len(self._created_at)
+            if created_at is None:
+                # Not ours (e.g. pool was reset) - just close it.
+                self._close(connection)
+                return
+            try:
+                # Never hand a half-finished transaction to the next borrower.
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                self._condition.notify()
+                return
+            self._idle.append((connection, created_at))
+            self.stats['idle'] = len(self._idle)
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Drop a checked out connection that is known to be broken."""
+        with self._condition:
+            if self._created_at.pop(id(connection), None) is not None:
+                self.stats['in_use'] = len(self._created_at)
+                self._discard(connection)
+                self._condition.notify()
+
+    def close_all(self):
+        with self._condition:
+            for connection, _ in self._idle:
+                self._discard(connection)
+            self._idle = []
+            self.stats['idle'] = 0
+
+    def snapshot(self):
+        with self._condition:
+            return dict(self.stats, size=self._size, max_size=self.max_size)
+
+    def _checkout(self, connection, created_at):
+        self._created_at[id(connection)] = created_at
+        self.stats['in_use'] = len(self._created_at)
+
+    def _is_usable(self, connection, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        try:
+            connection.ping()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        self._size -= 1
+        self.stats['discarded'] += 1
+        self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options=None):
+    """Return the pool for ``alias``, creating it from ``options`` on first use."""
+    pool = _pools.get(alias)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            opts = dict(DEFAULT_POOL_OPTIONS, **(options or {}))
+            pool = ConnectionPool(
+                alias,
+                max_size=opts['MAX_SIZE'],
+                timeout=opts['TIMEOUT'],
+                recycle=opts['RECYCLE'],
+            )
+            _pools[alias] = pool
+        return pool
+
+
+def get_pool_stats():
+    """Per-alias pool metrics for this process."""
+    return {alias: pool.snapshot() for alias, pool in list(_pools.items())}
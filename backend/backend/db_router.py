@@ -4,7 +4,95 @@ Routes models to appropriate databases:
 - LSCAdmin -> online_edu database (lsc_admins table)
 - LSCUser -> default database (lsc_portal_db)
 - portal app models -> lsc_admindb database
+
+Routes come from the DATABASE_APP_ROUTES / DATABASE_MODEL_ROUTES registry in
+settings and are resolved once into a model -> alias table.
+
+Reads can be sent to replicas listed in settings.DATABASE_REPLICAS, but only
+inside views that opt in with @replica_reads and only until the same request
+writes to that database (read-your-writes stickiness).
+
+Stickiness lasts for one request only, so opt in only where replica lag is
+acceptable (reports, exports). Pages a user opens right after their own write
+in an earlier request, such as the application and receipt downloads after
+the payment callback, must read the primary. Writes with an explicit alias
+(`.using(alias)`, `save(using=alias)`) bypass db_for_write and do not mark
+the alias as written; a view that writes that way and then reads the same
+data should pin its reads with `.using(alias)` too.
 """
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.functional import cached_property
+
+# Per-request routing state: whether the running view allows replica reads,
+# and which primary aliases it has written to so far.
+_replica_opt_in = ContextVar('replica_opt_in', default=False)
+_written_aliases = ContextVar('written_aliases', default=frozenset())
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_reads(view_func):
+    """
+    Allow replica reads for a view. Only safe methods are affected, and reads
+    go back to the primary once the request writes to it.
+
+    For class based views use method_decorator(replica_reads, name='dispatch').
+    """
+    @wraps(view_func)
+    def wrapped(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view_func(request, *args, **kwargs)
+        token = _replica_opt_in.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_opt_in.reset(token)
+    return wrapped
+
+
+def reset_routing_state():
+    _replica_opt_in.set(False)
+    _written_aliases.set(frozenset())
+
+
+class ReplicaStickinessMiddleware:
+    """Start every request with a clean routing state."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_routing_state()
+        try:
+            return self.get_response(request)
+        finally:
+            reset_routing_state()
+
+
+def resolve_alias(app_label, model_name=None):
+    """
+    Look up the registry: DATABASE_MODEL_ROUTES ('app_label.ModelName') wins
+    over DATABASE_APP_ROUTES (app_label). Returns None for unrouted apps.
+    """
+    if model_name:
+        key = f'{app_label}.{model_name}'.lower()
+        for model_key, alias in getattr(settings, 'DATABASE_MODEL_ROUTES', {}).items():
+            if model_key.lower() == key:
+                return alias
+    return getattr(settings, 'DATABASE_APP_ROUTES', {}).get(app_label)
+
+
+def build_route_table():
+    return {
+        model: resolve_alias(model._meta.app_label, model._meta.object_name)
+        for model in apps.get_models(include_auto_created=True)
+    }
+
 
 class LSCDatabaseRouter:
     """
@@ -13,51 +101,56 @@ class LSCDatabaseRouter:
     - LSCUser -> default database (lsc_portal_db)
     - portal app (ApplicationSettings, etc) -> lsc_admindb database
     """
-    
+
+    @property
+    def replicas(self):
+        return getattr(settings, 'DATABASE_REPLICAS', {})
+
+    def _replica_aliases(self):
+        return {alias for aliases in self.replicas.values() for alias in aliases}
+
     def db_for_read(self, model, **hints):
         """
         Route read operations based on model
         """
-        # Route Student Portal (api app) to online_edu database
-        if model._meta.app_label == 'api':
-            return 'online_edu'
-        
-        # Route portal app models to lsc_admindb
-        if model._meta.app_label == 'portal':
-            return 'lsc_admindb'
-        
-        # Route lsc_auth models
-        if model._meta.app_label == 'lsc_auth':
-            # LSCAdmin goes to online_edu
-            if model.__name__ == 'LSCAdmin':
-                return 'online_edu'
-            # LSCUser goes to default
-            return 'default'
-        
-        return None  # Let Django decide for other apps
-    
+        primary = self.db_for_model(model)
+        if primary is None or not _replica_opt_in.get():
+            return primary
+        if primary in _written_aliases.get():
+            return primary
+        replicas = self.replicas.get(primary)
+        if not replicas:
+            return primary
+        return random.choice(replicas)
+
     def db_for_write(self, model, **hints):
         """
         Route write operations based on model
         """
-        # Route Student Portal (api app) to online_edu database
-        if model._meta.app_label == 'api':
-            return 'online_edu'
-        
-        # Route portal app models to lsc_admindb
-        if model._meta.app_label == 'portal':
-            return 'lsc_admindb'
-        
-        # Route lsc_auth models
-        if model._meta.app_label == 'lsc_auth':
-            # LSCAdmin goes to online_edu
-            if model.__name__ == 'LSCAdmin':
-                return 'online_edu'
-            # LSCUser goes to default
-            return 'default'
-        
-        return None
-    
+        primary = self.db_for_model(model)
+        if primary is not None:
+            written = _written_aliases.get()
+            if primary not in written:
+                _written_aliases.set(written | {primary})
+        return primary
+
+    @cached_property
+    def route_table(self):
+        """Model class -> alias, computed once from the registry."""
+        return build_route_table()
+
+    def db_for_model(self, model):
+        """
+        Primary alias for a model
+        """
+        try:
+            return self.route_table[model]
+        except KeyError:
+            # Models created after startup (e.g. in tests) are resolved once.
+            alias = resolve_alias(model._meta.app_label, model._meta.object_name)
+            self.route_table[model] = alias
+            return alias
+
     def allow_relation(self, obj1, obj2, **hints):
         """
         Allow relations between objects in the same database
@@ -83,22 +176,15 @@ class LSCDatabaseRouter:
         """
         Control which database migrations run on
         """
-        # Route Student Portal (api app) migrations to online_edu database
-        if app_label == 'api':
-            return db == 'online_edu'
-        
-        # Route portal app migrations to lsc_admindb
-        if app_label == 'portal':
-            return db == 'lsc_admindb'
-        
-        # Route lsc_auth migrations
-        if app_label == 'lsc_auth':
-            if model_name == 'lscadmin':
-                # Don't migrate LSCAdmin (it's managed=False and in online_edu)
-                return db == 'online_edu'
-            else:
-                # Migrate LSCUser and others to default database
-                return db == 'default'
+        # Replicas receive schema changes through replication
+        if db in self._replica_aliases():
+            return False
+
+        # Route api, portal and lsc_auth migrations through the registry
+        # (LSCAdmin is managed=False and lives in online_edu)
+        alias = resolve_alias(app_label, model_name)
+        if alias is not None:
+            return db == alias
         
         # Route admissions app to default
         if app_label == 'admissions':
@@ -0,0 +1,330 @@
+"""
+Request performance instrumentation.
+
+PerformanceMiddleware times every request and, through a connection
+execute_wrapper on each database alias, counts queries and query time per
+alias (default, online_edu, lsc_admindb). Outbound calls are timed with
+track_outbound(service): the Drive proxy, the Razorpay gateway, Paytm status
+checks and SMTP (InstrumentedEmailBackend) report under their own service
+names.
+
+Per-endpoint latency histograms and the totals above are aggregated in this
+process and exposed in the Prometheus text format by metrics_view (one
+scrape per worker, staff sessions or a bearer METRICS_TOKEN only). With
+SLOW_REQUEST_MS set, requests slower than that are logged with their
+DB/outbound breakdown and slowest queries. With DEBUG on,
+views that run more queries than their declared query_budget are logged too.
+"""
+import hmac
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+from backend.query_budget import budget_for_view, is_bookkeeping
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+SLOW_QUERY_SAMPLES = 5
+
+_current = ContextVar('request_performance', default=None)
+
+
+class RequestStats:
+    """What one request spent, filled in while it runs."""
+
+    def __init__(self, keep_queries=False):
+        self.db = {}
+        self.statements = {}  # alias -> queries minus transaction bookkeeping
+        self.outbound = {}
+        self.queries = [] if keep_queries else None
+
+    def add_query(self, alias, sql, elapsed):
+        entry = self.db.setdefault(alias, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        if not is_bookkeeping(sql):
+            self.statements[alias] = self.statements.get(alias, 0) + 1
+        if self.queries is not None:
+            self.queries.append((elapsed, alias, sql))
+
+    def add_outbound(self, service, elapsed):
+        entry = self.outbound.setdefault(service, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def slowest_queries(self, limit=SLOW_QUERY_SAMPLES):
+        return sorted(self.queries or [], key=lambda q: q[0], reverse=True)[:limit]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Process-wide aggregates; every update happens under one lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}       # (endpoint, method, status) -> count
+        self.latency = {}        # endpoint -> Histogram
+        self.response_size = {}  # endpoint -> Histogram
+        self.db = {}             # alias -> [queries, seconds]
+        self.outbound = {}       # service -> [calls, seconds]
+
+    def record_request(self, endpoint, method, status, elapsed, size, stats):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            if size is not None:
+                self.response_size.setdefault(endpoint, Histogram(SIZE_BUCKETS)).observe(size)
+            for alias, (count, seconds) in stats.db.items():
+                entry = self.db.setdefault(alias, [0, 0.0])
+                entry[0] += count
+                entry[1] += seconds
+            self._merge_outbound(stats.outbound)
+
+    def record_outbound(self, service, elapsed):
+        """Outbound calls made outside a request (management commands, threads)."""
+        with self._lock:
+            self._merge_outbound({service: [1, elapsed]})
+
+    def _merge_outbound(self, outbound):
+        for service, (count, seconds) in outbound.items():
+            entry = self.outbound.setdefault(service, [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'latency': {k: (h.buckets, list(h.counts), h.count, h.sum) for k, h in self.latency.items()},
+                'response_size': {k: (h.buckets, list(h.counts), h.count, h.sum) for k, h in self.response_size.items()},
+                'db': {k: list(v) for k, v in self.db.items()},
+                'outbound': {k: list(v) for k, v in self.outbound.items()},
+            }
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def track_outbound(service):
+    """Time an outbound call (HTTP, SMTP) under `service`."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - started
+        stats = _current.get()
+        if stats is not None:
+            stats.add_outbound(service, elapsed)
+        else:
+            registry.record_outbound(service, elapsed)
+
+
+def _query_recorder(alias, stats):
+    def wrapper(execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.add_query(alias, sql, time.monotonic() - started)
+    return wrapper
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    if not match.route:
+        return match.view_name or 'unmatched'
+    # Router regexes ("^programs/$") read better without their anchors
+    return '/' + match.route.replace('^', '').replace('$', '')
+
+
+def _response_size(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class PerformanceMiddleware:
+    """Record latency, DB and outbound time for every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PERFORMANCE_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        stats = RequestStats(keep_queries=bool(getattr(settings, 'SLOW_REQUEST_MS', 0)))
+        token = _current.set(stats)
+        started = time.monotonic()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_query_recorder(alias, stats)))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        elapsed = time.monotonic() - started
+        endpoint = _endpoint(request)
+        registry.record_request(
+            endpoint, request.method, response.status_code, elapsed, _response_size(response), stats
+        )
+        self._log_if_slow(request, endpoint, elapsed, stats)
+        if settings.DEBUG:
+            self._log_if_over_budget(request, endpoint, stats)
+        return response
+
+    def _log_if_over_budget(self, request, endpoint, stats):
+        match = getattr(request, 'resolver_match', None)
+        budget = budget_for_view(match.func, request.method) if match else None
+        if not budget:
+            return
+        # Same counting rule as QueryRecorder.counts(), so this log and the
+        # test plugin agree
+        over = [
+            f"{alias} {stats.statements.get(alias, 0)}/{limit}"
+            for alias, limit in budget.items()
+            if stats.statements.get(alias, 0) > limit
+        ]
+        if over:
+            logger.warning("Query budget exceeded by %s %s: %s", request.method, endpoint, ', '.join(over))
+
+    def _log_if_slow(self, request, endpoint, elapsed, stats):
+        threshold = getattr(settings, 'SLOW_REQUEST_MS', 0)
+        if not threshold or elapsed * 1000 < threshold:
+            return
+        db = ', '.join(f"{alias} {count}q/{seconds * 1000:.0f}ms" for alias, (count, seconds) in stats.db.items())
+        outbound = ', '.join(
+            f"{service} {count}x/{seconds * 1000:.0f}ms" for service, (count, seconds) in stats.outbound.items()
+        )
+        top = '; '.join(
+            f"[{alias} {seconds * 1000:.1f}ms] {sql[:200]}" for seconds, alias, sql in stats.slowest_queries()
+        )
+        logger.warning(
+            "Slow request %s %s took %.0fms (db: %s; outbound: %s) top queries: %s",
+            request.method, endpoint, elapsed * 1000, db or 'none', outbound or 'none', top or 'none',
+        )
+
+
+class InstrumentedEmailBackend(EmailBackend):
+    """SMTP backend whose sends are timed as outbound 'smtp' calls."""
+
+    def send_messages(self, email_messages):
+        with track_outbound('smtp'):
+            return super().send_messages(email_messages)
+
+
+# Exposition -----------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histograms, label):
+    lines = []
+    for key, (buckets, counts, count, total) in sorted(histograms.items()):
+        for bound, bucket_count in zip(buckets, counts):
+            lines.append(f"{name}_bucket{_labels(**{label: key, 'le': bound})} {bucket_count}")
+        lines.append(f"{name}_bucket{_labels(**{label: key, 'le': '+Inf'})} {count}")
+        lines.append(f"{name}_count{_labels(**{label: key})} {count}")
+        lines.append(f"{name}_sum{_labels(**{label: key})} {total}")
+    return lines
+
+
+def render_metrics():
+    """Current process metrics in the Prometheus text exposition format."""
+    from backend.conditional import get_conditional_stats
+    from backend.db_pool.pool import get_pool_stats
+
+    snap = registry.snapshot()
+    lines = ['# TYPE http_requests_total counter']
+    for (endpoint, method, status), count in sorted(snap['requests'].items()):
+        lines.append(f"http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+    lines.append('# TYPE http_request_duration_seconds histogram')
+    lines += _histogram_lines('http_request_duration_seconds', snap['latency'], 'endpoint')
+    lines.append('# TYPE http_response_size_bytes histogram')
+    lines += _histogram_lines('http_response_size_bytes', snap['response_size'], 'endpoint')
+
+    lines.append('# TYPE db_queries_total counter')
+    lines += [f"db_queries_total{_labels(alias=alias)} {count}" for alias, (count, _) in sorted(snap['db'].items())]
+    lines.append('# TYPE db_query_seconds_total counter')
+    lines += [f"db_query_seconds_total{_labels(alias=alias)} {seconds}" for alias, (_, seconds) in sorted(snap['db'].items())]
+
+    lines.append('# TYPE outbound_calls_total counter')
+    lines += [f"outbound_calls_total{_labels(service=s)} {count}" for s, (count, _) in sorted(snap['outbound'].items())]
+    lines.append('# TYPE outbound_seconds_total counter')
+    lines += [f"outbound_seconds_total{_labels(service=s)} {seconds}" for s, (_, seconds) in sorted(snap['outbound'].items())]
+
+    lines.append('# TYPE conditional_get_requests_total counter')
+    lines.append('# TYPE conditional_get_not_modified_total counter')
+    for endpoint, entry in sorted(get_conditional_stats().items()):
+        lines.append(f"conditional_get_requests_total{_labels(endpoint=endpoint)} {entry['requests']}")
+        lines.append(f"conditional_get_not_modified_total{_labels(endpoint=endpoint)} {entry['not_modified']}")
+
+    pools = sorted(get_pool_stats().items())
+    lines.append('# TYPE db_pool_connections gauge')
+    for alias, pool in pools:
+        for key in ('size', 'in_use', 'idle', 'max_size'):
+            if key in pool:
+                lines.append(f"db_pool_connections{_labels(alias=alias, state=key)} {pool[key]}")
+    lines.append('# TYPE db_pool_events_total counter')
+    for alias, pool in pools:
+        for key in ('created', 'reused', 'waits', 'timeouts'):
+            if key in pool:
+                lines.append(f"db_pool_events_total{_labels(alias=alias, event=key)} {pool[key]}")
+    return '\n'.join(lines) + '\n'
+
+
+def _has_metrics_token(request):
+    # Behind nginx every request arrives from 127.0.0.1, so the client
+    # address proves nothing; scrapers authenticate with the shared token
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    # Bytes: compare_digest rejects non-ASCII str, and the header is client input
+    return bool(expected) and scheme.lower() == 'bearer' and hmac.compare_digest(
+        token.strip().encode(), expected.encode()
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; staff sessions or a bearer METRICS_TOKEN only."""
+    user = getattr(request, 'user', None)
+    if not getattr(user, 'is_staff', False) and not _has_metrics_token(request):
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,94 @@
+"""
+pytest plugin enforcing query budgets (loaded from pytest.ini with -p).
+
+- budget_client: a DRF APIClient whose requests are recorded and checked
+  against the budget the resolved view declares for that method/action
+  with @query_budget / `query_budget = {...}`, plus the N+1 rule. Any
+  violation fails the test.
+- @pytest.mark.query_budget(lsc_admindb=2, duplicates=3): the whole test
+  body must stay within that budget (duplicates=None disables N+1 checks).
+- query_recorder: a started QueryRecorder for ad-hoc assertions.
+
+Seed enough rows (more than the duplicate threshold) for per-row queries to
+show up as duplicates.
+"""
+import pytest
+from django.urls import resolve
+
+from backend.query_budget import (
+    DEFAULT_DUPLICATE_THRESHOLD,
+    QueryRecorder,
+    budget_for_view,
+    check_budget,
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(duplicates=3, **aliases): fail when the test runs more queries per alias '
+        'than given, or repeats a statement `duplicates` times',
+    )
+
+
+class BudgetClient:
+    """Wraps an APIClient; each request is checked against its view's budget."""
+
+    def __init__(self, client):
+        self._client = client
+        self.last_recording = None
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _checked(self, method, path, *args, **kwargs):
+        budget = budget_for_view(resolve(path.split('?', 1)[0]).func, method)
+        with QueryRecorder() as recorder:
+            response = getattr(self._client, method)(path, *args, **kwargs)
+        self.last_recording = recorder
+        problems = check_budget(recorder, budget or {}, label=f"{method.upper()} {path} ")
+        if problems:
+            pytest.fail('Query budget exceeded:\n' + '\n'.join(problems), pytrace=False)
+        return response
+
+    def get(self, path, *args, **kwargs):
+        return self._checked('get', path, *args, **kwargs)
+
+    def post(self, path, *args, **kwargs):
+        return self._checked('post', path, *args, **kwargs)
+
+    def put(self, path, *args, **kwargs):
+        return self._checked('put', path, *args, **kwargs)
+
+    def patch(self, path, *args, **kwargs):
+        return self._checked('patch', path, *args, **kwargs)
+
+    def delete(self, path, *args, **kwargs):
+        return self._checked('delete', path, *args, **kwargs)
+
+
+@pytest.fixture
+def budget_client():
+    from rest_framework.test import APIClient
+    return BudgetClient(APIClient())
+
+
+@pytest.fixture
+def query_recorder():
+    with QueryRecorder() as recorder:
+        yield recorder
+
+
+@pytest.fixture(autouse=True)
+def _query_budget_marker(request):
+    marker = request.node.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    budget = dict(marker.kwargs)
+    duplicates = budget.pop('duplicates', DEFAULT_DUPLICATE_THRESHOLD)
+    with QueryRecorder() as recorder:
+        yield
+    problems = check_budget(recorder, budget, duplicate_threshold=duplicates)
+    if problems:
+        pytest.fail('Query budget exceeded:\n' + '\n'.join(problems), pytrace=False)
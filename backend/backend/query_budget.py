@@ -0,0 +1,171 @@
+"""
+Query budgets and N+1 detection.
+
+Views declare how many queries they may run per database alias:
+
+    @query_budget(online_edu=2)
+    @api_view(['GET'])
+    def get_courses(request): ...
+
+    class StudentViewSet(viewsets.ModelViewSet):
+        query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+
+A flat {alias: max} budget covers every method; a budget keyed by DRF
+action (viewsets) or lower-case HTTP method (function views) only limits
+the actions it names, so writes are not held to a read budget.
+
+QueryRecorder captures every query (per alias, with SQL and params) while it
+is active; check_budget() compares a recording with a budget and also flags
+the same statement run repeatedly with different parameters, the usual
+signature of a per-row foreign-key fetch. The pytest plugin
+(backend.pytest_plugin) applies declared budgets to test requests, and
+PerformanceMiddleware logs budget overruns when DEBUG is on.
+"""
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.db import connections
+
+# Statements repeated at least this many times with different params count as N+1
+DEFAULT_DUPLICATE_THRESHOLD = 3
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, ?(?:%s|\?))*\)', re.IGNORECASE)
+# Transaction and test-database bookkeeping, not work done by the view
+_IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK', 'BEGIN', 'COMMIT', 'PRAGMA')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(**budget):
+    """
+    Declare the per-alias query budget of a view function or class. Apply it
+    above @api_view so the attribute lands on the view Django resolves.
+    """
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def budget_for_view(func, method='GET'):
+    """Budget of a resolved view callable (function or DRF view) for `method`, or None."""
+    for candidate in (func, getattr(func, 'cls', None), getattr(func, 'view_class', None)):
+        budget = getattr(candidate, 'query_budget', None)
+        if budget is not None:
+            break
+    else:
+        return None
+    if budget and all(isinstance(value, dict) for value in budget.values()):
+        method = method.lower()
+        # Viewset routes map methods to actions ({'get': 'list', 'post': 'create'})
+        action = (getattr(func, 'actions', None) or {}).get(method, method)
+        return budget.get(action)
+    return budget
+
+
+def is_bookkeeping(sql):
+    """Transaction/test-database statements that are not work done by the view."""
+    return sql.lstrip().upper().startswith(_IGNORED_PREFIXES)
+
+
+def normalize_sql(sql):
+    """Statement template: literals and IN-list lengths removed."""
+    sql = _LITERAL_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """Record queries on every alias (or the given ones) while active."""
+
+    def __init__(self, aliases=None):
+        self.aliases = list(aliases) if aliases else list(connections)
+        self.queries = []
+        self._stack = None
+
+    def _wrapper(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.monotonic()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({
+                    'alias': alias,
+                    'sql': sql,
+                    'params': params,
+                    'time': time.monotonic() - started,
+                })
+        return wrapper
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._wrapper(alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def statements(self):
+        """Recorded queries minus transaction bookkeeping."""
+        return [q for q in self.queries if not is_bookkeeping(q['sql'])]
+
+    def counts(self):
+        """{alias: query count}"""
+        return dict(Counter(query['alias'] for query in self.statements()))
+
+    def duplicates(self, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+        """[(alias, template, count)] for statements repeated `threshold`+ times."""
+        groups = defaultdict(int)
+        for query in self.statements():
+            groups[(query['alias'], normalize_sql(query['sql']))] += 1
+        return sorted(
+            ((alias, template, count) for (alias, template), count in groups.items() if count >= threshold),
+            key=lambda item: item[2],
+            reverse=True,
+        )
+
+
+def check_budget(recorder, budget, label='', duplicate_threshold=DEFAULT_DUPLICATE_THRESHOLD):
+    """
+    Return a list of human-readable violations of `budget` ({alias: max})
+    and of the duplicate-query rule. Aliases missing from the budget are
+    not limited; a duplicate_threshold of None disables N+1 detection.
+    """
+    problems = []
+    counts = recorder.counts()
+    for alias, limit in budget.items():
+        used = counts.get(alias, 0)
+        if used > limit:
+            problems.append(f"{label}{alias}: {used} queries, budget {limit}")
+    if duplicate_threshold:
+        for alias, template, count in recorder.duplicates(duplicate_threshold):
+            problems.append(f"{label}{alias}: same statement ran {count} times (N+1?): {template[:300]}")
+    return problems
+
+
+class assert_query_budget(QueryRecorder):
+    """
+    Context manager failing with QueryBudgetExceeded when the block exceeds
+    `budget` or repeats a statement:
+
+        with assert_query_budget(lsc_admindb=2):
+            client.get('/api/students/')
+    """
+
+    def __init__(self, duplicate_threshold=DEFAULT_DUPLICATE_THRESHOLD, **budget):
+        super().__init__()
+        self.budget = budget
+        self.duplicate_threshold = duplicate_threshold
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            problems = check_budget(self, self.budget, duplicate_threshold=self.duplicate_threshold)
+            if problems:
+                raise QueryBudgetExceeded('\n'.join(problems))
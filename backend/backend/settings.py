@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,9 +47,12 @@ INSTALLED_APPS = [
     'admissions',
     # Student Admission Portal Apps
     'api',
+    # Project-wide checks and infrastructure
+    'backend.apps.BackendConfig',
 ]
 
 MIDDLEWARE = [
+    'backend.instrumentation.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.db_router.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -91,11 +96,38 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 #     }
 # }
 
+# Connection management - configure per environment via .env
+#   DB_POOL_ENABLED       use the pooled MySQL engine (backend.db_pool)
+#   DB_POOL_MAX_SIZE      connections per alias per process when pooling
+#   DB_CONN_MAX_AGE       seconds Django keeps a connection per thread
+#                         (defaults to 0 with pooling, since the pool keeps them)
+#   DB_CONN_HEALTH_CHECKS ping persistent connections before reuse
+try:
+    from decouple import config as _db_config
+except ImportError:
+    def _db_config(key, default=None, cast=None):
+        value = os.environ.get(key)
+        if value is None:
+            return default
+        if cast is bool:
+            return value.lower() in ('1', 'true', 'yes', 'on')
+        return cast(value) if cast else value
+
+DB_POOL_ENABLED = _db_config('DB_POOL_ENABLED', default=False, cast=bool)
+DB_ENGINE = 'backend.db_pool' if DB_POOL_ENABLED else 'django.db.backends.mysql'
+DB_CONN_MAX_AGE = _db_config('DB_CONN_MAX_AGE', default=0 if DB_POOL_ENABLED else 60, cast=int)
+DB_CONN_HEALTH_CHECKS = _db_config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL = {
+    'MAX_SIZE': _db_config('DB_POOL_MAX_SIZE', default=10, cast=int),
+    'TIMEOUT': _db_config('DB_POOL_TIMEOUT', default=5, cast=int),
+    'RECYCLE': _db_config('DB_POOL_RECYCLE', default=3600, cast=int),
+}
+
 # MySQL Database Configuration - Triple Database Setup
 DATABASES = {
     # Default database for Django admin, sessions, and LSC users
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': DB_ENGINE,
         'NAME': 'lsc_portal_db',  # LSC Portal database for LSC users
         'USER': 'root',
         'PASSWORD': '',  # Your MySQL password (empty = no password)
@@ -105,10 +137,13 @@ DATABASES = {
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci',
         },
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'POOL': DB_POOL,
     },
     # Secondary database for admin authentication
     'online_edu': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': DB_ENGINE,
         'NAME': 'online_edu',  # Online education database for admins
         'USER': 'root',
         'PASSWORD': '',  # Your MySQL password (empty = no password)
@@ -118,10 +153,13 @@ DATABASES = {
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci',
         },
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'POOL': DB_POOL,
     },
     # Admin database for portal app (ApplicationSettings, etc)
     'lsc_admindb': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': DB_ENGINE,
         'NAME': 'lsc_admindb',  # Admin database for portal models
         'USER': 'root',
         'PASSWORD': '',  # Your MySQL password (empty = no password)
@@ -131,12 +169,43 @@ DATABASES = {
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci',
         },
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        'POOL': DB_POOL,
     }
 }
 
+# Read replicas - set DB_REPLICA_HOST (and DB_REPLICA_PORT) to add a replica
+# alias for each read-heavy database. Only views wrapped with
+# backend.db_router.replica_reads read from them.
+DB_REPLICA_HOST = _db_config('DB_REPLICA_HOST', default='')
+DATABASE_REPLICAS = {}
+if DB_REPLICA_HOST:
+    for _primary in ('online_edu', 'lsc_admindb'):
+        _replica = f'{_primary}_replica'
+        DATABASES[_replica] = dict(
+            DATABASES[_primary],
+            HOST=DB_REPLICA_HOST,
+            PORT=_db_config('DB_REPLICA_PORT', default='3306'),
+            TEST={'MIRROR': _primary},
+        )
+        DATABASE_REPLICAS[_primary] = [_replica]
+
 # Database Router - Routes LSCAdmin to online_edu and LSCUser to default
 DATABASE_ROUTERS = ['backend.db_router.LSCDatabaseRouter']
 
+# Model -> database registry used by the router. App entries cover every
+# model of the app; 'app_label.ModelName' entries override them. Hardcoded
+# .using(...) calls that disagree are reported by `manage.py check`.
+DATABASE_APP_ROUTES = {
+    'api': 'online_edu',  # Student Portal
+    'portal': 'lsc_admindb',  # ApplicationSettings, etc
+    'lsc_auth': 'default',  # LSCUser
+}
+DATABASE_MODEL_ROUTES = {
+    'lsc_auth.LSCAdmin': 'online_edu',  # lsc_admins table
+}
+
 # Temporarily using SQLite to dump data
 # DATABASES = {
 #     'default': {
@@ -204,6 +273,134 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Keyset pagination on the primary key for every list endpoint
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Authentication order per URL namespace (applied in the app's urls.py).
+# Student portal requests carry DRF tokens, so the cached token lookup runs
+# first and JWT parsing is only attempted for Bearer headers.
+AUTHENTICATION_CLASSES_BY_NAMESPACE = {
+    'api': [
+        'api.authentication.CachedTokenAuthentication',
+        'lsc_auth.authentication.LSCJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Seconds a student token -> user snapshot stays cached (0 disables caching)
+STUDENT_TOKEN_CACHE_TTL = 300
+
+# One cache shared by every worker process: token snapshots, the course
+# catalog version and the admission window entries are invalidated for all
+# workers at once. Redis when REDIS_URL is set, otherwise files on this host.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'django_cache')),
+        }
+    }
+
+# Rows per INSERT/UPDATE statement for the portal bulk upload endpoints
+BULK_WRITE_CHUNK_SIZE = 500
+
+# Rows validated and inserted per batch by the student roster import
+STUDENT_IMPORT_BATCH_SIZE = 500
+
+# Seconds the active ApplicationSettings window stays cached (capped at midnight)
+ADMISSION_WINDOW_CACHE_TTL = 300
+
+# Rows each application quota is split across (more shards = less row contention)
+QUOTA_SHARDS = 8
+
+# Upper bound (seconds) on how long a worker serves its course catalog without reloading
+COURSE_CATALOG_TTL = 600
+
+# Answer If-None-Match / If-Modified-Since with 304 on opted-in endpoints
+CONDITIONAL_GET_ENABLED = True
+
+# Optional background clock check for the academic calendar (never blocks requests).
+# Point at a worldtimeapi-style endpoint returning {"datetime": ISO-8601}; empty disables it.
+TIME_SYNC_URL = os.environ.get('TIME_SYNC_URL', '')
+TIME_SYNC_INTERVAL = 3600
+
+# Google Drive preview proxy (api.drive_proxy): on-disk LRU cache of proxied files
+DRIVE_PROXY_CACHE_DIR = os.path.join(BASE_DIR, 'drive_cache')
+DRIVE_PROXY_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DRIVE_PROXY_MAX_FILE_BYTES = 25 * 1024 * 1024   # larger files are streamed but not cached
+DRIVE_PROXY_CACHE_MAX_AGE = 24 * 60 * 60        # revalidate with Drive after this many seconds
+DRIVE_PROXY_CACHE_RESCAN_SECONDS = 5 * 60       # re-measure the shared cache directory at least this often
+
+# Legacy Drive URL migration (manage.py migrate_drive_documents)
+DRIVE_MIGRATION_CHUNK_SIZE = 200
+DRIVE_MIGRATION_WORKERS = 8
+
+# Protected media (api.protected_media): 'python' (FileResponse), 'nginx' (X-Accel-Redirect)
+# or 'sendfile' (X-Sendfile). For nginx, map the prefix to MEDIA_ROOT in an `internal` location.
+PROTECTED_MEDIA_BACKEND = os.environ.get('PROTECTED_MEDIA_BACKEND', 'python')
+PROTECTED_MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Opt-in for the seed_loadtest_data / loadtest_student_flow commands, which
+# write and delete synthetic rows; only set it on a dedicated load-test deployment
+LOADTEST_ENABLED = os.environ.get('LOADTEST_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+# Lifetime of signed media URLs handed to clients (seconds)
+PROTECTED_MEDIA_URL_MAX_AGE = int(os.environ.get('PROTECTED_MEDIA_URL_MAX_AGE', 12 * 60 * 60))
+
+# Student document folders are sharded as student_documents/{hash prefix}/{student}/
+DOCUMENT_SHARD_WIDTH = 2
+
+# Razorpay gateway client (api.payment_gateway). FakeRazorpayGateway keeps everything in memory.
+RAZORPAY_GATEWAY_CLASS = os.environ.get('RAZORPAY_GATEWAY_CLASS', 'api.payment_gateway.RazorpayGateway')
+RAZORPAY_TIMEOUT = 10
+RAZORPAY_CIRCUIT_FAILURES = 5          # consecutive failures before failing fast
+RAZORPAY_CIRCUIT_RESET_SECONDS = 30    # how long to fail fast before a trial call
+
+# Request instrumentation (backend.instrumentation): Prometheus text at /metrics/
+PERFORMANCE_METRICS_ENABLED = True
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; staff sessions need no token. Empty: staff only
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '0'))  # log slower requests with top queries; 0 disables
+
+# Structured logging (backend.structured_logging): JSON lines, PII redacted
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING')
+LOG_REDACT = True
+# Share of DEBUG/INFO records kept per logger, e.g. "api.views=0.1,lsc_auth=0.5"
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(',') if item)
+}
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {'()': 'backend.structured_logging.SamplingFilter'},
+        'redact': {'()': 'backend.structured_logging.RedactingFilter'},
+    },
+    'formatters': {
+        'json': {'()': 'backend.structured_logging.JsonFormatter'},
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+            'filters': ['sample', 'redact'],
+        },
+    },
+    'loggers': {
+        name: {'handlers': ['json_console'], 'level': LOG_LEVEL, 'propagate': False}
+        for name in ('api', 'lsc_auth', 'portal', 'admissions', 'backend')
+    },
 }
 
 # JWT Settings for Secure Authentication
@@ -275,7 +472,7 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # Email Configuration (Student Admission Portal)
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'backend.instrumentation.InstrumentedEmailBackend'  # SMTP, timed as outbound 'smtp'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
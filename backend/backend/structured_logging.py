@@ -0,0 +1,130 @@
+"""
+Structured application logging.
+
+Records are written as one JSON object per line (JsonFormatter). Callers
+pass values as %-style arguments or `extra={...}`, never as f-strings, so
+nothing is formatted unless a handler actually emits the record. Everything
+else here runs on the handler, after the level check:
+
+- SamplingFilter keeps a fraction of DEBUG/INFO records per logger
+  (LOG_SAMPLE_RATES, e.g. "api.views=0.1"). Warnings and errors always pass.
+- RedactingFilter masks PII in the message and in extra fields: emails keep
+  their first character and domain, mobile numbers their last four digits;
+  Aadhaar numbers, auth tokens and values of OTP/password/token/secret/
+  checksum fields are removed.
+
+backend.settings wires both filters and the formatter into LOGGING for the
+api, lsc_auth, portal and backend loggers.
+"""
+import json
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+
+REDACTED = '[REDACTED]'
+SENSITIVE_KEYS = re.compile(r'otp|password|passwd|token|secret|checksum|signature|aadhaar|aadhar', re.IGNORECASE)
+
+_EMAIL_RE = re.compile(r'\b([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b')
+_AADHAAR_RE = re.compile(r'(?<!\d)\d{4}\s?\d{4}\s?\d{4}(?!\d)')
+_MOBILE_RE = re.compile(r'(?<!\d)(?:\+?91[\s-]?)?[6-9]\d{5}(\d{4})(?!\d)')
+_AUTH_RE = re.compile(r'\b(Token|Bearer)\s+[A-Za-z0-9._~+/=-]+', re.IGNORECASE)
+_KEY_VALUE_RE = re.compile(
+    r'(["\']?\b[\w-]*(?:otp|password|passwd|token|secret|checksum)[\w-]*["\']?\s*[:=]\s*)'
+    r'(["\']?)[^\s,"\'})\]]+\2',
+    re.IGNORECASE,
+)
+
+# LogRecord attributes; anything else on a record came from `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact_text(text):
+    """Mask PII in free text."""
+    text = _AUTH_RE.sub(lambda m: f'{m.group(1)} {REDACTED}', text)
+    text = _KEY_VALUE_RE.sub(lambda m: f'{m.group(1)}{REDACTED}', text)
+    text = _EMAIL_RE.sub(r'\1***@\2', text)
+    text = _AADHAAR_RE.sub(REDACTED, text)
+    return _MOBILE_RE.sub(r'******\1', text)
+
+
+def redact_value(key, value):
+    if SENSITIVE_KEYS.search(key):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact_value(str(k), v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_value(key, v) for v in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+_exc_formatter = logging.Formatter()
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class RedactingFilter(logging.Filter):
+    """Format the message once, then mask PII in it and in extra fields."""
+
+    def filter(self, record):
+        if not getattr(settings, 'LOG_REDACT', True):
+            return True
+        record.msg = redact_text(record.getMessage())
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = redact_text(_exc_formatter.formatException(record.exc_info))
+        for key, value in _extra_fields(record).items():
+            setattr(record, key, redact_value(key, value))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep LOG_SAMPLE_RATES[logger] of the records below WARNING (longest prefix wins)."""
+
+    def __init__(self, name=''):
+        super().__init__(name)
+        self._rates = {}
+
+    def _rate(self, logger_name):
+        rate = self._rates.get(logger_name)
+        if rate is None:
+            rates = getattr(settings, 'LOG_SAMPLE_RATES', {})
+            rate, best = 1.0, -1
+            for prefix, value in rates.items():
+                if (logger_name == prefix or logger_name.startswith(prefix + '.')) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._rates[logger_name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, location and extra fields."""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'func': record.funcName,
+            'line': record.lineno,
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry['exc'] = record.exc_text or self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
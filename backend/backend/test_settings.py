@@ -0,0 +1,32 @@
+"""
+Settings for the test suite (pytest.ini): every database alias on its own
+in-memory SQLite database, so tests run without the MySQL servers. Tables
+are created from the models (--nomigrations).
+
+SQLite needs the target table of every foreign key in the same database, so
+the auth tables referenced across aliases (Application.user, ...) are also
+created on online_edu and lsc_admindb; rows are still read from and written
+to `default`.
+"""
+from .db_router import LSCDatabaseRouter
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'test_{alias}.sqlite3',
+    }
+    for alias in ('default', 'online_edu', 'lsc_admindb')
+}
+DATABASE_REPLICAS = {}
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+DATABASE_ROUTERS = ['backend.test_settings.TestDatabaseRouter']
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class TestDatabaseRouter(LSCDatabaseRouter):
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label in ('auth', 'contenttypes'):
+            return True
+        return super().allow_migrate(db, app_label, model_name, **hints)
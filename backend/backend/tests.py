@@ -0,0 +1,412 @@
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+
+from backend import instrumentation
+from backend.instrumentation import Histogram, registry, render_metrics
+
+pytestmark = pytest.mark.django_db(databases='__all__')
+
+SAMPLE_RE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? \S+$')
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 3, 3]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.45)
+
+
+def test_middleware_records_latency_and_queries_per_alias():
+    client = Client()
+    client.get('/api/courses/')
+    client.get('/api/courses/')
+    client.get('/no-such-page/')
+
+    snap = registry.snapshot()
+    assert snap['requests'][('/api/courses/', 'GET', 200)] == 2
+    assert snap['requests'][('unmatched', 'GET', 404)] == 1
+    assert snap['latency']['/api/courses/'][2] == 2
+    assert snap['response_size']['/api/courses/'][2] == 2
+    assert snap['db']['online_edu'][0] >= 2
+
+
+def test_outbound_calls_are_charged_to_the_running_request():
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    def view(request):
+        with instrumentation.track_outbound('drive'):
+            return HttpResponse(b'ok')
+
+    instrumentation.PerformanceMiddleware(view)(RequestFactory().get('/anything/'))
+    with instrumentation.track_outbound('smtp'):
+        pass
+    snap = registry.snapshot()
+    assert snap['requests'] == {('unmatched', 'GET', 200): 1}
+    assert snap['response_size']['unmatched'][3] == 2
+    assert {service: count for service, (count, _) in snap['outbound'].items()} == {'drive': 1, 'smtp': 1}
+
+
+def test_metrics_are_in_the_prometheus_text_format():
+    Client().get('/api/courses/')
+    with instrumentation.track_outbound('smtp'):
+        pass
+
+    text = render_metrics()
+    assert text.endswith('\n')
+    lines = text.splitlines()
+    types = {line.split()[2] for line in lines if line.startswith('# TYPE ')}
+    assert {'http_requests_total', 'http_request_duration_seconds', 'db_queries_total', 'outbound_calls_total'} <= types
+    for line in lines:
+        assert line.startswith('# TYPE ') or SAMPLE_RE.match(line), line
+        if not line.startswith('#'):
+            float(line.rsplit(' ', 1)[1])
+
+    assert 'http_requests_total{endpoint="/api/courses/",method="GET",status="200"} 1' in lines
+    assert 'outbound_calls_total{service="smtp"} 1' in lines
+    buckets = [line for line in lines if line.startswith('http_request_duration_seconds_bucket{endpoint="/api/courses/"')]
+    assert len(buckets) == len(instrumentation.LATENCY_BUCKETS) + 1
+    assert buckets[-1] == 'http_request_duration_seconds_bucket{endpoint="/api/courses/",le="+Inf"} 1'
+    assert 'http_request_duration_seconds_count{endpoint="/api/courses/"} 1' in lines
+
+
+def test_metrics_label_values_are_escaped():
+    assert instrumentation._labels(endpoint='a"b\\c\nd') == '{endpoint="a\\"b\\\\c\\nd"}'
+
+
+def test_metrics_are_not_public_behind_a_local_proxy(settings):
+    settings.METRICS_TOKEN = 'scrape-secret'
+    # Requests proxied by nginx arrive from 127.0.0.1 too
+    client = Client(REMOTE_ADDR='127.0.0.1')
+    assert client.get('/metrics/').status_code == 403
+    assert client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    assert client.get('/metrics/', HTTP_AUTHORIZATION='Token scrape-secret').status_code == 403
+
+    response = client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+
+def test_metrics_need_a_token_to_be_configured(settings):
+    settings.METRICS_TOKEN = ''
+    assert Client().get('/metrics/', HTTP_AUTHORIZATION='Bearer ').status_code == 403
+
+
+def test_metrics_reject_non_ascii_tokens(settings):
+    settings.METRICS_TOKEN = 'scrape-secret'
+    # WSGI hands header values over as latin-1 decoded text
+    assert Client().get('/metrics/', HTTP_AUTHORIZATION='Bearer scrapé-secret').status_code == 403
+
+
+def test_staff_sessions_can_read_metrics(settings):
+    settings.METRICS_TOKEN = ''
+    client = Client()
+    backend = 'django.contrib.auth.backends.ModelBackend'
+    client.force_login(User.objects.create_user('student', password='x'), backend=backend)
+    assert client.get('/metrics/').status_code == 403
+    client.force_login(User.objects.create_user('staff', password='x', is_staff=True), backend=backend)
+    assert client.get('/metrics/').status_code == 200
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('server has gone away')
+
+    def rollback(self):
+        if not self.alive:
+            raise OSError('server has gone away')
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_returned_connections():
+    from backend.db_pool import ConnectionPool
+
+    pool = ConnectionPool('test', max_size=2, timeout=1)
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    assert first.rollbacks == 1  # no transaction leaks to the next borrower
+    assert pool.acquire(FakeConnection) is first
+
+    second = pool.acquire(FakeConnection)
+    assert second is not first
+    assert pool.snapshot() == dict(pool.stats, size=2, max_size=2)
+    assert pool.stats['created'] == 2 and pool.stats['reused'] == 1 and pool.stats['in_use'] == 2
+
+
+def test_pool_replaces_dead_and_expired_connections(monkeypatch):
+    from backend.db_pool import pool as pool_module
+
+    pool = pool_module.ConnectionPool('test', max_size=2, timeout=1, recycle=60)
+    dead = pool.acquire(FakeConnection)
+    pool.release(dead)
+    dead.alive = False
+    replacement = pool.acquire(FakeConnection)
+    assert replacement is not dead and dead.closed
+
+    pool.release(replacement)
+    now = pool_module.time.monotonic()
+    monkeypatch.setattr(pool_module.time, 'monotonic', lambda: now + 120)
+    assert pool.acquire(FakeConnection) is not replacement
+    assert replacement.closed
+    assert pool.stats['discarded'] == 2 and pool.snapshot()['size'] == 1
+
+
+def test_pool_times_out_when_exhausted():
+    from backend.db_pool.pool import ConnectionPool, PoolExhausted
+
+    pool = ConnectionPool('test', max_size=1, timeout=0.05)
+    held = pool.acquire(FakeConnection)
+    with pytest.raises(PoolExhausted, match="'test'"):
+        pool.acquire(FakeConnection)
+    assert pool.stats['timeouts'] == 1 and pool.stats['waits'] >= 1
+
+    pool.release(held)
+    assert pool.acquire(FakeConnection) is held
+
+
+def test_pool_hands_a_released_connection_to_a_waiting_thread():
+    import threading
+    from backend.db_pool import ConnectionPool
+
+    pool = ConnectionPool('test', max_size=1, timeout=5)
+    held = pool.acquire(FakeConnection)
+    borrowed = []
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire(FakeConnection)))
+    waiter.start()
+    while not pool.stats['waits']:
+        threading.Event().wait(0.01)
+    pool.release(held)
+    waiter.join(timeout=5)
+    assert borrowed == [held]
+
+
+def test_pool_frees_the_slot_when_connecting_fails():
+    from backend.db_pool import ConnectionPool
+
+    def refused():
+        raise OSError('connection refused')
+
+    pool = ConnectionPool('test', max_size=1, timeout=0.05)
+    with pytest.raises(OSError):
+        pool.acquire(refused)
+    assert pool.snapshot()['size'] == 0
+    assert isinstance(pool.acquire(FakeConnection), FakeConnection)
+
+
+def test_pool_discards_broken_connections_and_closes_strangers():
+    from backend.db_pool import ConnectionPool
+
+    pool = ConnectionPool('test', max_size=1, timeout=0.05)
+    broken = pool.acquire(FakeConnection)
+    pool.discard(broken)
+    assert broken.closed and pool.snapshot()['size'] == 0
+
+    stranger = FakeConnection()
+    pool.release(stranger)  # e.g. checked out before the pool was reset
+    assert stranger.closed and pool.snapshot()['idle'] == 0
+
+
+def test_one_pool_per_alias_with_default_options(monkeypatch):
+    from backend.db_pool import get_pool, get_pool_stats
+    from backend.db_pool import pool as pool_module
+
+    monkeypatch.setattr(pool_module, '_pools', {})
+    pool = get_pool('online_edu', {'MAX_SIZE': 3})
+    assert get_pool('online_edu', {'MAX_SIZE': 99}) is pool
+    assert (pool.max_size, pool.timeout, pool.recycle) == (3, 5, 3600)
+    assert get_pool_stats() == {'online_edu': pool.snapshot()}
+
+
+@pytest.fixture
+def replica_router(settings):
+    from backend.db_router import LSCDatabaseRouter, reset_routing_state
+
+    settings.DATABASE_REPLICAS = {'online_edu': ['online_edu_replica'], 'lsc_admindb': ['lsc_admindb_replica']}
+    reset_routing_state()
+    yield LSCDatabaseRouter()
+    reset_routing_state()
+
+
+def _routed_view(router, *writes):
+    from api.models import Application
+    from portal.models import Student
+    from backend.db_router import replica_reads
+
+    @replica_reads
+    def view(request):
+        routes = [router.db_for_read(Application), router.db_for_read(Student)]
+        for model in writes:
+            router.db_for_write(model)
+        return routes + [router.db_for_read(Application), router.db_for_read(Student)]
+    return view
+
+
+def test_reads_use_replicas_only_inside_opted_in_safe_requests(replica_router, rf):
+    from api.models import Application
+
+    assert replica_router.db_for_read(Application) == 'online_edu'
+    assert _routed_view(replica_router)(rf.get('/')) == [
+        'online_edu_replica', 'lsc_admindb_replica', 'online_edu_replica', 'lsc_admindb_replica',
+    ]
+    assert _routed_view(replica_router)(rf.post('/')) == ['online_edu', 'lsc_admindb'] * 2
+    # The opt-in ends with the view
+    assert replica_router.db_for_read(Application) == 'online_edu'
+
+
+def test_reads_stick_to_the_primary_after_a_write(replica_router, rf):
+    from api.models import Application
+    from backend.db_router import _written_aliases
+
+    # Writing to online_edu pins its reads; lsc_admindb keeps using its replica
+    assert _routed_view(replica_router, Application)(rf.get('/')) == [
+        'online_edu_replica', 'lsc_admindb_replica', 'online_edu', 'lsc_admindb_replica',
+    ]
+    assert _written_aliases.get() == {'online_edu'}
+
+
+def test_routing_state_is_reset_around_every_request(replica_router, rf):
+    from backend.db_router import ReplicaStickinessMiddleware, _replica_opt_in, _written_aliases
+
+    # Left over from an earlier request on this thread
+    _replica_opt_in.set(True)
+    _written_aliases.set(frozenset({'online_edu'}))
+    seen = []
+
+    def get_response(request):
+        seen.append((_replica_opt_in.get(), _written_aliases.get()))
+        _written_aliases.set(frozenset({'lsc_admindb'}))
+        raise RuntimeError('view failed')
+
+    with pytest.raises(RuntimeError):
+        ReplicaStickinessMiddleware(get_response)(rf.get('/'))
+    assert seen == [(False, frozenset())]
+    assert (_replica_opt_in.get(), _written_aliases.get()) == (False, frozenset())
+
+
+def test_routing_state_is_per_thread(replica_router, rf):
+    import threading
+    from api.models import Application
+
+    inside = threading.Event()
+    release = threading.Event()
+
+    def other_request():
+        replica_router.db_for_write(Application)
+        inside.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=other_request)
+    worker.start()
+    inside.wait(5)
+    # A write on another thread does not pin this request to the primary
+    routes = _routed_view(replica_router)(rf.get('/'))
+    release.set()
+    worker.join(5)
+    assert routes[2] == 'online_edu_replica'
+
+
+def test_replicas_never_receive_migrations(replica_router):
+    assert replica_router.allow_migrate('online_edu_replica', 'api', 'application') is False
+    assert replica_router.allow_migrate('online_edu', 'api', 'application') is True
+    assert replica_router.allow_migrate('lsc_admindb', 'api', 'application') is False
+
+
+@pytest.mark.parametrize('path,opted_in', [
+    ('/api/download-application/', False),
+    ('/api/download-receipt/', False),
+    ('/api/reports/summary/', True),
+])
+def test_only_reports_read_from_replicas(monkeypatch, path, opted_in):
+    from rest_framework.test import APIClient
+    from backend.db_router import LSCDatabaseRouter, _replica_opt_in
+
+    seen = set()
+    db_for_read = LSCDatabaseRouter.db_for_read
+
+    def spy(self, model, **hints):
+        seen.add(_replica_opt_in.get())
+        return db_for_read(self, model, **hints)
+
+    monkeypatch.setattr(LSCDatabaseRouter, 'db_for_read', spy)
+    client = APIClient()
+    # Downloads follow the payment callback's write in an earlier request
+    client.force_authenticate(User.objects.create_user('paid@example.com', email='paid@example.com'))
+    client.get(path)
+    assert seen == {opted_in}
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('OTP sent to jane.doe@example.com', 'OTP sent to j***@example.com'),
+    ('call +91 9876543210 or 9123456789', 'call ******3210 or ******6789'),
+    ('aadhaar 1234 5678 9012 on file', 'aadhaar [REDACTED] on file'),
+    ('Authorization: Token 0123abcd, Bearer x.y.z', 'Authorization: Token [REDACTED], Bearer [REDACTED]'),
+    ('otp=123456, password: "hunter2", {"checksum": "ABC"}', 'otp=[REDACTED], password: [REDACTED], {"checksum": [REDACTED]}'),
+    ('Invalid OTP for a@b.com (pending OTP: True)', 'Invalid OTP for a***@b.com (pending OTP: [REDACTED])'),
+    ('fields [secret=abc]', 'fields [secret=[REDACTED]]'),
+    ('Course 2025-26 has 120 seats', 'Course 2025-26 has 120 seats'),
+])
+def test_redact_text(text, expected):
+    from backend.structured_logging import redact_text
+    assert redact_text(text) == expected
+
+
+def _record(name='api.views', level=20, msg='%s', args=('x',), **extra):
+    import logging
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_redacting_filter_masks_the_message_and_extra_fields():
+    from backend.structured_logging import REDACTED, RedactingFilter
+
+    record = _record(msg='Login for %s', args=('sam@example.com',), email='sam@example.com', otp='482913', payload={
+        'mobile': '9876543210', 'auth_token': 'abc', 'documents': [{'signature_url': '/media/x.png'}],
+    })
+    assert RedactingFilter().filter(record)
+    assert (record.msg, record.args) == ('Login for s***@example.com', None)
+    assert record.email == 's***@example.com' and record.otp == REDACTED
+    assert record.payload == {'mobile': '******3210', 'auth_token': REDACTED, 'documents': [{'signature_url': REDACTED}]}
+
+
+def test_redaction_can_be_switched_off(settings):
+    from backend.structured_logging import RedactingFilter
+
+    settings.LOG_REDACT = False
+    record = _record(msg='Login for %s', args=('sam@example.com',))
+    assert RedactingFilter().filter(record)
+    assert record.getMessage() == 'Login for sam@example.com'
+
+
+def test_sampling_uses_the_longest_prefix_and_keeps_warnings(settings):
+    import logging
+    from backend.structured_logging import SamplingFilter
+
+    settings.LOG_SAMPLE_RATES = {'api': 0.0, 'api.views': 1.0}
+    sampler = SamplingFilter()
+    assert sampler.filter(_record('api.views.payments'))
+    assert not sampler.filter(_record('api.utils'))
+    assert not sampler.filter(_record('api', level=logging.DEBUG))
+    assert sampler.filter(_record('api.utils', level=logging.WARNING))
+    assert sampler.filter(_record('apiclient'))  # not under the "api" logger
@@ -3,11 +3,13 @@ Unified URL configuration combining CDOE LSC Portal and Student Admission Portal
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from api.authentication import apply_namespace_authentication
+from api.protected_media import protected_media_urlpatterns
+from backend.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus scrape endpoint
     
     # CDOE LSC Portal URLs
     path('api/auth/', include('lsc_auth.urls', namespace='lsc_auth')),  # LSC authentication
@@ -22,6 +24,5 @@ urlpatterns = [
     path('api/', include('portal.urls')),  # LSC portal management endpoints
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Student documents: authorized in Django, bytes sent by the front proxy when configured
+urlpatterns += apply_namespace_authentication(protected_media_urlpatterns(), 'api')
@@ -0,0 +1,31 @@
+"""
+Shared test fixtures.
+
+Application, Payment, ... live on online_edu but keep a foreign key to
+auth_user on `default`. Each test database is a separate SQLite file that
+checks foreign keys when a test ends, so users saved during a test are
+mirrored into the auth_user table of the other aliases (see
+backend.test_settings.TestDatabaseRouter).
+"""
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+
+MIRROR_ALIASES = [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def _mirror_user(sender, instance, raw=False, using='default', **kwargs):
+    if using != 'default':
+        return
+    for alias in MIRROR_ALIASES:
+        instance.save_base(using=alias, raw=True)
+    # save_base() moved the instance to the last alias
+    instance._state.db = using
+
+
+@pytest.fixture(autouse=True)
+def _mirrored_users():
+    post_save.connect(_mirror_user, sender=User, dispatch_uid='test_mirror_user')
+    yield
+    post_save.disconnect(sender=User, dispatch_uid='test_mirror_user')
@@ -4,6 +4,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 import json
+import logging
 from .models import LSCUser, LSCAdmin
 from django.core.exceptions import ValidationError
 import re
@@ -16,6 +17,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
+logger = logging.getLogger(__name__)
+
 class LSCUserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
     
@@ -163,10 +166,7 @@ class LSCLoginView(APIView):
                 refresh['database'] = 'online_edu'
                 refresh['iss'] = 'lsc-portal'  # Issuer claim
                 
-                # Log successful login (optional - add logging)
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"Admin login successful: {user.lsc_code} - {user.admin_name}")
+                logger.info("Admin login successful: %s - %s", user.lsc_code, user.admin_name)
                 
                 return Response({
                     'refresh': str(refresh),
@@ -200,10 +200,7 @@ class LSCLoginView(APIView):
                 refresh['database'] = 'default'
                 refresh['iss'] = 'lsc-portal'  # Issuer claim
                 
-                # Log successful login (optional)
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"User login successful: {user.lsc_number} - {user.lsc_name}")
+                logger.info("User login successful: %s - %s", user.lsc_number, user.lsc_name)
                 
                 return Response({
                     'refresh': str(refresh),
@@ -229,10 +226,7 @@ class LSCLoginView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
         except Exception as e:
-            # Log error
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Login error for {lsc_code}: {str(e)}")
+            logger.error("Login error for %s: %s", lsc_code, e)
             
             return Response({
                 'detail': 'Authentication failed. Please try again.'
@@ -301,9 +295,7 @@ class CustomTokenRefreshView(APIView):
                 }, status=status.HTTP_401_UNAUTHORIZED)
                 
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Token refresh error: {str(e)}")
+            logger.error("Token refresh error: %s", e)
             
             return Response({
                 'detail': 'Token refresh failed.'
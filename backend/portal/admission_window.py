@@ -0,0 +1,113 @@
+"""
+Active admission window service for ApplicationSettings.
+
+The currently open setting (optionally per admission type) is cached so the
+payment pages do not scan portal_applicationsettings on every load. Date-driven
+status transitions (SCHEDULED -> OPEN -> EXPIRED) are applied with bulk UPDATEs
+by refresh_statuses(): once per day on the first cache miss, and from cron via
+`manage.py refresh_admission_windows`. ApplicationSettings.save()/delete()
+invalidate the cache.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'admission_window:'
+REFRESHED_ON_KEY = f'{CACHE_PREFIX}refreshed_on'
+ANY_TYPE = 'ANY'
+DEFAULT_TTL = 300
+
+# Cached in place of None so that "nothing is open" is also a cache hit
+_NO_WINDOW = 'none'
+
+
+def _window_key(admission_type):
+    return f'{CACHE_PREFIX}{admission_type or ANY_TYPE}'
+
+
+def _all_window_keys():
+    from .models import ApplicationSettings
+    types = [choice for choice, _ in ApplicationSettings.ADMISSION_TYPE_CHOICES]
+    return [_window_key(t) for t in types + [ANY_TYPE]]
+
+
+def _ttl():
+    """Configured TTL, capped at local midnight when date-based statuses change."""
+    ttl = getattr(settings, 'ADMISSION_WINDOW_CACHE_TTL', DEFAULT_TTL)
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time.min))
+    return max(1, min(ttl, int((midnight - now).total_seconds())))
+
+
+def invalidate_admission_windows():
+    """Drop every cached window; called on any ApplicationSettings write."""
+    from api.academic_calendar import invalidate_academic_year
+    cache.delete_many(_all_window_keys())
+    invalidate_academic_year()
+
+
+def refresh_statuses(today=None):
+    """
+    Apply date-driven transitions with one UPDATE each and return the number
+    of rows changed. Manually forced-open settings (is_open without is_close)
+    are never expired and manually closed ones (is_close without is_open)
+    never opened, matching ApplicationSettings.save(). "Today" is the local
+    date in TIME_ZONE, as the admin enters opening/closing dates.
+    """
+    from .models import ApplicationSettings
+
+    today = today or timezone.localdate()
+    now = timezone.now()
+    opened = ApplicationSettings.objects.filter(
+        status='SCHEDULED',
+        opening_date__lte=today,
+        closing_date__gte=today,
+    ).exclude(
+        Q(is_close=True) & Q(is_open=False)
+    ).update(status='OPEN', updated_at=now)
+
+    expired = ApplicationSettings.objects.filter(
+        status__in=['SCHEDULED', 'OPEN'],
+        closing_date__lt=today,
+    ).exclude(
+        Q(is_open=True) & Q(is_close=False)
+    ).update(status='EXPIRED', updated_at=now)
+
+    cache.set(REFRESHED_ON_KEY, today.isoformat(), timeout=None)
+    if opened or expired:
+        invalidate_admission_windows()
+        logger.info("Admission windows refreshed: %d opened, %d expired", opened, expired)
+    return opened + expired
+
+
+def _refresh_if_stale():
+    today = timezone.localdate()
+    if cache.get(REFRESHED_ON_KEY) != today.isoformat():
+        refresh_statuses(today)
+
+
+def get_active_window(admission_type=None):
+    """
+    Return the active OPEN ApplicationSettings (the newest by the model's
+    ordering), optionally restricted to one admission type, or None.
+    """
+    from .models import ApplicationSettings
+
+    key = _window_key(admission_type)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _NO_WINDOW else cached
+
+    _refresh_if_stale()
+    queryset = ApplicationSettings.objects.filter(is_active=True, status='OPEN')
+    if admission_type:
+        queryset = queryset.filter(admission_type=admission_type)
+    window = queryset.first()
+    cache.set(key, window if window is not None else _NO_WINDOW, timeout=_ttl())
+    return window
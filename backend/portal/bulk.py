@@ -0,0 +1,221 @@
+"""
+Bulk create/update for portal tables.
+
+A batch (JSON array or CSV upload) is validated in one pass: scalar columns go
+through the model field's own clean(), and foreign keys are checked against a
+single IN (...) query per related table rather than one lookup per row. Valid
+rows are then written with bulk_create / bulk_update in chunks inside one
+transaction on the model's write database.
+"""
+import csv
+import io
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class BulkInputError(Exception):
+    """The request body could not be read as a batch of rows."""
+
+
+def read_rows(request, file_field='file'):
+    """
+    Return the batch as a list of dicts, from either an uploaded CSV file
+    (multipart field `file`) or a JSON body that is a list or {"rows": [...]}.
+    """
+    upload = request.FILES.get(file_field)
+    if upload is not None:
+        try:
+            text = io.TextIOWrapper(upload.file, encoding='utf-8-sig')
+            return [
+                {key.strip(): (value.strip() if isinstance(value, str) else value)
+                 for key, value in row.items() if key}
+                for row in csv.DictReader(text)
+            ]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise BulkInputError(f"Could not read CSV file: {e}")
+
+    data = request.data
+    if isinstance(data, dict) and 'rows' in data:
+        data = data['rows']
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise BulkInputError("Expected a JSON array of objects or a CSV file upload")
+    return data
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkWriter:
+    """
+    Validate and upsert rows for one model.
+
+    `fields` are the writable columns (foreign keys by field name, e.g.
+    'student'); `key_field` identifies an existing row to update ('id' or a
+    unique column such as 'reg_no'). Rows whose key is missing or unknown are
+    created, provided `key_field` is not 'id'.
+    """
+
+    def __init__(self, model, fields, key_field='id', chunk_size=None):
+        self.model = model
+        self.fields = list(fields)
+        self.key_field = key_field
+        self.chunk_size = chunk_size or getattr(settings, 'BULK_WRITE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.using = router.db_for_write(model)
+
+    def _field(self, name):
+        return self.model._meta.get_field(name)
+
+    def _existing_foreign_keys(self, rows):
+        """One query per foreign key: the set of referenced ids that exist."""
+        existing = {}
+        for name in self.fields:
+            field = self._field(name)
+            if not field.is_relation:
+                continue
+            ids = set()
+            for row in rows:
+                value = row.get(name)
+                if value in (None, ''):
+                    continue
+                try:
+                    ids.add(field.target_field.to_python(value))
+                except ValidationError:
+                    pass
+            related = field.related_model._default_manager.using(self.using)
+            found = set()
+            for chunk in _chunks(list(ids), self.chunk_size):
+                found.update(related.filter(pk__in=chunk).values_list('pk', flat=True))
+            existing[name] = found
+        return existing
+
+    def _existing_objects(self, rows):
+        keys = {row.get(self.key_field) for row in rows} - {None, ''}
+        key_field = self._field(self.key_field)
+        cleaned = set()
+        for key in keys:
+            try:
+                cleaned.add(key_field.to_python(key))
+            except ValidationError:
+                pass
+        objects = {}
+        manager = self.model._default_manager.using(self.using)
+        for chunk in _chunks(list(cleaned), self.chunk_size):
+            objects.update(manager.in_bulk(chunk, field_name=self.key_field))
+        return objects
+
+    def _clean_value(self, name, value, foreign_keys):
+        field = self._field(name)
+        if field.is_relation:
+            if value in (None, ''):
+                if not field.null:
+                    raise ValidationError("This field is required.")
+                return field.attname, None
+            pk = field.target_field.to_python(value)
+            if pk not in foreign_keys[name]:
+                raise ValidationError(f"{field.related_model.__name__} {value} does not exist.")
+            return field.attname, pk
+        if value == '' and field.null:
+            value = None
+        return field.attname, field.clean(value, None)
+
+    def validate(self, rows):
+        """
+        Return (to_create, to_update, errors). `errors` is a list of
+        {"row": n, "errors": {field: [messages]}} with 1-based row numbers.
+        """
+        foreign_keys = self._existing_foreign_keys(rows)
+        existing = self._existing_objects(rows)
+        key_field = self._field(self.key_field)
+
+        to_create, to_update, errors = [], [], []
+        seen_keys = set()
+        for number, row in enumerate(rows, start=1):
+            row_errors = defaultdict(list)
+
+            key = None
+            raw_key = row.get(self.key_field)
+            if raw_key not in (None, ''):
+                try:
+                    key = key_field.to_python(raw_key)
+                except ValidationError as e:
+                    row_errors[self.key_field].extend(e.messages)
+                else:
+                    if key in seen_keys:
+                        row_errors[self.key_field].append("Duplicate key in this batch.")
+                    seen_keys.add(key)
+
+            instance = existing.get(key) if key is not None else None
+            if instance is None and self.key_field == 'id' and key is not None:
+                row_errors['id'].append(f"{self.model.__name__} {raw_key} does not exist.")
+
+            values = {}
+            for name in self.fields:
+                if name == self.key_field and instance is not None:
+                    continue
+                field = self._field(name)
+                # A missing column (or an empty CSV cell for a column that
+                # cannot be blank) keeps the stored value on update and falls
+                # back to the field default on create.
+                if name not in row or (row[name] == '' and not field.blank and not field.null):
+                    if instance is None and not field.has_default():
+                        row_errors[name].append("This field is required.")
+                    continue
+                try:
+                    attname, value = self._clean_value(name, row[name], foreign_keys)
+                except ValidationError as e:
+                    row_errors[name].extend(e.messages)
+                else:
+                    values[attname] = value
+
+            if row_errors:
+                errors.append({'row': number, 'errors': dict(row_errors)})
+                continue
+
+            if instance is None:
+                if self.key_field != 'id' and key is not None:
+                    values[key_field.attname] = key
+                to_create.append(self.model(**values))
+            else:
+                for attname, value in values.items():
+                    setattr(instance, attname, value)
+                to_update.append(instance)
+        return to_create, to_update, errors
+
+    def save(self, rows, partial=False):
+        """
+        Validate and write `rows`. Unless `partial` is set, any invalid row
+        aborts the whole batch. Returns a summary dict for the response.
+        """
+        to_create, to_update, errors = self.validate(rows)
+        result = {'total': len(rows), 'created': 0, 'updated': 0, 'errors': errors}
+        if errors and not partial:
+            return result
+
+        update_fields = [
+            self._field(name).name for name in self.fields if name != self.key_field
+        ]
+        with transaction.atomic(using=self.using):
+            for chunk in _chunks(to_create, self.chunk_size):
+                self.model._default_manager.using(self.using).bulk_create(chunk)
+            if to_update and update_fields:
+                self.model._default_manager.using(self.using).bulk_update(
+                    to_update, update_fields, batch_size=self.chunk_size
+                )
+
+        result['created'] = len(to_create)
+        result['updated'] = len(to_update)
+        logger.info(
+            f"Bulk write {self.model._meta.label}: {result['created']} created, "
+            f"{result['updated']} updated, {len(errors)} rejected"
+        )
+        return result
@@ -0,0 +1,65 @@
+"""
+Django management command to import an LSC student roster (CSV or XLSX)
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portal.student_import import ImportFileError, StudentImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Import students into the portal from a CSV or XLSX roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .csv or .xlsx file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows validated and inserted per batch (default STUDENT_IMPORT_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'File not found: {path}')
+
+        def progress(result):
+            self.stdout.write(
+                f"  {result['processed']} rows read, {result['created']} created, "
+                f"{result['duplicates']} duplicates, {result['error_count']} rejected"
+            )
+
+        importer = StudentImporter(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        self.stdout.write(f'Importing students from {path}...')
+        try:
+            with open(path, 'rb') as f:
+                result = importer.run(iter_rows(f, path))
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            details = '; '.join(
+                f"{field}: {' '.join(messages)}" for field, messages in error['errors'].items()
+            )
+            self.stdout.write(self.style.WARNING(f"  Row {error['row']}: {details}"))
+        if result['error_count'] > len(result['errors']):
+            self.stdout.write(f"  ... {result['error_count'] - len(result['errors'])} more rejected rows")
+
+        summary = (
+            f"{result['created']} created, {result['duplicates']} duplicates skipped, "
+            f"{result['error_count']} rejected"
+        )
+        if options['dry_run']:
+            summary += ' (dry run, nothing saved)'
+        self.stdout.write(self.style.SUCCESS(f'Import finished: {summary}'))
@@ -0,0 +1,17 @@
+"""
+Django management command to reset application quota counters to the number
+of submitted applications. Run periodically from cron.
+"""
+from django.core.management.base import BaseCommand
+
+from portal.quota import reconcile_quotas
+
+
+class Command(BaseCommand):
+    help = 'Recount submitted applications and reset quota counters'
+
+    def handle(self, *args, **options):
+        drifted = reconcile_quotas()
+        for owner, recorded, actual in drifted:
+            self.stdout.write(f'  {owner}: {recorded} -> {actual}')
+        self.stdout.write(self.style.SUCCESS(f'Quotas reconciled: {len(drifted)} counter(s) corrected'))
@@ -0,0 +1,15 @@
+"""
+Django management command to apply date-based ApplicationSettings status changes
+(SCHEDULED -> OPEN -> EXPIRED). Run daily from cron, shortly after midnight.
+"""
+from django.core.management.base import BaseCommand
+
+from portal.admission_window import refresh_statuses
+
+
+class Command(BaseCommand):
+    help = 'Open scheduled and expire past-deadline application settings'
+
+    def handle(self, *args, **options):
+        changed = refresh_statuses()
+        self.stdout.write(self.style.SUCCESS(f'Admission windows refreshed: {changed} setting(s) updated'))
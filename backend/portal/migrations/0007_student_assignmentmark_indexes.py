@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0006_alter_applicationsettings_admission_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignmentmark',
+            index=models.Index(fields=['p_code', 'status'], name='mark_pcode_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentmark',
+            index=models.Index(fields=['program', 'p_code'], name='mark_program_pcode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['program', 'payment_status'], name='student_prog_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['program', 'admission_status'], name='student_prog_admission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['payment_status', 'admission_status'], name='student_payment_adm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['counsellor', 'created_at'], name='student_counsellor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['name'], name='student_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at'], name='student_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0007_student_assignmentmark_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('application_settings', 'Application Settings'), ('admission_session', 'Admission Session')], max_length=30)),
+                ('owner_id', models.PositiveIntegerField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('capacity', models.PositiveIntegerField(blank=True, help_text='Empty for unlimited', null=True)),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('scope', 'owner_id', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-19 19:05
+
+import re
+
+from django.db import migrations
+
+ACADEMIC_YEAR_RE = re.compile(r'^\s*(\d{4})\s*[-/–]\s*(\d{2}|\d{4})\s*$')
+
+
+def normalize_admission_year(apps, schema_editor):
+    """Rewrite "2025-2026" style admission years to the canonical "2025-26"."""
+    alias = schema_editor.connection.alias
+    ApplicationSettings = apps.get_model('portal', 'ApplicationSettings')
+    for pk, value in ApplicationSettings.objects.using(alias).values_list('pk', 'admission_year').iterator():
+        match = ACADEMIC_YEAR_RE.match(value or '')
+        if match:
+            canonical = f"{match.group(1)}-{match.group(2)[-2:]}"
+            if canonical != value:
+                ApplicationSettings.objects.using(alias).filter(pk=pk).update(admission_year=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0008_quotashard'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_admission_year, migrations.RunPython.noop, elidable=True),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
+from .admission_window import invalidate_admission_windows
+
 User = get_user_model()
 
 class Program(models.Model):
@@ -42,6 +44,18 @@ class Student(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Back the StudentViewSet filters; InnoDB appends the primary key to
+        # each secondary index, which also serves the keyset ORDER BY id.
+        indexes = [
+            models.Index(fields=['program', 'payment_status'], name='student_prog_payment_idx'),
+            models.Index(fields=['program', 'admission_status'], name='student_prog_admission_idx'),
+            models.Index(fields=['payment_status', 'admission_status'], name='student_payment_adm_idx'),
+            models.Index(fields=['counsellor', 'created_at'], name='student_counsellor_date_idx'),
+            models.Index(fields=['name'], name='student_name_idx'),
+            models.Index(fields=['created_at'], name='student_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.application_no} - {self.name}"
 
@@ -69,6 +83,12 @@ class AssignmentMark(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['p_code', 'status'], name='mark_pcode_status_idx'),
+            models.Index(fields=['program', 'p_code'], name='mark_program_pcode_idx'),
+        ]
+
     def __str__(self):
         return f"{self.reg_no} - {self.p_code} - {self.internal_marks}"
 
@@ -164,6 +184,9 @@ class ApplicationSettings(models.Model):
         return f"{self.admission_code} - {self.admission_type} ({'Open' if self.status == 'OPEN' else 'Closed'})"
 
     def save(self, *args, **kwargs):
+        from api.academic_calendar import normalize_academic_year
+        self.admission_year = normalize_academic_year(self.admission_year)
+
         # Auto-update status based on dates and manual overrides
         from datetime import date
         today = date.today()
@@ -196,13 +219,21 @@ class ApplicationSettings(models.Model):
             self.is_close = True
         
         super().save(*args, **kwargs)
-
-    @property
-    def is_currently_open(self):
-        """Check if admission is currently open based on dates and manual flags"""
-        from datetime import date
-        today = date.today()
-        
+        # Drop the cached active window once the write is visible to readers
+        transaction.on_commit(invalidate_admission_windows, using=self._state.db)
+        # Re-split quota shards in case max_applications changed
+        from .quota import sync_capacity
+        transaction.on_commit(lambda: sync_capacity(self), using=self._state.db)
+
+    def delete(self, *args, **kwargs):
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_admission_windows, using=using)
+        return result
+
+    # The *_on(today) variants let callers serializing many rows evaluate the
+    # date once instead of calling date.today() per property per row.
+    def is_open_on(self, today):
         # First check manual override flags
         if self.is_open and not self.is_close:
             return True
@@ -217,16 +248,30 @@ class ApplicationSettings(models.Model):
             self.opening_date <= today <= self.closing_date and
             self.is_active
         )
+
+    def days_remaining_on(self, today):
+        if not self.closing_date:
+            return 0
+        if self.closing_date >= today:
+            return (self.closing_date - today).days
+        return 0
+
+    def is_within_deadline_on(self, today):
+        if self.opening_date and self.closing_date:
+            return self.opening_date <= today <= self.closing_date
+        return self.status == 'OPEN'
+
+    @property
+    def is_currently_open(self):
+        """Check if admission is currently open based on dates and manual flags"""
+        from datetime import date
+        return self.is_open_on(date.today())
     
     @property
     def days_remaining(self):
         """Calculate days remaining until closing"""
         from datetime import date
-        if not self.closing_date:
-            return 0
-        if self.closing_date >= date.today():
-            return (self.closing_date - date.today()).days
-        return 0
+        return self.days_remaining_on(date.today())
     
     @property
     def can_accept_applications(self):
@@ -238,10 +283,32 @@ class ApplicationSettings(models.Model):
     @property
     def is_within_deadline(self):
         from datetime import date
-        today = date.today()
-        if self.opening_date and self.closing_date:
-            return self.opening_date <= today <= self.closing_date
-        return self.status == 'OPEN'
+        return self.is_within_deadline_on(date.today())
+
+
+class QuotaShard(models.Model):
+    """
+    One slice of an application quota (see portal.quota). A quota of
+    max_applications is split across QUOTA_SHARDS rows so concurrent
+    submissions increment different rows instead of queueing on one.
+    """
+    SCOPE_CHOICES = [
+        ('application_settings', 'Application Settings'),
+        ('admission_session', 'Admission Session'),
+    ]
+
+    scope = models.CharField(max_length=30, choices=SCOPE_CHOICES)
+    owner_id = models.PositiveIntegerField()
+    shard = models.PositiveSmallIntegerField()
+    capacity = models.PositiveIntegerField(null=True, blank=True, help_text='Empty for unlimited')
+    used = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['scope', 'owner_id', 'shard']
+
+    def __str__(self):
+        return f"{self.scope}:{self.owner_id}#{self.shard} {self.used}/{'∞' if self.capacity is None else self.capacity}"
 
 
 class SystemSettings(models.Model):
@@ -0,0 +1,319 @@
+"""
+Atomic application quotas for ApplicationSettings and AdmissionSession.
+
+Each quota owner's max_applications is split across QUOTA_SHARDS QuotaShard
+rows. A reservation is a conditional `UPDATE ... SET used = used + 1 WHERE
+used < capacity` on one randomly chosen shard, so the cap is enforced by the
+database without a read-modify-write race, and concurrent submissions spread
+over several rows instead of contending for one. The sum of shard capacities
+equals max_applications, so the hard cap holds across shards.
+
+An application counts against the open window and session of its own
+admission type (general ACADEMIC_YEAR/CALENDAR_YEAR windows cover every
+programme). The owners it reserved are stored on Application.quota_owners as
+"scope:id" references, so release and recounting charge exactly the owners
+that were reserved, whatever has opened or closed since.
+
+current_applications on the owner rows is written by reconcile_quotas(),
+which recounts submitted Applications per recorded owner and redistributes
+the shards; run it periodically (`manage.py reconcile_quotas`).
+"""
+import logging
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import QuotaShard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 8
+
+# Application statuses that hold a place in the quota
+SUBMITTED_STATUSES = ('In Progress', 'Completed')
+
+# programme_applied values on the application form -> admission_type
+PROGRAMME_ADMISSION_TYPES = {
+    'ug': 'UG',
+    'undergraduate': 'UG',
+    'pg': 'PG',
+    'postgraduate': 'PG',
+    'diploma': 'DIPLOMA',
+    'certificate': 'CERTIFICATE',
+    'phd': 'PHD',
+}
+
+# Windows of these types are not tied to one programme level
+GENERAL_ADMISSION_TYPES = ('ACADEMIC_YEAR', 'CALENDAR_YEAR')
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, owner):
+        self.owner = owner
+        super().__init__(f"Application quota reached for {owner}")
+
+
+def _shard_count():
+    return max(1, getattr(settings, 'QUOTA_SHARDS', DEFAULT_SHARDS))
+
+
+def _scope(owner):
+    return 'admission_session' if owner._meta.label == 'admissions.AdmissionSession' else 'application_settings'
+
+
+def _using():
+    return router.db_for_write(QuotaShard)
+
+
+def owner_ref(owner):
+    """Reference stored in Application.quota_owners, e.g. "application_settings:3"."""
+    return f"{_scope(owner)}:{owner.pk}"
+
+
+def _shards(owner):
+    return _ref_shards(owner_ref(owner))
+
+
+def _ref_shards(ref):
+    scope, owner_id = ref.split(':', 1)
+    return QuotaShard.objects.using(_using()).filter(scope=scope, owner_id=int(owner_id))
+
+
+def _split(max_applications, shards):
+    """Capacities per shard summing to max_applications (None = unlimited)."""
+    if not max_applications:
+        return [None] * shards
+    base, extra = divmod(max_applications, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def _distribute(used, capacities):
+    """Spread `used` over shards without exceeding any capacity."""
+    if all(c is None for c in capacities):
+        base, extra = divmod(used, len(capacities))
+        return [base + (1 if i < extra else 0) for i in range(len(capacities))]
+    result = []
+    for capacity in capacities:
+        take = min(used, capacity)
+        result.append(take)
+        used -= take
+    if used:
+        # More submissions than the cap allows (cap lowered after the fact);
+        # keep the overflow on the last shard so it stays visibly full.
+        result[-1] += used
+    return result
+
+
+def _create_shards(owner):
+    capacities = _split(owner.max_applications, _shard_count())
+    used = _distribute(max(owner.current_applications, 0), capacities)
+    QuotaShard.objects.using(_using()).bulk_create(
+        [
+            QuotaShard(scope=_scope(owner), owner_id=owner.pk, shard=i, capacity=capacity, used=u)
+            for i, (capacity, u) in enumerate(zip(capacities, used))
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _try_shards(queryset, candidates, change):
+    for shard in candidates:
+        if queryset.filter(shard=shard).update(used=F('used') + change):
+            return shard
+    return None
+
+
+def reserve(owner):
+    """Take one place in `owner`'s quota; raise QuotaExceeded if it is full."""
+    has_room = Q(capacity__isnull=True) | Q(used__lt=F('capacity'))
+    shards = _shards(owner).filter(has_room)
+
+    # Fast path: one conditional UPDATE on a random shard
+    if _try_shards(shards, [random.randrange(_shard_count())], 1) is not None:
+        return
+
+    for attempt in range(2):
+        candidates = list(shards.values_list('shard', flat=True))
+        random.shuffle(candidates)
+        if _try_shards(shards, candidates, 1) is not None:
+            return
+        if attempt == 0 and not _shards(owner).exists():
+            _create_shards(owner)
+            continue
+        break
+    raise QuotaExceeded(owner)
+
+
+def release(owner):
+    """Give back one place in `owner`'s quota (no-op if nothing is used)."""
+    _release_ref(owner_ref(owner))
+
+
+def _release_ref(ref):
+    shards = _ref_shards(ref).filter(used__gt=0)
+    if _try_shards(shards, [random.randrange(_shard_count())], -1) is not None:
+        return
+    candidates = list(shards.values_list('shard', flat=True))
+    random.shuffle(candidates)
+    _try_shards(shards, candidates, -1)
+
+
+def admission_type_for(application):
+    """The admission_type an application's programme falls under, or None."""
+    programme = (application.programme_applied or '').strip().casefold()
+    return PROGRAMME_ADMISSION_TYPES.get(programme)
+
+
+def _preferred(owners, admission_type):
+    """The first owner of `admission_type`, else the first general one."""
+    for wanted in ((admission_type,) if admission_type else ()) + GENERAL_ADMISSION_TYPES:
+        for owner in owners:
+            if owner.admission_type == wanted:
+                return owner
+    return None
+
+
+def quota_owners(application):
+    """The open ApplicationSettings window and AdmissionSession an application counts against."""
+    from admissions.models import AdmissionSession
+    from .admission_window import get_active_window
+
+    admission_type = admission_type_for(application)
+    owners = []
+    for candidate in ((admission_type,) if admission_type else ()) + GENERAL_ADMISSION_TYPES:
+        window = get_active_window(candidate)
+        if window is not None:
+            owners.append(window)
+            break
+    if application.academic_year:
+        session = _preferred(
+            AdmissionSession.objects.filter(
+                status='OPEN', is_active=True, admission_year=application.academic_year,
+                admission_type__in=((admission_type,) if admission_type else ()) + GENERAL_ADMISSION_TYPES,
+            ),
+            admission_type,
+        )
+        if session is not None:
+            owners.append(session)
+    return owners
+
+
+def reserve_application(application):
+    """
+    Reserve a place in every quota the application counts against, all or
+    nothing, and record them on application.quota_owners (saved by the
+    caller with the status change). Returns the owners reserved so the
+    caller can release them if its own write fails.
+    """
+    owners = quota_owners(application)
+    with transaction.atomic(using=_using()):
+        for owner in owners:
+            reserve(owner)
+    application.quota_owners = [owner_ref(owner) for owner in owners]
+    return owners
+
+
+def release_application(application, owners=None):
+    """
+    Give back the places recorded on the application at reservation (or
+    `owners`) and clear the record; the caller saves the application.
+    """
+    refs = [owner_ref(owner) for owner in owners] if owners is not None else list(application.quota_owners or [])
+    for ref in refs:
+        _release_ref(ref)
+    application.quota_owners = []
+
+
+def sync_capacity(owner, used=None):
+    """
+    Re-split shard capacities after max_applications changes, keeping the
+    used total (or setting it to `used`). No-op until the owner has shards.
+    """
+    with transaction.atomic(using=_using()):
+        shards = list(_shards(owner).select_for_update().order_by('shard'))
+        if not shards:
+            return
+        capacities = _split(owner.max_applications, len(shards))
+        total = sum(s.used for s in shards) if used is None else used
+        for shard, capacity, u in zip(shards, capacities, _distribute(total, capacities)):
+            shard.capacity = capacity
+            shard.used = u
+        QuotaShard.objects.using(_using()).bulk_update(shards, ['capacity', 'used'])
+
+
+def _backfill_quota_owners(applications):
+    """
+    Record owners on submitted applications that predate
+    Application.quota_owners: the active window/session of the application's
+    admission type and academic year, whatever its status now.
+    """
+    from admissions.models import AdmissionSession
+    from api.academic_calendar import normalize_academic_year
+    from api.models import Application
+    from .models import ApplicationSettings
+
+    owners_by_year = {}
+    for model in (ApplicationSettings, AdmissionSession):
+        for owner in model.objects.filter(is_active=True):
+            key = (model, normalize_academic_year(owner.admission_year))
+            owners_by_year.setdefault(key, []).append(owner)
+
+    now = timezone.now()
+    for application in applications:
+        admission_type = admission_type_for(application)
+        refs = []
+        for model in (ApplicationSettings, AdmissionSession):
+            key = (model, normalize_academic_year(application.academic_year))
+            owner = _preferred(owners_by_year.get(key, []), admission_type)
+            if owner is not None:
+                refs.append(owner_ref(owner))
+        application.quota_owners = refs
+        application.updated_at = now  # bulk_update skips auto_now
+    Application.objects.bulk_update(applications, ['quota_owners', 'updated_at'], batch_size=500)
+
+
+def reconcile_quotas():
+    """
+    Recount submitted Applications per recorded quota owner, reset each
+    active owner's shards and current_applications to the real count, and
+    return a list of (owner, recorded, actual) for owners that had drifted.
+    """
+    from admissions.models import AdmissionSession
+    from api.models import Application
+    from .admission_window import invalidate_admission_windows
+    from .models import ApplicationSettings
+
+    submitted = Application.objects.filter(status__in=SUBMITTED_STATUSES, is_active=True)
+    unrecorded = [
+        application
+        for application in submitted.only('id', 'programme_applied', 'academic_year', 'quota_owners')
+        if not application.quota_owners
+    ]
+    if unrecorded:
+        _backfill_quota_owners(unrecorded)
+
+    actual_by_owner = Counter()
+    for refs in submitted.values_list('quota_owners', flat=True).iterator():
+        actual_by_owner.update(refs or [])
+
+    drifted = []
+    for model in (ApplicationSettings, AdmissionSession):
+        for owner in model.objects.filter(is_active=True):
+            actual = actual_by_owner.get(owner_ref(owner), 0)
+            recorded = _shards(owner).aggregate(total=Sum('used'))['total']
+            if recorded is not None:
+                sync_capacity(owner, used=actual)
+            else:
+                recorded = owner.current_applications
+            if recorded != actual or owner.current_applications != actual:
+                drifted.append((owner, recorded, actual))
+                model.objects.filter(pk=owner.pk).update(current_applications=actual, updated_at=timezone.now())
+
+    invalidate_admission_windows()
+    for owner, recorded, actual in drifted:
+        logger.info("Quota reconciled for %s: %s -> %s", owner, recorded, actual)
+    return drifted
@@ -1,12 +1,36 @@
+from datetime import date
+
 from rest_framework import serializers
 from .models import Program, Student, Attendance, AssignmentMark, Counsellor, ApplicationSettings, SystemSettings, NotificationSettings, ApplicationSettings, SystemSettings, NotificationSettings
 
+class EagerLoadingMixin:
+    """
+    Serializers list the related objects their `source=` fields reach into in
+    `related_fields` ({fk name: (columns read on the related row)}).
+    setup_eager_loading() turns that into one select_related() join restricted
+    with only(), so listing N rows costs one query instead of 1 + N per FK.
+    """
+    related_fields = {}
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if not cls.related_fields:
+            return queryset
+        own = [f.name for f in queryset.model._meta.concrete_fields]
+        related = [
+            f"{fk}__{column}"
+            for fk, columns in cls.related_fields.items()
+            for column in columns
+        ]
+        return queryset.select_related(*cls.related_fields).only(*own, *related)
+
 class ProgramSerializer(serializers.ModelSerializer):
     class Meta:
         model = Program
         fields = '__all__'
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    related_fields = {'program': ('name',), 'counsellor': ('counsellor_name',)}
     program_name = serializers.CharField(source='program.name', read_only=True)
     counsellor_name = serializers.CharField(source='counsellor.counsellor_name', read_only=True)
 
@@ -14,7 +38,8 @@ class StudentSerializer(serializers.ModelSerializer):
         model = Student
         fields = '__all__'
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    related_fields = {'student': ('name', 'application_no')}
     student_name = serializers.CharField(source='student.name', read_only=True)
     application_no = serializers.CharField(source='student.application_no', read_only=True)
 
@@ -22,7 +47,8 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = '__all__'
 
-class AssignmentMarkSerializer(serializers.ModelSerializer):
+class AssignmentMarkSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    related_fields = {'student': ('name',), 'program': ('name',)}
     student_name = serializers.CharField(source='student.name', read_only=True)
     program_name = serializers.CharField(source='program.name', read_only=True)
 
@@ -30,7 +56,8 @@ class AssignmentMarkSerializer(serializers.ModelSerializer):
         model = AssignmentMark
         fields = '__all__'
 
-class CounsellorSerializer(serializers.ModelSerializer):
+class CounsellorSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    related_fields = {'programme_assigned': ('name',)}
     programme_assigned_name = serializers.CharField(source='programme_assigned.name', read_only=True)
 
     class Meta:
@@ -38,10 +65,22 @@ class CounsellorSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ApplicationSettingsSerializer(serializers.ModelSerializer):
-    is_currently_open = serializers.ReadOnlyField()
-    days_remaining = serializers.ReadOnlyField()
+    is_currently_open = serializers.SerializerMethodField()
+    days_remaining = serializers.SerializerMethodField()
     can_accept_applications = serializers.ReadOnlyField()
 
+    def _today(self):
+        # Evaluated once per response; list serializers share the context dict
+        if 'today' not in self.context:
+            self.context['today'] = date.today()
+        return self.context['today']
+
+    def get_is_currently_open(self, obj):
+        return obj.is_open_on(self._today())
+
+    def get_days_remaining(self, obj):
+        return obj.days_remaining_on(self._today())
+
     class Meta:
         model = ApplicationSettings
         fields = '__all__'
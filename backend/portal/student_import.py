@@ -0,0 +1,223 @@
+"""
+Streaming roster import for portal.Student (CSV or XLSX).
+
+Rows are read lazily from the file, validated in batches against lookup dicts
+built once per import (Program code -> id, Counsellor email -> id), checked
+for duplicate application numbers (within the file and against the database,
+one IN query per batch) and saved with bulk_create, one transaction per batch.
+
+Expected columns (header names are case-insensitive, spaces allowed):
+application_no, name, program_code, community, payment_status,
+admission_status, counsellor_email. `payment_status`, `admission_status` and
+`counsellor_email` are optional.
+"""
+import csv
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+
+from .models import Counsellor, Program, Student
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 500
+
+COLUMN_ALIASES = {
+    'program': 'program_code',
+    'counsellor': 'counsellor_email',
+    'application_number': 'application_no',
+}
+
+SCALAR_FIELDS = ('application_no', 'name', 'community', 'payment_status', 'admission_status')
+
+
+class ImportFileError(Exception):
+    """The uploaded file could not be read as a roster."""
+
+
+def _normalise_header(value):
+    name = str(value or '').strip().lower().replace(' ', '_')
+    return COLUMN_ALIASES.get(name, name)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store numeric application numbers as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def iter_csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        header = [_normalise_header(h) for h in next(reader)]
+    except StopIteration:
+        return
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read CSV file: {e}")
+    try:
+        for values in reader:
+            yield dict(zip(header, (_cell(v) for v in values)))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read CSV file: {e}")
+
+
+def iter_xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import requires openpyxl; upload a CSV file instead")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Could not read XLSX file: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            header = [_normalise_header(h) for h in next(rows)]
+        except StopIteration:
+            return
+        for values in rows:
+            yield dict(zip(header, (_cell(v) for v in values)))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Pick the reader from the file extension."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return iter_xlsx_rows(fileobj)
+    if extension in ('.csv', '.txt', ''):
+        return iter_csv_rows(fileobj)
+    raise ImportFileError(f"Unsupported file type '{extension}'; use .csv or .xlsx")
+
+
+class StudentImporter:
+    """
+    Import rows into portal.Student. Existing application numbers are skipped
+    (reported as duplicates); nothing is updated in place.
+    """
+
+    def __init__(self, batch_size=None, dry_run=False, progress=None):
+        self.batch_size = batch_size or getattr(settings, 'STUDENT_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.dry_run = dry_run
+        self.progress = progress
+        self.using = router.db_for_write(Student)
+        self.programs = {
+            code.upper(): pk
+            for pk, code in Program.objects.using(self.using).values_list('pk', 'code')
+        }
+        self.counsellors = {
+            email.lower(): pk
+            for pk, email in Counsellor.objects.using(self.using).values_list('pk', 'email_id')
+        }
+        self.seen = set()
+        self.result = {
+            'processed': 0,
+            'created': 0,
+            'duplicates': 0,
+            'error_count': 0,
+            'errors': [],
+            'dry_run': dry_run,
+        }
+
+    def _error(self, row_number, errors):
+        self.result['error_count'] += 1
+        if len(self.result['errors']) < MAX_REPORTED_ERRORS:
+            self.result['errors'].append({'row': row_number, 'errors': errors})
+
+    def _build(self, row):
+        """Return (Student, errors) for one row; Student is None on error."""
+        errors = {}
+        values = {}
+        for name in SCALAR_FIELDS:
+            field = Student._meta.get_field(name)
+            raw = row.get(name, '')
+            if raw == '' and field.has_default():
+                continue
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        code = row.get('program_code', '').upper()
+        if not code:
+            errors['program_code'] = ["This field is required."]
+        elif code not in self.programs:
+            errors['program_code'] = [f"Unknown program code '{code}'."]
+        else:
+            values['program_id'] = self.programs[code]
+
+        email = row.get('counsellor_email', '').lower()
+        if email:
+            if email not in self.counsellors:
+                errors['counsellor_email'] = [f"Unknown counsellor '{email}'."]
+            else:
+                values['counsellor_id'] = self.counsellors[email]
+
+        if errors:
+            return None, errors
+        return Student(**values), None
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        numbers = [student.application_no for student in batch]
+        existing = set(
+            Student.objects.using(self.using)
+            .filter(application_no__in=numbers)
+            .values_list('application_no', flat=True)
+        )
+        new = [student for student in batch if student.application_no not in existing]
+        self.result['duplicates'] += len(batch) - len(new)
+
+        if new and not self.dry_run:
+            with transaction.atomic(using=self.using):
+                Student.objects.using(self.using).bulk_create(new, batch_size=self.batch_size)
+        self.result['created'] += len(new)
+
+        if self.progress:
+            self.progress(self.result)
+
+    def run(self, rows):
+        batch = []
+        for row_number, row in enumerate(rows, start=2):  # row 1 is the header
+            if not any(row.values()):
+                continue
+            self.result['processed'] += 1
+            student, errors = self._build(row)
+            if errors:
+                self._error(row_number, errors)
+                continue
+            if student.application_no in self.seen:
+                self.result['duplicates'] += 1
+                continue
+            self.seen.add(student.application_no)
+            batch.append(student)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+
+        logger.info(
+            f"Student import: {self.result['processed']} rows, {self.result['created']} created, "
+            f"{self.result['duplicates']} duplicates, {self.result['error_count']} rejected"
+            f"{' (dry run)' if self.dry_run else ''}"
+        )
+        return self.result
+
+
+def import_students(fileobj, filename, **options):
+    """Read `fileobj` (CSV or XLSX, chosen by `filename`) and import it."""
+    importer = StudentImporter(**options)
+    return importer.run(iter_rows(fileobj, filename))
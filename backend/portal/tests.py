@@ -0,0 +1,286 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from django.db.models import Sum
+
+from backend.query_budget import DEFAULT_DUPLICATE_THRESHOLD, assert_query_budget
+
+from portal.models import ApplicationSettings, AssignmentMark, Attendance, Counsellor, Program, Student
+
+# More rows than the duplicate threshold, so a per-row query shows up as N+1
+ROWS = DEFAULT_DUPLICATE_THRESHOLD * 3
+
+pytestmark = pytest.mark.django_db(databases='__all__')
+
+
+@pytest.fixture
+def seeded():
+    programs = [Program.objects.create(code=f'P{i}', name=f'Programme {i}') for i in range(ROWS)]
+    counsellors = [
+        Counsellor.objects.create(
+            counsellor_name=f'Counsellor {i}', father_name='F', mother_name='M',
+            date_of_birth=date(1980, 1, 1), gender='Female', aadhaar_card=f'{i:012d}',
+            qualification='MSc', highest_qualification='PhD', programme_assigned=programs[i],
+            mobile_number='9876543210', email_id=f'counsellor{i}@example.com',
+            current_designation='Lecturer', working_experience='10 years',
+            address_line1='Street', pincode='636011', district='Salem', state='Tamil Nadu',
+        )
+        for i in range(ROWS)
+    ]
+    students = [
+        Student.objects.create(
+            application_no=f'APP{i:04d}', name=f'Student {i}', program=programs[i],
+            community='General', counsellor=counsellors[i],
+        )
+        for i in range(ROWS)
+    ]
+    for i, student in enumerate(students):
+        Attendance.objects.create(student=student, attendance_percentage=80 + i)
+        AssignmentMark.objects.create(
+            reg_no=f'REG{i:04d}', student=student, program=student.program,
+            p_code=f'PC{i}', internal_marks=20,
+        )
+    for i in range(ROWS):
+        ApplicationSettings.objects.create(
+            admission_code=f'A{i}', admission_type='UG', admission_year=f'20{20 + i}-{21 + i}',
+            admission_key=f'KEY{i}',
+        )
+    return {'program': programs[0], 'student': students[0], 'counsellor': counsellors[0]}
+
+
+@pytest.fixture
+def staff_client(budget_client):
+    budget_client.force_authenticate(User.objects.create_user('staff', password='x', is_staff=True))
+    return budget_client
+
+
+LIST_ENDPOINTS = [
+    ('/api/programs/', Program),
+    ('/api/students/', Student),
+    ('/api/attendance/', Attendance),
+    ('/api/assignment-marks/', AssignmentMark),
+    ('/api/counsellors/', Counsellor),
+    ('/api/application-settings/', ApplicationSettings),
+]
+
+
+@pytest.mark.parametrize('path,model', LIST_ENDPOINTS)
+def test_list_within_budget(seeded, staff_client, path, model):
+    response = staff_client.get(path)
+    assert response.status_code == 200
+    rows = response.data['results'] if isinstance(response.data, dict) else response.data
+    assert len(rows) == model.objects.count()
+
+
+@pytest.mark.parametrize('path,model', LIST_ENDPOINTS)
+def test_retrieve_within_budget(seeded, staff_client, path, model):
+    response = staff_client.get(f'{path}{model.objects.order_by("id").first().pk}/')
+    assert response.status_code == 200
+
+
+def test_student_list_eager_loads_relations(seeded, staff_client):
+    response = staff_client.get('/api/students/')
+    row = response.data['results'][0]
+    assert row['program_name'] and row['counsellor_name']
+    # StudentSerializer reads program and counsellor through one joined query
+    assert staff_client.last_recording.counts() == {'lsc_admindb': 1}
+
+
+def test_writes_are_not_held_to_the_read_budget(seeded, staff_client):
+    student = seeded['student']
+    # Lookup plus UPDATE: over the retrieve budget of 1, but no budget is
+    # declared for partial_update
+    response = staff_client.patch(f'/api/students/{student.pk}/', {'payment_status': 'Paid'}, format='json')
+    assert response.status_code == 200
+    assert staff_client.last_recording.counts()['lsc_admindb'] > 1
+
+    response = staff_client.post('/api/attendance/bulk/', [
+        {'student': pk, 'attendance_percentage': '75.00'} for pk in Student.objects.values_list('pk', flat=True)
+    ], format='json')
+    assert response.status_code == 200
+    assert Attendance.objects.count() == ROWS * 2
+
+
+def test_budget_applies_per_action():
+    from backend.query_budget import budget_for_view
+    from django.urls import resolve
+
+    assert budget_for_view(resolve('/api/students/').func, 'GET') == {'lsc_admindb': 2}
+    assert budget_for_view(resolve('/api/students/1/').func, 'GET') == {'lsc_admindb': 1}
+    assert budget_for_view(resolve('/api/students/').func, 'POST') is None
+    assert budget_for_view(resolve('/api/students/1/').func, 'PUT') is None
+
+
+def test_per_row_queries_are_reported_as_duplicates(seeded):
+    from backend.query_budget import QueryRecorder, check_budget
+
+    with QueryRecorder() as recorder:
+        names = [student.program.name for student in Student.objects.all()]
+    assert len(names) == ROWS
+    problems = check_budget(recorder, {'lsc_admindb': ROWS + 1})
+    assert problems and all('N+1' in problem for problem in problems), problems
+
+
+def _add_rows(count, start):
+    program = Program.objects.create(code=f'X{start}', name=f'Extra {start}')
+    for i in range(start, start + count):
+        student = Student.objects.create(application_no=f'EXT{i:04d}', name=f'Extra {i}', program=program, community='SC')
+        Attendance.objects.create(student=student, attendance_percentage=90)
+        AssignmentMark.objects.create(reg_no=f'EXT{i:04d}', student=student, program=program, p_code='PX', internal_marks=15)
+
+
+@pytest.mark.parametrize('path', ['/api/students/', '/api/attendance/', '/api/assignment-marks/', '/api/counsellors/'])
+def test_eager_loaded_list_query_count_is_flat(seeded, staff_client, django_assert_num_queries, path):
+    staff_client.get(path)
+    baseline = sum(staff_client.last_recording.counts().values())
+
+    _add_rows(ROWS * 2, start=0)
+    with django_assert_num_queries(baseline, using='lsc_admindb'):
+        response = staff_client.get(path)
+    assert response.status_code == 200
+
+
+def test_eager_loading_joins_related_rows():
+    from portal.serializers import AssignmentMarkSerializer, AttendanceSerializer, StudentSerializer
+
+    _add_rows(ROWS, start=100)
+    for serializer in (StudentSerializer, AttendanceSerializer, AssignmentMarkSerializer):
+        queryset = serializer.setup_eager_loading(serializer.Meta.model.objects.all())
+        with assert_query_budget(lsc_admindb=1):
+            serializer(queryset, many=True).data
+
+
+def _window(code, admission_type, year='2025-26', **fields):
+    return ApplicationSettings.objects.create(
+        admission_code=code, admission_type=admission_type, admission_year=year,
+        admission_key=f'KEY-{code}', is_open=True, is_close=False, **fields,
+    )
+
+
+def _application(email, programme='Postgraduate', year='2025-26', status='Draft'):
+    from api.models import Application
+
+    user = User.objects.create_user(email, email=email, password='x')
+    return Application.objects.create(
+        user=user, email=email, programme_applied=programme, academic_year=year, status=status,
+    )
+
+
+def test_reservation_is_charged_to_the_application_admission_type():
+    from django.core.cache import cache
+    from portal.quota import reserve_application
+
+    cache.clear()
+    pg = _window('PG25', 'PG', max_applications=10)
+    _window('UG25', 'UG', max_applications=10)  # newer, but another programme level
+    application = _application('pg@example.com')
+
+    owners = reserve_application(application)
+    assert owners == [pg]
+    assert application.quota_owners == [f'application_settings:{pg.pk}']
+
+
+def test_release_returns_the_places_recorded_at_reservation():
+    from django.core.cache import cache
+    from portal.models import QuotaShard
+    from portal.quota import release_application, reserve_application
+
+    cache.clear()
+    pg = _window('PG25', 'PG', max_applications=10)
+    application = _application('pg@example.com')
+    reserve_application(application)
+    application.status = 'In Progress'
+    application.save()
+
+    # Another PG window opening later must not receive the release
+    pg.is_open, pg.is_close = False, True
+    pg.save()
+    later = _window('PG26', 'PG', year='2026-27', max_applications=10)
+    cache.clear()
+
+    release_application(application)
+    assert application.quota_owners == []
+    used = dict(QuotaShard.objects.values_list('owner_id').annotate(total=Sum('used')))
+    assert used.get(pg.pk) == 0 and later.pk not in used
+
+
+def test_reconcile_counts_per_recorded_owner():
+    from django.core.cache import cache
+    from portal.quota import reconcile_quotas, reserve_application
+
+    cache.clear()
+    pg = _window('PG25', 'PG', year='2025-26')
+    ug = _window('UG25', 'UG', year='2025-2026')
+    for i, programme in enumerate(['Postgraduate', 'Postgraduate', 'UG']):
+        application = _application(f's{i}@example.com', programme=programme)
+        reserve_application(application)
+        application.status = 'In Progress'
+        application.save()
+
+    # Legacy row written before admission years were normalized on save
+    ApplicationSettings.objects.filter(pk=ug.pk).update(admission_year='2025/2026')
+    ApplicationSettings.objects.filter(pk__in=[pg.pk, ug.pk]).update(current_applications=0)
+    reconcile_quotas()
+    counts = dict(ApplicationSettings.objects.values_list('admission_code', 'current_applications'))
+    # Each window keeps its own count, even when its year string differs
+    # from the applications' academic_year
+    assert counts == {'PG25': 2, 'UG25': 1}
+
+
+def _scheduled(code, **flags):
+    window = ApplicationSettings.objects.create(
+        admission_code=code, admission_type='PG', admission_year='2026-27', admission_key=f'KEY-{code}',
+        opening_date=date(2026, 4, 1), closing_date=date(2026, 5, 31), **flags,
+    )
+    # As left by an import or an earlier run, before the opening date
+    ApplicationSettings.objects.filter(pk=window.pk).update(status='SCHEDULED')
+    return window
+
+
+def test_refresh_does_not_open_manually_closed_windows():
+    from portal.admission_window import refresh_statuses
+
+    scheduled = _scheduled('SCHED')
+    closed = _scheduled('SHUT', is_open=False, is_close=True)
+    ApplicationSettings.objects.filter(pk=scheduled.pk).update(is_open=False, is_close=False)
+
+    assert refresh_statuses(date(2026, 4, 1)) == 1
+    statuses = dict(ApplicationSettings.objects.values_list('pk', 'status'))
+    assert statuses[scheduled.pk] == 'OPEN' and statuses[closed.pk] == 'SCHEDULED'
+
+
+def test_refresh_uses_the_local_date(settings, monkeypatch):
+    from datetime import datetime, timezone as dt_timezone
+    from django.utils import timezone
+    from portal.admission_window import refresh_statuses
+
+    window = _scheduled('LOCAL')
+    ApplicationSettings.objects.filter(pk=window.pk).update(is_open=False, is_close=False)
+    settings.TIME_ZONE = 'Asia/Kolkata'
+    # 31 March in UTC, already 1 April in India
+    monkeypatch.setattr(timezone, 'now', lambda: datetime(2026, 3, 31, 20, 0, tzinfo=dt_timezone.utc))
+    assert refresh_statuses() == 1
+    window.refresh_from_db()
+    assert window.status == 'OPEN'
+
+
+@pytest.mark.parametrize('path', [
+    '/api/students/?program=abc',
+    '/api/students/?counsellor=1.5',
+    '/api/students/by_program/?program_id=abc',
+    '/api/assignment-marks/by_program/?program_id=x1',
+])
+def test_non_integer_id_params_are_rejected(staff_client, path):
+    response = staff_client.get(path)
+    assert response.status_code == 400
+    assert set(response.data) & {'program', 'counsellor', 'program_id'}
+
+
+def test_integer_id_params_filter(seeded, staff_client):
+    program, counsellor = seeded['program'], seeded['counsellor']
+    response = staff_client.get(f'/api/students/?program={program.pk}&counsellor={counsellor.pk}')
+    assert [row['id'] for row in response.data['results']] == [seeded['student'].pk]
+    response = staff_client.get(f'/api/assignment-marks/by_program/?program_id={program.pk}')
+    assert response.status_code == 200 and len(response.data['results']) == 1
+    assert staff_client.get('/api/students/by_program/').status_code == 400
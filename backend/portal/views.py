@@ -1,8 +1,18 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count, Sum, Avg
+from datetime import date, datetime, time, timedelta
+from django.db.models import Count, Sum, Avg, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from backend.conditional import conditional_get, rows_token
+from backend.db_router import replica_reads
+from .bulk import BulkInputError, BulkWriter, read_rows
+from .student_import import ImportFileError, import_students
 from .models import Program, Student, Attendance, AssignmentMark, Counsellor, ApplicationSettings, SystemSettings, NotificationSettings
 from .serializers import (
     ProgramSerializer, StudentSerializer, AttendanceSerializer,
@@ -10,49 +20,190 @@ from .serializers import (
     SystemSettingsSerializer, NotificationSettingsSerializer
 )
 
+class EagerLoadingViewSetMixin:
+    """Apply the serializer's setup_eager_loading() to every queryset the view lists."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        setup = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        return setup(queryset) if setup else queryset
+
+class BulkWriteMixin:
+    """
+    POST <list url>/bulk/ with a JSON array or a CSV `file` upload.
+    Rows are validated together and written in one transaction; any invalid
+    row rejects the batch unless ?partial=true, and the response lists the
+    errors per row.
+    """
+    bulk_fields = ()
+    bulk_key_field = 'id'
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk(self, request):
+        try:
+            rows = read_rows(request)
+        except BulkInputError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not rows:
+            return Response({"error": "No rows supplied"}, status=status.HTTP_400_BAD_REQUEST)
+
+        partial = request.query_params.get('partial') == 'true'
+        writer = BulkWriter(self.queryset.model, self.bulk_fields, key_field=self.bulk_key_field)
+        result = writer.save(rows, partial=partial)
+        if result['errors'] and not partial:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
 class ProgramViewSet(viewsets.ModelViewSet):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+
+def _day_start(value):
+    """Aware midnight for a YYYY-MM-DD query param, or None if it does not parse."""
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        day = None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def _id_param(params, name):
+    """Integer id from query param `name`, or None if absent; 400 if it is not an integer."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'A valid integer is required.'})
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        # Exact filters; each combination below is covered by an index on Student
+        application_no = params.get('application_no')
+        if application_no:
+            queryset = queryset.filter(application_no=application_no)
+
+        program = _id_param(params, 'program')
+        if program is not None:
+            queryset = queryset.filter(program_id=program)
+
+        counsellor = _id_param(params, 'counsellor')
+        if counsellor is not None:
+            queryset = queryset.filter(counsellor_id=counsellor)
+
+        payment_status = params.get('payment_status')
+        if payment_status:
+            queryset = queryset.filter(payment_status=payment_status)
+
+        admission_status = params.get('admission_status')
+        if admission_status:
+            queryset = queryset.filter(admission_status=admission_status)
+
+        # Prefix search only, so MySQL can range-scan the name index
+        name = params.get('name')
+        if name:
+            queryset = queryset.filter(name__istartswith=name)
+
+        search = params.get('search')
+        if search:
+            queryset = queryset.filter(
+                Q(name__istartswith=search) | Q(application_no__istartswith=search)
+            )
+
+        # Date range on created_at, both ends inclusive (YYYY-MM-DD)
+        created_from = _day_start(params.get('created_from'))
+        if created_from:
+            queryset = queryset.filter(created_at__gte=created_from)
+
+        created_to = _day_start(params.get('created_to'))
+        if created_to:
+            queryset = queryset.filter(created_at__lt=created_to + timedelta(days=1))
+
+        return queryset
 
     @action(detail=False, methods=['get'])
     def by_program(self, request):
-        program_id = request.query_params.get('program_id')
-        if program_id:
-            students = self.queryset.filter(program_id=program_id)
+        program_id = _id_param(request.query_params, 'program_id')
+        if program_id is not None:
+            students = self.paginate_queryset(self.get_queryset().filter(program_id=program_id))
             serializer = self.get_serializer(students, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
         return Response({"error": "program_id required"}, status=400)
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser, FormParser])
+    def import_roster(self, request):
+        """Import a CSV/XLSX roster uploaded as `file`; ?dry_run=true only validates."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = import_students(
+                upload.file, upload.name,
+                dry_run=request.query_params.get('dry_run') == 'true',
+            )
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+class AttendanceViewSet(BulkWriteMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+    bulk_fields = ('student', 'attendance_percentage', 'status')
 
-class AssignmentMarkViewSet(viewsets.ModelViewSet):
+class AssignmentMarkViewSet(BulkWriteMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = AssignmentMark.objects.all()
     serializer_class = AssignmentMarkSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+    bulk_fields = ('reg_no', 'student', 'program', 'p_code', 'internal_marks', 'status')
+    bulk_key_field = 'reg_no'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        p_code = params.get('p_code')
+        if p_code:
+            queryset = queryset.filter(p_code=p_code)
+
+        status_filter = params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+
+        return queryset
 
     @action(detail=False, methods=['get'])
     def by_program(self, request):
-        program_id = request.query_params.get('program_id')
-        if program_id:
-            marks = self.queryset.filter(program_id=program_id)
+        program_id = _id_param(request.query_params, 'program_id')
+        if program_id is not None:
+            marks = self.paginate_queryset(self.get_queryset().filter(program_id=program_id))
             serializer = self.get_serializer(marks, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
         return Response({"error": "program_id required"}, status=400)
 
-class CounsellorViewSet(viewsets.ModelViewSet):
+class CounsellorViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Counsellor.objects.all()
     serializer_class = CounsellorSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
 
+@method_decorator(replica_reads, name='dispatch')
 class ReportsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
@@ -73,26 +224,34 @@ class ReportsViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def application_report(self, request):
-        students = Student.objects.all()
+        students = StudentSerializer.setup_eager_loading(Student.objects.all())
         serializer = StudentSerializer(students, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def unpaid_report(self, request):
-        students = Student.objects.filter(payment_status='Pending')
+        students = StudentSerializer.setup_eager_loading(Student.objects.filter(payment_status='Pending'))
         serializer = StudentSerializer(students, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def confirmed_report(self, request):
-        students = Student.objects.filter(admission_status='Confirmed')
+        students = StudentSerializer.setup_eager_loading(Student.objects.filter(admission_status='Confirmed'))
         serializer = StudentSerializer(students, many=True)
         return Response(serializer.data)
 
+def _application_settings_etag(request, *args, **kwargs):
+    # Serialized rows depend on the stored columns and on today's date
+    latest = ApplicationSettings.objects.aggregate(updated=Max('updated_at'), total=Count('id'))
+    return rows_token(latest, date.today())
+
+@method_decorator(conditional_get(etag_func=_application_settings_etag, name='application_settings_list'), name='list')
 class ApplicationSettingsViewSet(viewsets.ModelViewSet):
     queryset = ApplicationSettings.objects.all()
     serializer_class = ApplicationSettingsSerializer
     permission_classes = [AllowAny]  # Allow access for now
+    query_budget = {'list': {'lsc_admindb': 2}, 'retrieve': {'lsc_admindb': 1}}
+    pagination_class = None  # Handful of rows; the frontend expects a plain list
 
     def perform_create(self, serializer):
         # Set created_by from request user
@@ -176,15 +335,16 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
     def by_type(self, request):
         setting_type = request.query_params.get('type')
         if setting_type:
-            settings = self.queryset.filter(setting_type=setting_type, is_active=True)
+            settings = self.paginate_queryset(self.queryset.filter(setting_type=setting_type, is_active=True))
             serializer = self.get_serializer(settings, many=True)
-            return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
         return Response({"error": "type parameter required"}, status=400)
 
 class NotificationSettingsViewSet(viewsets.ModelViewSet):
     queryset = NotificationSettings.objects.all()
     serializer_class = NotificationSettingsSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None  # At most one row per notification type per user
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)